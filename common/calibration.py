@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Automatic tuning (--auto) of the parallelism of the extraction scripts. A short calibration runs
+    on a sample of utterances in a forked process, measuring for each stage (load, compute, write or
+    copy) the wall and CPU times, and the memory used by the process and per loaded utterance. The
+    plans derive from these measures the number of workers and the queue depths (roots2lab) or the
+    number of copy threads (roots2wav) within a memory budget. The trial writes of the calibration
+    go to a hidden directory of the output directory, so they are timed on the file system of the
+    real writes, and are removed afterwards.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import math
+import time
+import queue
+import resource
+import tempfile
+import multiprocessing
+
+###############################################################################
+# Measures
+###############################################################################
+MAX_DEPTH = 16
+MAX_COPY_THREADS = 64
+
+def sample_ids(ids, size):
+    """Deterministic sample of size ids evenly spread over ids
+    """
+    ids = list(ids)
+    if len(ids) <= size:
+        return ids
+    step = len(ids) / float(size)
+    return [ids[int(i * step)] for i in range(size)]
+
+def current_rss():
+    """Resident memory of the current process in bytes
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def available_memory():
+    """Available physical memory in bytes
+    """
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+class StageTimes:
+    def __init__(self):
+        self.wall = dict()
+        self.cpu = dict()
+        self.count = dict()
+
+    def measure(self, stage, function, *args):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        result = function(*args)
+        self.wall[stage] = self.wall.get(stage, 0.0) + time.perf_counter() - wall
+        self.cpu[stage] = self.cpu.get(stage, 0.0) + time.process_time() - cpu
+        self.count[stage] = self.count.get(stage, 0) + 1
+        return result
+
+    def mean_wall(self, stage):
+        return self.wall.get(stage, 0.0) / max(1, self.count.get(stage, 0))
+
+    def mean_cpu(self, stage):
+        return self.cpu.get(stage, 0.0) / max(1, self.count.get(stage, 0))
+
+    def to_dict(self):
+        return {"wall": self.wall, "cpu": self.cpu, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, values):
+        times = cls()
+        (times.wall, times.cpu, times.count) = (values["wall"], values["cpu"], values["count"])
+        return times
+
+def trial_directory(output_dir):
+    """New directory of the output directory for the trial writes of a calibration (to remove after)
+    """
+    return tempfile.mkdtemp(prefix=".calibration.", dir=output_dir)
+
+def run_forked(function, *args, timeout=None, poll_interval=1.0):
+    """Run function(*args) in a forked process (its memory use doesn't pollute the current one) and
+    return its result
+
+    A RuntimeError is raised if the process dies without result (e.g. killed by the OOM killer) or
+    if it runs for more than timeout seconds.
+    """
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+
+    def target():
+        try:
+            results.put((None, function(*args)))
+        except Exception as ex:
+            results.put(("%s: %s" % (type(ex).__name__, ex), None))
+
+    process = context.Process(target=target)
+    process.start()
+    start = time.monotonic()
+    try:
+        while True:
+            try:
+                (error, result) = results.get(timeout=poll_interval)
+                break
+            except queue.Empty:
+                pass
+            if not process.is_alive():
+                # The result may have been sent just before the exit
+                try:
+                    (error, result) = results.get(timeout=poll_interval)
+                    break
+                except queue.Empty:
+                    raise RuntimeError("calibration failed: the process died with exit code %s" % process.exitcode)
+            if (timeout is not None) and (time.monotonic() - start > timeout):
+                raise RuntimeError("calibration failed: no result after %ds" % timeout)
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+    if error is not None:
+        raise RuntimeError("calibration failed: %s" % error)
+    return result
+
+###############################################################################
+# Plans
+###############################################################################
+def clamp(value, lower, upper):
+    return max(lower, min(upper, value))
+
+def plan_label_workers(times, process_memory, utterance_memory, nb_utts, memory_budget=None, nb_cpus=None):
+    """Number of workers and queue depths of roots2lab
+
+    The queue depths are set so that the prefetch (resp. write) stage keeps up with the compute
+    stage. The CPU time of all the stages counts as the threads of a worker share the interpreter,
+    the number of workers being raised above the number of CPUs only for the I/O wait which isn't
+    hidden by the stages. The memory of a worker is its own memory plus the queued utterances.
+    """
+    nb_cpus = nb_cpus or available_cpus()
+    memory_budget = memory_budget or available_memory()
+
+    compute = max(times.mean_wall("compute"), 1e-6)
+    prefetch_depth = clamp(int(math.ceil(times.mean_wall("load") / compute)) + 1, 1, MAX_DEPTH)
+    write_depth = clamp(int(math.ceil(times.mean_wall("write") / compute)) + 1, 1, MAX_DEPTH)
+
+    stages = ("load", "compute", "write")
+    cpu = max(sum(times.mean_cpu(s) for s in stages), 1e-6)
+    critical = max(times.mean_wall(s) for s in stages)
+    nb_by_cpu = clamp(int(math.ceil(nb_cpus * max(critical, cpu) / cpu)), 1, 2 * nb_cpus)
+
+    worker_memory = process_memory + (prefetch_depth + write_depth + 1) * utterance_memory
+    nb_by_memory = max(1, int(memory_budget // max(worker_memory, 1)))
+
+    nb_proc = max(1, min(nb_by_cpu, nb_by_memory, nb_utts))
+    limit = "CPU" if nb_proc == nb_by_cpu else ("memory" if nb_proc == nb_by_memory else "corpus size")
+    return {"nb_proc": nb_proc, "prefetch_depth": prefetch_depth, "write_depth": write_depth,
+            "worker_memory": worker_memory, "memory_budget": memory_budget, "limited_by": limit}
+
+def plan_copy_threads(times, nb_utts, utterance_memory=0, memory_budget=None, nb_cpus=None):
+    """Number of copy threads of roots2wav: enough threads to keep one CPU busy while the others wait
+    for the file system, each thread holding one loaded utterance within the memory budget
+    """
+    nb_cpus = nb_cpus or available_cpus()
+    memory_budget = memory_budget or available_memory()
+
+    wall = sum(times.mean_wall(s) for s in ("load", "copy"))
+    cpu = max(sum(times.mean_cpu(s) for s in ("load", "copy")), 1e-6)
+    nb_by_cpu = clamp(int(math.ceil(wall / cpu)), 1, min(MAX_COPY_THREADS, 4 * nb_cpus))
+    nb_by_memory = max(1, int(memory_budget // max(utterance_memory, 1)))
+
+    nb_proc = max(1, min(nb_by_cpu, nb_by_memory, nb_utts))
+    limit = "CPU" if nb_proc == nb_by_cpu else ("memory" if nb_proc == nb_by_memory else "corpus size")
+    return {"nb_proc": nb_proc, "thread_memory": utterance_memory, "memory_budget": memory_budget,
+            "limited_by": limit}
+
+def describe(plan, times):
+    """One line description of a plan and of the measures it derives from
+    """
+    measures = ", ".join("%s %.1f ms (%.0f%% CPU)" % (s, 1e3 * times.mean_wall(s),
+                                                      100.0 * times.mean_cpu(s) / max(times.mean_wall(s), 1e-9))
+                         for s in sorted(times.wall))
+    choices = ", ".join("%s=%s" % (k, ("%d MB" % (v // 2**20)) if k.endswith("memory") or k.endswith("budget") else v)
+                        for (k, v) in sorted(plan.items()))
+    return "%s [%s]" % (choices, measures)
+
+# calibration.py ends here
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Cached snapshot of a configuration: the parsed and validated YAML configuration and the content
+    of its alphabets (phones by category, NSS) are pickled in the cache directory. A warm start
+    reads the snapshot instead of parsing the YAML file and building the alphabets, which means that
+    roots isn't even imported. The snapshot is rebuilt when the configuration file changes.
+
+    The cache directory is $ROOTS2HTS_CACHE, or $XDG_CACHE_HOME/roots2hts (~/.cache/roots2hts).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import pickle
+import hashlib
+import logging
+
+###############################################################################
+# Constants
+###############################################################################
+SNAPSHOT_VERSION = 1
+
+REQUIRED_TIERS = ("segment", "phone", "nss", "syllable", "word", "phrase")
+REQUIRED_ALPHABETS = ("Phone", "NSS")
+
+###############################################################################
+# Configuration and alphabets
+###############################################################################
+def cache_dir():
+    if "ROOTS2HTS_CACHE" in os.environ:
+        return os.environ["ROOTS2HTS_CACHE"]
+    base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "roots2hts")
+
+def snapshot_path(config_path):
+    key = hashlib.sha1(os.path.abspath(config_path).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir(), "%s.snapshot" % key)
+
+def config_stamp(config_path):
+    stat = os.stat(config_path)
+    return {"path": os.path.abspath(config_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def validate_config(config, config_path=""):
+    """Check that the configuration defines the tiers and alphabets needed by the scripts
+    """
+    if not isinstance(config, dict):
+        raise ValueError("%s: the configuration should be a mapping" % config_path)
+    missing = ["SequenceLabels.%s" % tier for tier in REQUIRED_TIERS if tier not in config.get("SequenceLabels", {})]
+    missing += ["Alphabets.%s" % name for name in REQUIRED_ALPHABETS if name not in config.get("Alphabets", {})]
+    if missing:
+        raise ValueError("%s: missing configuration entries %s" % (config_path, ", ".join(missing)))
+
+def build_alphabets(config):
+    """Phones by category and NSS of the alphabets of the configuration, None if the alphabets can't
+    be loaded
+    """
+    import roots
+    modules = [roots]
+    try:
+        import roots3p
+        modules.append(roots3p)
+    except Exception as ex:
+        pass
+
+    def alphabet(kind, name):
+        class_name = "phonology_%s_%sAlphabet" % (kind, name)
+        for module in modules:
+            if hasattr(module, class_name):
+                return getattr(module, class_name).get_instance()
+        raise AttributeError("unknown alphabet %s" % class_name)
+
+    try:
+        phone_alphabet = alphabet("ipa", config["Alphabets"]["Phone"])
+        nss_alphabet = alphabet("nsa", config["Alphabets"]["NSS"])
+        return {"phone_categories": dict((category, list(phones)) for (category, phones)
+                                         in phone_alphabet.list_phonemes_by_categories().items()),
+                "nss": list(nss_alphabet.get_alphabet_map().keys())}
+    except Exception as ex:
+        logging.warning("alphabets can't be loaded (%s), their symbol tables are empty" % ex)
+        return None
+
+def alphabet_symbols(alphabets):
+    """Symbols of the phone and NSS alphabets (NSS as written in the labels)
+    """
+    symbols = {"phone": [], "nss": []}
+    if alphabets is not None:
+        for phones in alphabets["phone_categories"].values():
+            symbols["phone"] += phones
+        symbols["nss"] = [nss.replace("#", "dash").replace("%", "percent") for nss in alphabets["nss"]]
+    return symbols
+
+###############################################################################
+# Snapshot
+###############################################################################
+class ConfigSnapshot:
+    def __init__(self, config, alphabets, stamp=None):
+        self.config = config
+        self.alphabets = alphabets
+        self.stamp = stamp
+
+    def symbols(self):
+        return alphabet_symbols(self.alphabets)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": SNAPSHOT_VERSION, "stamp": self.stamp, "config": self.config,
+                         "alphabets": self.alphabets}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, config_path):
+        """Snapshot of the configuration file, None if there is none or if it is stale
+        """
+        path = snapshot_path(config_path)
+        try:
+            with open(path, "rb") as f:
+                values = pickle.load(f)
+        except Exception:
+            return None
+        if (values.get("version") != SNAPSHOT_VERSION) or (values.get("stamp") != config_stamp(config_path)):
+            return None
+        return cls(values["config"], values["alphabets"], values["stamp"])
+
+    @classmethod
+    def build(cls, config_path):
+        from yaml import load
+        try:
+            from yaml import CLoader as Loader
+        except ImportError:
+            from yaml import Loader
+
+        stamp = config_stamp(config_path)
+        with open(config_path) as f:
+            config = load(f, Loader=Loader)
+        validate_config(config, config_path)
+        return cls(config, build_alphabets(config), stamp)
+
+def load_configuration(config_path, use_cache=True):
+    """Snapshot of the configuration, from the cache if it is up to date
+    """
+    if use_cache:
+        snapshot = ConfigSnapshot.load(config_path)
+        if snapshot is not None:
+            return snapshot
+
+    snapshot = ConfigSnapshot.build(config_path)
+    # Alphabets which can't be loaded now may be later: no snapshot
+    if use_cache and (snapshot.alphabets is not None):
+        try:
+            snapshot.save(snapshot_path(config_path))
+        except OSError as ex:
+            logging.debug("the configuration snapshot can't be saved (%s)" % ex)
+    return snapshot
+
+# config_snapshot.py ends here
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Sidecar index of a roots corpus. For each utterance, it stores the size of the main tiers, the
+    signal path and duration and a hash of the utterance structure, so that the utterances can be
+    planned (sharding, scheduling, caching) without being deserialised.
+
+    The index is stored next to the corpus in <corpus>.index.json and is considered as stale, and
+    therefore ignored, as soon as the corpus file, one of the files it references (layer files) or
+    the tier configuration changes, or if it can't be read (truncated or corrupt JSON). The files are first compared on their size and modification
+    time, then on their content hash; when only the modification times changed, the stamp of the
+    index is updated so that the next loads don't hash the files again.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import json
+import hashlib
+import logging
+from multiprocessing import Pool
+
+###############################################################################
+# Constants
+###############################################################################
+INDEX_VERSION = 2
+
+COUNTED_TIERS = ("segment", "phone", "nss", "syllable", "word", "phrase")
+COLUMNS = COUNTED_TIERS + ("signal", "duration", "hash")
+
+SIGNAL_LABEL = "Signal"
+
+# Extensions of the files referenced by a corpus file which are part of its stamp
+REFERENCED_EXTENSIONS = (".json",)
+
+###############################################################################
+# Corpus file
+###############################################################################
+def index_path(corpus_path):
+    return "%s.index.json" % corpus_path
+
+def file_stamp(path, with_hash=True):
+    """Identity of a file: size, modification time and content hash
+    """
+    st = os.stat(path)
+    stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if with_hash:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        stamp["sha1"] = h.hexdigest()
+    return stamp
+
+def referenced_files(corpus_path):
+    """Files referenced by the corpus file (layer files): the strings of the corpus JSON naming an
+    existing file with one of the REFERENCED_EXTENSIONS, relative to the corpus directory
+    """
+    base_dir = os.path.dirname(os.path.abspath(corpus_path))
+    try:
+        with open(corpus_path) as f:
+            values = [json.load(f)]
+    except (ValueError, UnicodeDecodeError):
+        return []
+
+    files = set()
+    while values:
+        value = values.pop()
+        if isinstance(value, dict):
+            values.extend(value.values())
+        elif isinstance(value, list):
+            values.extend(value)
+        elif isinstance(value, str) and value.endswith(REFERENCED_EXTENSIONS):
+            path = os.path.join(base_dir, value)
+            if os.path.isfile(path):
+                files.add(os.path.relpath(path, base_dir))
+    return sorted(files)
+
+def corpus_stamp(corpus_path, with_hash=True, files=None):
+    """Identity of the corpus file and of the files it references (by default, see referenced_files),
+    None for the referenced files which don't exist anymore
+    """
+    base_dir = os.path.dirname(os.path.abspath(corpus_path))
+    if files is None:
+        files = referenced_files(corpus_path)
+    stamp = file_stamp(corpus_path, with_hash)
+    stamp["files"] = dict()
+    for name in files:
+        path = os.path.join(base_dir, name)
+        stamp["files"][name] = file_stamp(path, with_hash) if os.path.isfile(path) else None
+    return stamp
+
+def stamp_key(stamp, keys):
+    """Values of the stamp (and of the stamps of the referenced files) for the given keys
+    """
+    def values(file_stamp):
+        return None if file_stamp is None else tuple(file_stamp[key] for key in keys)
+
+    return (values(stamp), sorted((name, values(s)) for (name, s) in stamp["files"].items()))
+
+###############################################################################
+# Utterance description
+###############################################################################
+def count(utt, name):
+    """Size of a sequence of the utterance, 0 if the utterance doesn't have it
+    """
+    if not utt.is_valid_sequence(name):
+        return 0
+    return utt.get_sequence(name).count()
+
+def related(utt, source, target, index):
+    try:
+        elements = utt.get_relation(source, target).get_related_elements(index)
+    except Exception:
+        return -1
+    if elements:
+        return elements[0]
+    return -1
+
+def describe_utterance(utt, sequence_labels, signal_label=SIGNAL_LABEL):
+    """Compute the index values of one utterance
+    """
+    values = dict((tier, count(utt, sequence_labels[tier])) for tier in COUNTED_TIERS)
+
+    # Structure: kind of each segment and phone attachments
+    h = hashlib.sha1()
+    h.update(json.dumps(values, sort_keys=True).encode("utf-8"))
+    for s in range(values["segment"]):
+        h.update(b"p%d" % related(utt, sequence_labels["segment"], sequence_labels["phone"], s))
+    for p in range(values["phone"]):
+        h.update(b"s%dw%dp%d" % tuple(related(utt, sequence_labels["phone"], sequence_labels[tier], p)
+                                      for tier in ("syllable", "word", "phrase")))
+    values["hash"] = h.hexdigest()
+
+    # Signal and duration
+    values["signal"] = None
+    values["duration"] = 0.0
+    try:
+        item = utt.get_sequence(signal_label).as_segment_sequence().get_item(0).as_signal_segment()
+        values["signal"] = os.path.join(item.get_base_dir_name(), item.get_file_name())
+        values["duration"] = item.get_segment_end() - item.get_segment_start()
+    except Exception:
+        pass
+    if (values["duration"] <= 0) and (values["segment"] > 0):
+        segments = utt.get_sequence(sequence_labels["segment"]).as_segment_sequence()
+        values["duration"] = segments.get_item(values["segment"] - 1).get_segment_end()
+
+    return values
+
+###############################################################################
+# Index
+###############################################################################
+class CorpusIndex:
+    def __init__(self, columns, stamp=None, sequence_labels=None):
+        """columns maps each column name to the list of its values (one per utterance)
+        """
+        self.columns = columns
+        self.stamp = stamp
+        self.sequence_labels = sequence_labels
+
+    def count_utterances(self):
+        return len(self.columns["hash"])
+
+    def get(self, utt_id, column):
+        return self.columns[column][utt_id]
+
+    def cost(self, utt_id, kind="label"):
+        """Estimated cost of an utterance: segments for the labels, duration for the signal
+        """
+        if kind == "signal":
+            return self.columns["duration"][utt_id]
+        return self.columns["segment"][utt_id]
+
+    def save(self, path):
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "stamp": self.stamp,
+                       "sequence_labels": self.sequence_labels, "columns": self.columns}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, corpus_path, sequence_labels=None):
+        """Load the sidecar index of the corpus, None if it doesn't exist, is stale or is unreadable
+        (truncated or corrupt)
+        """
+        path = index_path(corpus_path)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path) as f:
+                values = json.load(f)
+            version = values["version"]
+        except (ValueError, UnicodeDecodeError, KeyError, TypeError) as ex:
+            logging.warning("%s: unreadable index, ignored (%s)" % (path, ex))
+            return None
+        if version != INDEX_VERSION:
+            logging.info("%s: index version changed" % path)
+            return None
+        if (sequence_labels is not None) and (values["sequence_labels"] != sequence_labels):
+            logging.info("%s: tier configuration changed" % path)
+            return None
+
+        # Fast path on the file metadata, content hash otherwise
+        stamp = values["stamp"]
+        cur = corpus_stamp(corpus_path, with_hash=False, files=stamp["files"])
+        if stamp_key(cur, ("size", "mtime_ns")) == stamp_key(stamp, ("size", "mtime_ns")):
+            return cls(values["columns"], stamp, values["sequence_labels"])
+
+        # The corpus file may now reference other files
+        cur = corpus_stamp(corpus_path)
+        if stamp_key(cur, ("size", "sha1")) != stamp_key(stamp, ("size", "sha1")):
+            logging.info("%s: corpus changed, index is stale" % path)
+            return None
+
+        # Only the modification times changed: refresh the stamp to avoid hashing again
+        index = cls(values["columns"], cur, values["sequence_labels"])
+        try:
+            index.save(path)
+        except OSError as ex:
+            logging.info("%s: can't refresh the stamp (%s)" % (path, ex))
+        return index
+
+    @classmethod
+    def build(cls, corpus, corpus_path, sequence_labels, nb_proc=1):
+        global _corpus, _sequence_labels
+        _corpus, _sequence_labels = corpus, sequence_labels
+
+        ids = range(corpus.count_utterances())
+        if nb_proc > 1:
+            with Pool(nb_proc) as pool:
+                values = pool.map(_describe, ids, chunksize=64)
+        else:
+            values = [_describe(i) for i in ids]
+
+        columns = dict((c, [v[c] for v in values]) for c in COLUMNS)
+        return cls(columns, corpus_stamp(corpus_path), sequence_labels)
+
+# Corpus shared with the (forked) pool processes
+_corpus = None
+_sequence_labels = None
+
+def _describe(utt_id):
+    return describe_utterance(_corpus.get_utterance(utt_id), _sequence_labels)
+
+# corpus_index.py ends here
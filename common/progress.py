@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Progress and throughput metrics of an extraction run: rolling number of utterances per second,
+    ETA, failures and per worker rates. The metrics are periodically logged and, if requested,
+    written in a JSON status file which can be polled by a job scheduler. The failed ids and their
+    exceptions are kept apart in a failure report.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import time
+import json
+import logging
+import threading
+from collections import deque
+
+###############################################################################
+# Helpers
+###############################################################################
+def write_json(path, value):
+    """Atomically (re)write a JSON file so that a reader never sees a partial file
+    """
+    tmp_path = "%s.tmp" % path
+    with open(tmp_path, "w") as f:
+        json.dump(value, f, indent=2)
+    os.replace(tmp_path, path)
+
+###############################################################################
+# Progress
+###############################################################################
+class Progress:
+    def __init__(self, total, status_path=None, failures_path=None, interval=10.0, window=60.0):
+        """total is the number of utterances to process, interval the minimal time in seconds
+        between two status updates and window the duration of the rolling rate.
+        """
+        self.total = total
+        self.status_path = status_path
+        self.failures_path = failures_path
+        self.interval = interval
+        self.window = window
+
+        self.start = time.time()
+        self.last_update = self.start
+        self.nb_done = 0
+        self.recent = deque()
+        self.workers = dict()
+        self.failures = []
+        self.lock = threading.Lock()
+
+    def done(self, worker, utt_id):
+        with self.lock:
+            self.nb_done += 1
+            self.count(worker, "done")
+        self.update()
+
+    def failed(self, worker, utt_id, error):
+        with self.lock:
+            self.failures.append({"id": utt_id, "worker": worker, "error": error})
+            self.count(worker, "failed")
+        self.update()
+
+    def count(self, worker, kind):
+        now = time.time()
+        self.recent.append(now)
+        if worker not in self.workers:
+            self.workers[worker] = {"done": 0, "failed": 0, "start": now}
+        self.workers[worker][kind] += 1
+
+    def update(self, force=False):
+        """Log the status and write the status file if the interval is elapsed
+        """
+        with self.lock:
+            now = time.time()
+            if (not force) and (now - self.last_update < self.interval):
+                return
+            self.last_update = now
+            status = self.status(now)
+
+        logging.info("%d/%d done, %d failed, %.2f utt/s, ETA %s" %
+                     (status["done"], status["total"], status["failed"], status["rate"],
+                      "-" if status["eta"] is None else "%ds" % status["eta"]))
+        if self.status_path is not None:
+            write_json(self.status_path, status)
+
+    def status(self, now):
+        while self.recent and (self.recent[0] < now - self.window):
+            self.recent.popleft()
+        rate = len(self.recent) / min(self.window, max(now - self.start, 1e-6))
+
+        processed = self.nb_done + len(self.failures)
+        eta = None
+        if rate > 0:
+            eta = (self.total - processed) / rate
+
+        workers = dict()
+        for (name, values) in self.workers.items():
+            elapsed = max(now - values["start"], 1e-6)
+            workers[name] = {"done": values["done"], "failed": values["failed"],
+                             "rate": (values["done"] + values["failed"]) / elapsed}
+
+        return {"total": self.total, "done": self.nb_done, "failed": len(self.failures),
+                "rate": rate, "eta": eta, "elapsed": now - self.start,
+                "finished": processed >= self.total, "workers": workers}
+
+    def close(self):
+        """Final status and failure report
+        """
+        self.update(force=True)
+        if self.failures_path is not None:
+            write_json(self.failures_path, self.failures)
+        elif self.failures:
+            logging.error("%d utterances failed: %s" %
+                          (len(self.failures), ", ".join(str(f["id"]) for f in self.failures)))
+
+# progress.py ends here
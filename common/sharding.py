@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Deterministic partition of the utterances of a corpus into shards processed on different nodes.
+    The shards are balanced using the estimated cost of each utterance (taken from the corpus index
+    when available). Each shard writes a manifest which is checked and combined by the merge step.
+    The outputs gathering several utterances (archives) and the intermediate files of a shard are
+    suffixed by the shard (e.g. full.3-of-20.list), so the shards can share their output directory.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import json
+import heapq
+import shutil
+import hashlib
+
+###############################################################################
+# Planning
+###############################################################################
+def parse_shard(value):
+    """Parse a "i/N" shard specification, i being in [0, N-1]
+    """
+    try:
+        (index, nb_shards) = [int(v) for v in value.split("/")]
+    except ValueError:
+        raise ValueError("\"%s\" is not a valid shard specification (expected i/N)" % value)
+    if (nb_shards < 1) or not (0 <= index < nb_shards):
+        raise ValueError("shard index should be in [0, %d[ (got %d)" % (nb_shards, index))
+    return (index, nb_shards)
+
+def plan_shards(ids, costs, nb_shards):
+    """Split the ids in nb_shards lists of balanced total cost
+
+    Greedy longest processing time first: the utterances are sorted by decreasing cost (then id) and
+    each one goes to the least loaded shard (then the lowest shard index). The plan only depends on
+    the ids and their costs.
+    """
+    shards = [[] for _ in range(nb_shards)]
+    loads = [(0, s) for s in range(nb_shards)]
+    for (cost, utt_id) in sorted(((costs[i], i) for i in ids), key=lambda v: (-v[0], v[1])):
+        (load, s) = heapq.heappop(loads)
+        shards[s].append(utt_id)
+        heapq.heappush(loads, (load + cost, s))
+    return [sorted(shard) for shard in shards]
+
+def plan_digest(shards):
+    """Digest of a plan, all the shards of a run should share it
+    """
+    return hashlib.sha1(json.dumps(shards).encode("utf-8")).hexdigest()
+
+def estimated_costs(ids, index=None, kind="label"):
+    """Costs taken from the corpus index, uniform costs without index
+    """
+    if index is None:
+        return dict((i, 1) for i in ids)
+    return dict((i, index.cost(i, kind)) for i in ids)
+
+###############################################################################
+# Manifests
+###############################################################################
+def shard_suffix(shard, nb_shards):
+    return ".%d-of-%d" % (shard, nb_shards)
+
+def shard_path(path, shard, nb_shards):
+    """Path suffixed by the shard, before its extension (full.list => full.3-of-20.list)
+    """
+    (root, ext) = os.path.splitext(path)
+    return root + shard_suffix(shard, nb_shards) + ext
+
+def manifest_path(output_dir, tool, shard, nb_shards):
+    return os.path.join(output_dir, "manifest.%s%s.json" % (tool, shard_suffix(shard, nb_shards)))
+
+def write_manifest(output_dir, tool, shard, nb_shards, shards, pattern, failed=(), archives=()):
+    """Write the manifest of a finished shard
+
+    pattern is the name of the output file of an utterance ("%d.lab"), archives a list of
+    (kind, path) of files gathering several utterances which should be combined by the merge. The
+    archive paths may be suffixed by the shard (see shard_path), the merged file name is then
+    the name without the suffix.
+    """
+    suffix = shard_suffix(shard, nb_shards)
+    manifest = {"tool": tool, "shard": shard, "nb_shards": nb_shards,
+                "plan": plan_digest(shards), "nb_ids": sum(len(s) for s in shards),
+                "output_dir": os.path.abspath(output_dir), "pattern": pattern,
+                "ids": shards[shard], "failed": sorted(failed),
+                "archives": [{"kind": kind, "path": os.path.abspath(path),
+                              "name": os.path.basename(path).replace(suffix, "", 1)} for (kind, path) in archives]}
+    path = manifest_path(output_dir, tool, shard, nb_shards)
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+    return path
+
+###############################################################################
+# Merge
+###############################################################################
+def concatenate(paths, output_path):
+    with open(output_path, "wb") as out:
+        for path in paths:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, out)
+
+# kind => function(list of input paths, output path)
+ARCHIVE_MERGERS = {"text": concatenate}
+
+def check_manifests(manifests):
+    """Check that the manifests form one complete run, return the list of errors
+    """
+    errors = []
+    if not manifests:
+        return ["no manifest"]
+
+    first = manifests[0]
+    for key in ("tool", "nb_shards", "plan", "nb_ids"):
+        values = set(m[key] for m in manifests)
+        if len(values) > 1:
+            errors.append("inconsistent %s across the manifests: %s" % (key, sorted(values)))
+    if errors:
+        return errors
+
+    shards = [m["shard"] for m in manifests]
+    missing = sorted(set(range(first["nb_shards"])) - set(shards))
+    if missing:
+        errors.append("missing shards: %s" % missing)
+    duplicated = sorted(set(s for s in shards if shards.count(s) > 1))
+    if duplicated:
+        errors.append("duplicated shards: %s" % duplicated)
+
+    seen = dict()
+    for m in manifests:
+        for utt_id in m["ids"]:
+            if utt_id in seen and seen[utt_id] != m["shard"]:
+                errors.append("utterance %d is in shards %d and %d" % (utt_id, seen[utt_id], m["shard"]))
+            seen[utt_id] = m["shard"]
+    if (not missing) and (len(seen) != first["nb_ids"]):
+        errors.append("%d utterances expected, %d found" % (first["nb_ids"], len(seen)))
+    return errors
+
+def merge_manifests(manifest_paths, output_dir):
+    """Check and combine the shard manifests (and their archives) in output_dir
+
+    Raise a ValueError listing the problems if the shards don't form a complete run.
+    """
+    manifests = []
+    for path in manifest_paths:
+        with open(path) as f:
+            manifests.append(json.load(f))
+    manifests.sort(key=lambda m: m["shard"])
+
+    errors = check_manifests(manifests)
+    if errors:
+        raise ValueError("; ".join(errors))
+
+    # Archives: combined per kind and file name, in shard order
+    groups = dict()
+    for m in manifests:
+        for archive in m["archives"]:
+            key = (archive["kind"], archive.get("name", os.path.basename(archive["path"])))
+            groups.setdefault(key, []).append(archive["path"])
+    archives = []
+    for ((kind, name), paths) in sorted(groups.items()):
+        output_path = os.path.join(output_dir, name)
+        ARCHIVE_MERGERS[kind](paths, output_path)
+        archives.append({"kind": kind, "path": os.path.abspath(output_path)})
+
+    merged = {"tool": manifests[0]["tool"], "nb_shards": manifests[0]["nb_shards"],
+              "plan": manifests[0]["plan"], "nb_ids": manifests[0]["nb_ids"],
+              "shards": [dict((k, m[k]) for k in ("shard", "output_dir", "pattern", "ids", "failed"))
+                         for m in manifests],
+              "failed": sorted(sum((m["failed"] for m in manifests), [])),
+              "archives": archives}
+    path = os.path.join(output_dir, "manifest.%s.json" % merged["tool"])
+    with open(path, "w") as f:
+        json.dump(merged, f)
+    return merged
+
+# sharding.py ends here
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Read-only corpus-wide tables published by the main process in one shared memory block, so that
+    the workers attach them without copying (the memory used per worker doesn't grow with the
+    tables). The block contains:
+      - symbol tables (sorted lists of strings, e.g. the alphabets),
+      - integer columns indexed by utterance id (e.g. the sizes from the corpus index),
+      - the bitmap of the ignored utterance ids,
+      - settings (a small JSON mapping, e.g. the tiers and alphabet names of the configuration).
+
+    Layout: 4 bytes header size, JSON header giving the offset of each table, then the flat arrays
+    (uint32 string offsets followed by the UTF-8 strings, int32 columns, bitmap).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import json
+import struct
+from bisect import bisect_left
+from array import array
+from multiprocessing import shared_memory
+
+###############################################################################
+# Shared tables
+###############################################################################
+class SharedTables:
+    def __init__(self, shm, owner):
+        """Use SharedTables.create in the main process and SharedTables.attach in the workers
+        """
+        self.shm = shm
+        self.owner = owner
+        buf = shm.buf
+
+        (header_size,) = struct.unpack_from("<I", buf, 0)
+        self.header = json.loads(bytes(buf[4:4+header_size]).decode("utf-8"))
+
+        self.symbol_tables = dict()
+        for (name, (offset, count, data_offset, data_size)) in self.header["symbols"].items():
+            offsets = buf[offset:offset + 4 * (count + 1)].cast("I")
+            self.symbol_tables[name] = (offsets, buf[data_offset:data_offset + data_size])
+        self.columns = dict((name, buf[offset:offset + 4 * count].cast("i"))
+                            for (name, (offset, count)) in self.header["columns"].items())
+        (offset, nb_ids) = self.header["ignored"]
+        self.ignored = buf[offset:offset + (nb_ids + 7) // 8]
+        self.nb_ids = nb_ids
+        self.settings = self.header.get("settings", dict())
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def create(cls, symbols, columns, ignored, nb_ids, settings=None):
+        """symbols maps a table name to a list of strings, columns a column name to a list of ints
+        (one per utterance), ignored is the list of the ignored utterance ids and settings a JSON
+        serializable mapping
+        """
+        header = {"symbols": dict(), "columns": dict(), "settings": settings or dict()}
+        parts = []
+        offset = 0
+
+        def add(data):
+            nonlocal offset
+            start = offset
+            parts.append(data)
+            offset += len(data)
+            offset += (-offset) % 8
+            parts.append(b"\0" * ((-len(data)) % 8))
+            return start
+
+        # Offsets are relative to the data area, fixed once the header size is known
+        for (name, values) in symbols.items():
+            encoded = [s.encode("utf-8") for s in sorted(set(values))]
+            offsets = array("I", [0])
+            for s in encoded:
+                offsets.append(offsets[-1] + len(s))
+            data = b"".join(encoded)
+            header["symbols"][name] = [add(offsets.tobytes()), len(encoded), add(data), len(data)]
+        for (name, values) in columns.items():
+            header["columns"][name] = [add(array("i", values).tobytes()), len(values)]
+        bitmap = bytearray((nb_ids + 7) // 8)
+        for i in ignored:
+            if 0 <= i < nb_ids:
+                bitmap[i // 8] |= 1 << (i % 8)
+        header["ignored"] = [add(bytes(bitmap)), nb_ids]
+
+        # Relocate the offsets after the header
+        nb_offsets = 2 * len(header["symbols"]) + len(header["columns"]) + 1
+        header_size = len(json.dumps(header)) + 16 * nb_offsets
+        base = 4 + header_size
+        base += (-base) % 8
+        for v in header["symbols"].values():
+            v[0] += base
+            v[2] += base
+        for v in header["columns"].values():
+            v[0] += base
+        header["ignored"][0] += base
+        encoded_header = json.dumps(header).encode("utf-8")
+        assert len(encoded_header) <= header_size
+
+        shm = shared_memory.SharedMemory(create=True, size=max(base + offset, 1))
+        shm.buf[0:4] = struct.pack("<I", len(encoded_header))
+        shm.buf[4:4+len(encoded_header)] = encoded_header
+        pos = base
+        for part in parts:
+            shm.buf[pos:pos+len(part)] = part
+            pos += len(part)
+        return cls(shm, True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach (zero copy) the tables published by the main process
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before python 3.13, the attaching process registers the block in the resource
+            # tracker which would unlink it when the worker ends
+            from multiprocessing import resource_tracker
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        return cls(shm, False)
+
+    def close(self):
+        """Release the views, and the block itself for the main process
+        """
+        for (offsets, data) in self.symbol_tables.values():
+            offsets.release()
+            data.release()
+        for column in self.columns.values():
+            column.release()
+        self.ignored.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    ###########################################################################
+    # Accessors
+    ###########################################################################
+    def count_symbols(self, table):
+        return len(self.symbol_tables[table][0]) - 1
+
+    def symbol(self, table, index):
+        (offsets, data) = self.symbol_tables[table]
+        return bytes(data[offsets[index]:offsets[index+1]]).decode("utf-8")
+
+    def symbol_index(self, table, symbol):
+        """Index of a symbol (binary search as the table is sorted), None if unknown
+        """
+        (offsets, data) = self.symbol_tables[table]
+        key = symbol.encode("utf-8")
+        view = _SymbolView(offsets, data)
+        i = bisect_left(view, key)
+        if (i < len(view)) and (view[i] == key):
+            return i
+        return None
+
+    def column(self, name, utt_id):
+        return self.columns[name][utt_id]
+
+    def is_ignored(self, utt_id):
+        if not (0 <= utt_id < self.nb_ids):
+            return False
+        return bool(self.ignored[utt_id // 8] & (1 << (utt_id % 8)))
+
+class _SymbolView:
+    """Sequence view of an encoded symbol table, used by the binary search
+    """
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return bytes(self.data[self.offsets[index]:self.offsets[index+1]])
+
+# shared_tables.py ends here
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Mergeable approximate counting structures:
+      - HyperLogLog: number of distinct elements,
+      - CountMinSketch: frequency of an element (never underestimated).
+
+    Both can be merged (workers, shards) and serialised to JSON compatible dictionaries (the
+    registers and the counts as base64 of their raw bytes).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import math
+import base64
+import hashlib
+
+import numpy as np
+
+###############################################################################
+# Hashing
+###############################################################################
+def hash64(value, salt=b""):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8, salt=salt).digest(), "little")
+
+###############################################################################
+# HyperLogLog
+###############################################################################
+class HyperLogLog:
+    def __init__(self, precision=14):
+        """2^precision registers, the relative error is about 1.04 / sqrt(2^precision)
+        """
+        self.precision = precision
+        self.nb_registers = 1 << precision
+        self.registers = bytearray(self.nb_registers)
+
+    def add(self, value):
+        h = hash64(value)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("can't merge HyperLogLog of different precisions")
+        self.registers = bytearray(np.maximum(np.frombuffer(self.registers, dtype=np.uint8),
+                                              np.frombuffer(other.registers, dtype=np.uint8)).tobytes())
+
+    def estimate(self):
+        m = self.nb_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if (raw <= 2.5 * m) and (zeros > 0):
+            return m * math.log(m / float(zeros))
+        return raw
+
+    def to_dict(self):
+        return {"precision": self.precision, "registers": base64.b64encode(bytes(self.registers)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, values):
+        hll = cls(values["precision"])
+        hll.registers = bytearray(base64.b64decode(values["registers"]))
+        return hll
+
+###############################################################################
+# Count-min sketch
+###############################################################################
+# Counts as serialised (little endian)
+COUNT_DTYPE = np.dtype("<u4")
+
+class CountMinSketch:
+    def __init__(self, width=1 << 12, depth=4):
+        """The overestimation is at most 2 * total / width with probability 1 - 0.5^depth
+        """
+        if (width < 1) or (depth < 1):
+            raise ValueError("the width and the depth of a count-min sketch should be positive (got %dx%d)" % (width, depth))
+        self.width = width
+        self.depth = depth
+        self.counts = np.zeros((depth, width), dtype=COUNT_DTYPE)
+        self.total = 0
+
+    def positions(self, value):
+        # Double hashing (h1 + d * h2) from one 128 bits digest, so any depth works
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [((h1 + d * h2) & 0xFFFFFFFFFFFFFFFF) % self.width for d in range(self.depth)]
+
+    def add(self, value, count=1):
+        self.total += count
+        self.counts[np.arange(self.depth), self.positions(value)] += count
+
+    def estimate(self, value):
+        return int(self.counts[np.arange(self.depth), self.positions(value)].min())
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("can't merge count-min sketches of different sizes")
+        self.total += other.total
+        self.counts += other.counts
+
+    def to_dict(self):
+        return {"width": self.width, "depth": self.depth, "total": self.total,
+                "counts": base64.b64encode(self.counts.tobytes()).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, values):
+        cms = cls(values["width"], values["depth"])
+        cms.total = values["total"]
+        counts = np.frombuffer(base64.b64decode(values["counts"]), dtype=COUNT_DTYPE)
+        cms.counts = counts.reshape((cms.depth, cms.width)).copy()
+        return cms
+
+# sketches.py ends here
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Time accounting of the stages of a pipeline connected by bounded queues. For each stage, the time
+    is split in:
+      - busy: processing an item,
+      - starved: waiting for an item from the previous stage,
+      - blocked: waiting for room in the queue of the next stage.
+
+    A starved stage needs a deeper input queue (or a faster previous stage), a blocked stage a
+    deeper output queue (or a faster next stage).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import time
+from contextlib import contextmanager
+
+###############################################################################
+# Clock
+###############################################################################
+class StageClock:
+    def __init__(self):
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self.items = 0
+
+    def get(self, input_queue):
+        start = time.monotonic()
+        item = input_queue.get()
+        self.starved += time.monotonic() - start
+        return item
+
+    def put(self, output_queue, item):
+        start = time.monotonic()
+        output_queue.put(item)
+        self.blocked += time.monotonic() - start
+
+    @contextmanager
+    def work(self):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.busy += time.monotonic() - start
+            self.items += 1
+
+    def to_dict(self):
+        return {"busy": self.busy, "starved": self.starved, "blocked": self.blocked, "items": self.items}
+
+###############################################################################
+# Reports
+###############################################################################
+def merge_stage_reports(total, report):
+    """Add the stage report (stage name => StageClock.to_dict()) of a worker to total
+    """
+    for (stage, values) in report.items():
+        if stage not in total:
+            total[stage] = dict((key, 0) for key in values)
+        for (key, value) in values.items():
+            total[stage][key] += value
+    return total
+
+def format_stage_report(total):
+    lines = ["%-10s %8s %12s %12s %12s %7s" % ("stage", "items", "busy (s)", "starved (s)", "blocked (s)", "busy %")]
+    for (stage, values) in total.items():
+        elapsed = values["busy"] + values["starved"] + values["blocked"]
+        ratio = 100.0 * values["busy"] / elapsed if elapsed > 0 else 0.0
+        lines.append("%-10s %8d %12.3f %12.3f %12.3f %6.1f%%" %
+                     (stage, values["items"], values["busy"], values["starved"], values["blocked"], ratio))
+    return "\n".join(lines)
+
+# stages.py ends here
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Supervised pool of worker processes. Each worker has its own pipe to the main process, so a
+    worker killed or crashed in the middle of a send/receive can't lock the others. The supervisor
+    sends the items to the workers (at most window items in flight per worker) and follows the
+    messages of the workers:
+      - ("started", worker, item, stage): the worker starts a stage (load, compute) of the item,
+      - ("stopped", worker, item): the stage is over, the item waits for the next one,
+      - ("done", worker, item) / ("failed", worker, item, error): the item is over,
+      - ("finished", worker, report): the worker ends, after the end of the items (None).
+
+    A worker running an item for more than the timeout is killed, a worker which dies is detected.
+    In both cases, a new worker replaces it and its items are requeued. The items which were in the
+    charged stage (compute) are accounted an attempt, the items only prefetched are requeued without
+    attempt (the items being loaded are accounted when none was computed, the first assigned item
+    when none was running: the worker may die before reporting the start of the item); after
+    max_retries retries, an item is quarantined (reported as failed).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import time
+import logging
+import threading
+from collections import deque
+from multiprocessing import Pipe
+from multiprocessing.connection import wait
+
+###############################################################################
+# Worker side
+###############################################################################
+class WorkerChannel:
+    """Worker end of the pipe, used as the item queue (get) and the message queue (put) of the worker
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.lock = threading.Lock()
+
+    def get(self):
+        return self.connection.recv()
+
+    def put(self, message):
+        with self.lock:
+            self.connection.send(message)
+
+    def task_done(self):
+        pass
+
+###############################################################################
+# Supervisor
+###############################################################################
+class Slot:
+    def __init__(self, worker, connection):
+        self.worker = worker
+        self.connection = connection
+        self.assigned = []
+        self.running = dict()
+        self.completed = []
+        self.ended = False
+        self.finished = False
+
+class Supervisor:
+    def __init__(self, create_worker, nb_workers, window=1, timeout=None, max_retries=2, redo_completed=False,
+                 poll_interval=1.0, charged_stage="compute"):
+        """create_worker(channel) returns a new (not started) worker process. If redo_completed is
+        True, the items already completed by a crashed worker are processed again as its report (and
+        the state it contains) is lost. The items running in charged_stage (or without stage) are the
+        suspects of a crash.
+        """
+        self.create_worker = create_worker
+        self.nb_workers = nb_workers
+        self.window = max(1, window)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.redo_completed = redo_completed
+        self.poll_interval = poll_interval
+        self.charged_stage = charged_stage
+        self.quarantined = []
+
+    def start_worker(self):
+        (parent, child) = Pipe()
+        worker = self.create_worker(WorkerChannel(child))
+        worker.start()
+        child.close()
+        return Slot(worker, parent)
+
+    def run(self, items, progress):
+        """Process all the items, return the reports of the workers
+        """
+        self.pending = deque(items)
+        self.attempts = dict()
+        self.counted = set()
+        self.progress = progress
+        self.slots = [self.start_worker() for _ in range(self.nb_workers)]
+        self.reports = []
+
+        while not all(slot.finished for slot in self.slots):
+            self.dispatch()
+            live = dict((slot.connection, slot) for slot in self.slots if not slot.finished)
+            for connection in wait(list(live), self.poll_interval):
+                slot = live[connection]
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    self.restart(slot, "worker died")
+                    continue
+                self.handle(slot, message, self.reports)
+            self.check()
+            progress.update()
+
+        for slot in self.slots:
+            slot.worker.join()
+        return self.reports
+
+    def dispatch(self):
+        """Fill the pipes of the workers, and end the workers when every item is over
+        """
+        if (not self.pending) and not any(slot.assigned for slot in self.slots):
+            for slot in self.slots:
+                if not (slot.ended or slot.finished):
+                    self.send(slot, None)
+                    slot.ended = True
+            return
+
+        for slot in self.slots:
+            while self.pending and (not (slot.ended or slot.finished)) and (len(slot.assigned) < self.window):
+                item = self.pending.popleft()
+                slot.assigned.append(item)
+                if not self.send(slot, item):
+                    break
+
+    def send(self, slot, item):
+        try:
+            slot.connection.send(item)
+            return True
+        except (BrokenPipeError, OSError):
+            self.restart(slot, "worker died")
+            return False
+
+    def handle(self, slot, message, reports):
+        kind = message[0]
+        if kind == "started":
+            stage = message[3] if len(message) > 3 else None
+            slot.running[message[2]] = (time.monotonic(), stage)
+        elif kind == "stopped":
+            slot.running.pop(message[2], None)
+        elif kind in ("done", "failed"):
+            item = message[2]
+            slot.running.pop(item, None)
+            if item in slot.assigned:
+                slot.assigned.remove(item)
+            if kind == "done":
+                slot.completed.append(item)
+            if item in self.counted:
+                return
+            self.counted.add(item)
+            if kind == "done":
+                self.progress.done(message[1], item)
+            else:
+                self.progress.failed(message[1], item, message[3])
+        elif kind == "finished":
+            reports.append(message[2])
+            slot.finished = True
+
+    def check(self):
+        """Kill the workers over the timeout and replace the dead ones
+        """
+        now = time.monotonic()
+        for slot in list(self.slots):
+            if slot.finished:
+                continue
+            if (self.timeout is not None) and any(now - start > self.timeout for (start, _) in slot.running.values()):
+                late = [item for (item, (start, _)) in slot.running.items() if now - start > self.timeout]
+                self.restart(slot, "timeout after %ds" % self.timeout, late)
+            elif not slot.worker.is_alive():
+                # Messages sent just before a normal exit may still be in the pipe
+                try:
+                    while (not slot.finished) and slot.connection.poll():
+                        self.handle(slot, slot.connection.recv(), self.reports)
+                except (EOFError, OSError):
+                    pass
+                if not slot.finished:
+                    self.restart(slot, "worker died with exit code %s" % slot.worker.exitcode)
+
+    def restart(self, slot, reason, offenders=None):
+        """Replace the worker of the slot, requeue its items and account the attempt to the offenders
+        (by default, the items it was running in the charged stage, else the items it was loading,
+        else the first item it was assigned)
+        """
+        if slot.finished:
+            return
+        if slot.worker.is_alive():
+            slot.worker.kill()
+        slot.worker.join()
+        slot.connection.close()
+        slot.finished = True
+
+        if offenders is None:
+            offenders = [item for (item, (_, stage)) in slot.running.items() if stage in (None, self.charged_stage)]
+            # A prefetched item is innocent of a crash in the compute stage
+            if not offenders:
+                offenders = list(slot.running)
+            # The worker processes its items in order, the head of the assigned ones is the suspect
+            if (not offenders) and slot.assigned:
+                offenders = slot.assigned[:1]
+        logging.warning("%s: %s (running %s)" % (slot.worker.name, reason, ", ".join(str(i) for i in offenders)))
+
+        requeued = [item for item in slot.assigned if item not in offenders]
+        if self.redo_completed:
+            requeued = slot.completed + requeued
+        self.pending.extendleft(reversed(requeued))
+        slot.assigned = []
+
+        for item in offenders:
+            self.attempts[item] = self.attempts.get(item, 0) + 1
+            if self.attempts[item] > self.max_retries:
+                self.quarantined.append(item)
+                self.counted.add(item)
+                self.progress.failed(slot.worker.name, item, "quarantined after %d attempts: %s" %
+                                     (self.attempts[item], reason))
+            else:
+                self.pending.append(item)
+
+        if self.pending or any(s.assigned for s in self.slots if s is not slot):
+            self.slots[self.slots.index(slot)] = self.start_worker()
+
+# supervisor.py ends here
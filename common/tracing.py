@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Timeline recording of the worker stages, exported in the Chrome trace event format (readable by
+    chrome://tracing or https://ui.perfetto.dev). Each process records its own events which are
+    merged by the main process.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import time
+import json
+import threading
+
+###############################################################################
+# Tracers
+###############################################################################
+class Span:
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.tracer.add(self.name, self.cat, self.start, time.monotonic(), self.args)
+        return False
+
+class Tracer:
+    def __init__(self):
+        """Timestamps are taken from the monotonic clock which is shared by all the processes
+        """
+        self.events = []
+
+    def span(self, name, cat="stage", **args):
+        """Context manager recording the duration of the enclosed block
+        """
+        return Span(self, name, cat, args)
+
+    def add(self, name, cat, start, end, args=None):
+        self.events.append({"name": name, "cat": cat, "ph": "X",
+                            "ts": start * 1e6, "dur": (end - start) * 1e6,
+                            "pid": os.getpid(), "tid": threading.get_ident(),
+                            "args": args or {}})
+
+    def name_process(self, name):
+        self.events.append({"name": "process_name", "ph": "M", "pid": os.getpid(),
+                            "args": {"name": name}})
+
+    def name_thread(self, name):
+        self.events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(),
+                            "tid": threading.get_ident(), "args": {"name": name}})
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class NullTracer:
+    """Tracer used when tracing is disabled: nothing is recorded
+    """
+    events = []
+
+    def span(self, name, cat="stage", **args):
+        return NULL_SPAN
+
+    def add(self, name, cat, start, end, args=None):
+        pass
+
+    def name_process(self, name):
+        pass
+
+    def name_thread(self, name):
+        pass
+
+def get_tracer(enabled):
+    if enabled:
+        return Tracer()
+    return NullTracer()
+
+###############################################################################
+# Export
+###############################################################################
+def write_trace(path, events):
+    """Write the merged events of all the processes to a trace JSON file
+    """
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+# tracing.py ends here
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Memory bounded lists of unique values built by several processes: each process keeps a set which
+    is spilled, when it grows too large, into hash partitions on disk. The partitions being disjoint,
+    each one is deduplicated in memory on its own and the sorted partitions are then merged
+    (k-way) into the final list.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import glob
+import zlib
+import heapq
+
+###############################################################################
+# Spilling set
+###############################################################################
+def partition_of(value, nb_partitions):
+    return zlib.crc32(value.encode("utf-8")) % nb_partitions
+
+def partition_path(spill_dir, prefix, partition):
+    return os.path.join(spill_dir, "%s.part%d" % (prefix, partition))
+
+class SpillingSet:
+    def __init__(self, spill_dir, prefix, max_size=100000, nb_partitions=16):
+        """Set of at most max_size values in memory, prefix should be unique per process
+        """
+        self.spill_dir = spill_dir
+        self.prefix = prefix
+        self.max_size = max_size
+        self.nb_partitions = nb_partitions
+        self.values = set()
+
+    def add(self, value):
+        self.values.add(value)
+        if len(self.values) >= self.max_size:
+            self.spill()
+
+    def spill(self):
+        """Append the values in memory to the partition files and forget them
+        """
+        if not self.values:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        partitions = [[] for _ in range(self.nb_partitions)]
+        for value in self.values:
+            partitions[partition_of(value, self.nb_partitions)].append(value)
+        for (partition, values) in enumerate(partitions):
+            if values:
+                with open(partition_path(self.spill_dir, self.prefix, partition), "a") as f:
+                    f.write("".join("%s\n" % value for value in values))
+        self.values = set()
+
+###############################################################################
+# Merging
+###############################################################################
+def merge_sorted_files(paths, output_path):
+    """K-way merge of sorted files into a sorted list without duplicates, return its size
+    """
+    files = [open(path) for path in paths]
+    nb_values = 0
+    previous = None
+    try:
+        with open(output_path, "w") as output:
+            for line in heapq.merge(*files):
+                if line != previous:
+                    output.write(line)
+                    nb_values += 1
+                    previous = line
+    finally:
+        for f in files:
+            f.close()
+    return nb_values
+
+def merge_partitions(spill_dir, nb_partitions, output_path):
+    """Merge the partitions spilled by all the processes into the sorted list output_path
+    """
+    runs = []
+    for partition in range(nb_partitions):
+        values = set()
+        for path in glob.glob(partition_path(spill_dir, "*", partition)):
+            with open(path) as f:
+                values.update(f)
+        run_path = os.path.join(spill_dir, "sorted.%d" % partition)
+        with open(run_path, "w") as f:
+            f.writelines(sorted(values))
+        runs.append(run_path)
+    return merge_sorted_files(runs, output_path)
+
+# unique_lists.py ends here
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Bulk validation of the structure of the utterances of a corpus before the extraction. The
+    segment times, the segment/phone/NSS relations and the phone/syllable/word/phrase relations are
+    extracted in parallel as flat arrays, the utterance of each element being given by an owner
+    array, and the invariants are then checked on the whole corpus at once with numpy.
+
+    Checks:
+      - extraction: the utterance can't be loaded or its tiers/relations can't be read,
+      - empty: the utterance has no segment,
+      - negative_duration: a segment ends before it starts,
+      - overlap: a segment starts before the end of the previous one,
+      - unrelated_segment: a segment is related neither to a phone nor to a NSS,
+      - orphan_phone: a phone has no syllable, word or phrase,
+      - dangling_relation: a relation points outside of its target tier,
+      - missing_signal: the signal file doesn't exist (optional).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import json
+from multiprocessing import Pool
+
+import numpy as np
+
+from corpus_index import count, related, SIGNAL_LABEL
+
+###############################################################################
+# Extraction
+###############################################################################
+CHECKS = ("extraction", "empty", "negative_duration", "overlap", "unrelated_segment", "orphan_phone",
+          "dangling_relation", "missing_signal")
+
+PHONE_TIERS = ("syllable", "word", "phrase")
+
+def extract_arrays(utt, sequence_labels, signal_label=SIGNAL_LABEL):
+    """Structure of one utterance as lists: segment times and relations, phone relations, tier sizes
+    and signal path
+    """
+    values = dict((tier, count(utt, sequence_labels[tier])) for tier in ("segment", "phone", "nss") + PHONE_TIERS)
+
+    segments = utt.get_sequence(sequence_labels["segment"]).as_segment_sequence()
+    values["start"] = []
+    values["end"] = []
+    for s in range(values["segment"]):
+        item = segments.get_item(s)
+        values["start"].append(item.get_segment_start())
+        values["end"].append(item.get_segment_end())
+    values["segment_phone"] = [related(utt, sequence_labels["segment"], sequence_labels["phone"], s)
+                               for s in range(values["segment"])]
+    values["segment_nss"] = [related(utt, sequence_labels["segment"], sequence_labels["nss"], s)
+                             for s in range(values["segment"])]
+    for tier in PHONE_TIERS:
+        values["phone_%s" % tier] = [related(utt, sequence_labels["phone"], sequence_labels[tier], p)
+                                     for p in range(values["phone"])]
+
+    values["signal"] = None
+    try:
+        item = utt.get_sequence(signal_label).as_segment_sequence().get_item(0).as_signal_segment()
+        values["signal"] = os.path.join(item.get_base_dir_name(), item.get_file_name())
+    except Exception:
+        pass
+    return values
+
+# Corpus shared with the (forked) pool processes
+_corpus = None
+_sequence_labels = None
+
+def _extract(utt_id):
+    try:
+        return extract_arrays(_corpus.get_utterance(utt_id), _sequence_labels)
+    except Exception as ex:
+        return {"error": "%s: %s" % (type(ex).__name__, ex)}
+
+def extract_corpus(corpus, sequence_labels, ids, nb_proc=1):
+    global _corpus, _sequence_labels
+    _corpus, _sequence_labels = corpus, sequence_labels
+
+    if nb_proc > 1:
+        with Pool(nb_proc) as pool:
+            return pool.map(_extract, ids, chunksize=64)
+    return [_extract(i) for i in ids]
+
+###############################################################################
+# Checks
+###############################################################################
+def flatten(values, key):
+    """Concatenation of the key lists of all the utterances and the position in values of the
+    utterance of each element
+    """
+    sizes = np.array([len(v[key]) for v in values], dtype=np.int64)
+    positions = np.repeat(np.arange(len(values), dtype=np.int64), sizes)
+    dtype = np.float64 if key in ("start", "end") else np.int64
+    if not positions.size:
+        return (np.zeros(0, dtype=dtype), positions)
+    return (np.concatenate([np.asarray(v[key], dtype=dtype) for v in values]), positions)
+
+def validate(ids, values, check_signal=True):
+    """Check the invariants on the extracted values of the utterances ids, return a dictionary check
+    name => sorted list of the invalid utterance ids
+    """
+    ids = np.asarray(list(ids), dtype=np.int64)
+    extracted = np.array(["error" not in v for v in values], dtype=bool)
+    ok = [v for v in values if "error" not in v]
+    ok_ids = ids[extracted]
+
+    invalid = dict((check, np.zeros(0, dtype=np.int64)) for check in CHECKS)
+    invalid["extraction"] = ids[~extracted]
+
+    # Tier sizes per utterance
+    sizes = dict((tier, np.array([v[tier] for v in ok], dtype=np.int64))
+                 for tier in ("segment", "phone", "nss") + PHONE_TIERS)
+    invalid["empty"] = ok_ids[sizes["segment"] == 0]
+
+    # Segments
+    (start, positions) = flatten(ok, "start")
+    (end, _) = flatten(ok, "end")
+    owners = ok_ids[positions]
+    invalid["negative_duration"] = owners[end < start]
+    same = positions[1:] == positions[:-1]
+    invalid["overlap"] = owners[1:][same & (start[1:] < end[:-1])]
+
+    (segment_phone, _) = flatten(ok, "segment_phone")
+    (segment_nss, _) = flatten(ok, "segment_nss")
+    invalid["unrelated_segment"] = owners[(segment_phone < 0) & (segment_nss < 0)]
+    dangling = [owners[segment_phone >= sizes["phone"][positions]],
+                owners[segment_nss >= sizes["nss"][positions]]]
+
+    # Phones
+    orphans = []
+    for tier in PHONE_TIERS:
+        (phone_related, phone_positions) = flatten(ok, "phone_%s" % tier)
+        phone_owners = ok_ids[phone_positions]
+        orphans.append(phone_owners[phone_related < 0])
+        dangling.append(phone_owners[phone_related >= sizes[tier][phone_positions]])
+    invalid["orphan_phone"] = np.concatenate(orphans)
+    invalid["dangling_relation"] = np.concatenate(dangling)
+
+    if check_signal:
+        missing = np.array([(v["signal"] is None) or not os.path.exists(v["signal"]) for v in ok], dtype=bool)
+        invalid["missing_signal"] = ok_ids[missing]
+
+    return dict((check, [int(i) for i in np.unique(utt_ids)]) for (check, utt_ids) in invalid.items())
+
+def invalid_ids(report):
+    return sorted(set(i for utt_ids in report.values() for i in utt_ids))
+
+def write_report(path, report, errors=None):
+    """JSON report: number of invalid utterances, invalid ids per check and extraction errors (id => error)
+    """
+    with open(path, "w") as f:
+        json.dump({"nb_invalid": len(invalid_ids(report)), "checks": report, "errors": errors or dict()}, f,
+                  indent=2)
+
+# validation.py ends here
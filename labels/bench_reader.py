@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Benchmark of the bulk label reader (label_reader.py) against the per-line regular expression
+    parsing (labelformat.split_label followed by the conversion of each value). Both read the same
+    label files (or MLFs, or label directories) from memory, the best time over the rounds is
+    reported. The labels formatted back from the bulk arrays are checked to be exactly the read
+    ones.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+# Standard
+import sys
+import traceback
+import argparse
+import time
+import logging
+
+import numpy as np
+
+from labelformat import LABEL_FIELDS, UNKNOWN_VALUE, split_label
+from label_reader import (LABEL_DTYPE, FIELD_TABLES, BOOLEAN_FIELDS, BOOLEAN_VALUES, symbol_tables, from_texts,
+                          read_labels, format_labels)
+
+###############################################################################
+# Constants
+###############################################################################
+LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+###############################################################################
+# Functions
+###############################################################################
+def regex_parse(texts):
+    """Per-line reference: one regular expression match per label, then one conversion per value
+    """
+    symbols = symbol_tables()
+    def convert(field, value):
+        if field in FIELD_TABLES:
+            return symbols[FIELD_TABLES[field]].intern(value)
+        if value == UNKNOWN_VALUE:
+            return -1
+        if field in BOOLEAN_FIELDS:
+            return BOOLEAN_VALUES.index(value)
+        return int(value)
+
+    arrays = []
+    for text in texts:
+        rows = []
+        for line in text.decode("utf-8").splitlines():
+            values = split_label(line)
+            rows.append(tuple(convert(field, values[field]) for field in LABEL_FIELDS))
+        arrays.append(np.array(rows, dtype=LABEL_DTYPE))
+    return (np.concatenate(arrays), symbols)
+
+def best_time(function, nb_rounds):
+    times = []
+    for _ in range(nb_rounds):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+###############################################################################
+# Main function
+###############################################################################
+def main():
+    """Main entry function
+    """
+    global args
+
+    # Texts of the utterances, as the files hold them
+    table = read_labels(args.labels)
+    texts = [("".join("%s\n" % label for label in table.labels(i))).encode("utf-8") for i in range(len(table))]
+    texts = texts * args.repeat
+    names = list(range(len(texts)))
+    nb_labels = sum(text.count(b"\n") for text in texts)
+    if nb_labels == 0:
+        print("no label to read")
+        return
+
+    # Round trip
+    bulk = from_texts(names, texts)
+    for (i, text) in enumerate(texts[:len(table)]):
+        if bulk.labels(i) != text.decode("utf-8").splitlines():
+            raise Exception("the labels of %s don't round-trip" % table.names[i])
+    if format_labels(*regex_parse(texts)) != format_labels(bulk.data, bulk.symbols):
+        raise Exception("the bulk and per-line values differ")
+
+    regex_time = best_time(lambda: regex_parse(texts), args.nb_rounds)
+    bulk_time = best_time(lambda: from_texts(names, texts), args.nb_rounds)
+    print("%d labels (%d utterances)" % (nb_labels, len(texts)))
+    print("per-line regex: %8.1f ms (%6.2f us/label)" % (regex_time * 1e3, regex_time / nb_labels * 1e6))
+    print("bulk reader:    %8.1f ms (%6.2f us/label)" % (bulk_time * 1e3, bulk_time / nb_labels * 1e6))
+    print("speedup:        %8.1fx" % (regex_time / bulk_time))
+
+###############################################################################
+#  Envelopping
+###############################################################################
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(description="")
+
+        # Add options
+        parser.add_argument("-v", "--verbosity", action="count", default=0,
+                            help="increase output verbosity")
+        parser.add_argument("-n", "--nb_rounds", default=5, type=int,
+                            help="number of timed rounds (the best one is reported)")
+        parser.add_argument("-r", "--repeat", default=1, type=int,
+                            help="number of copies of the labels read per round")
+
+        # Add arguments
+        parser.add_argument("labels", nargs="+", help="label files, MLF files (.mlf) or label directories")
+
+        # Parsing arguments
+        args = parser.parse_args()
+
+        # Verbose level => logging level
+        log_level = args.verbosity
+        if (args.verbosity > len(LEVEL)):
+            logging.warning("verbosity level is too high, I'm gonna assume you're taking the highes ")
+            log_level = len(LEVEL) - 1
+        logging.basicConfig(level=LEVEL[log_level])
+
+        # Debug time
+        start_time = time.time()
+        logging.info("start time = " + time.asctime())
+
+        # Running main function <=> run application
+        main()
+
+        # Debug time
+        logging.info("end time = " + time.asctime())
+        logging.info('TOTAL TIME IN MINUTES: %02.2f' %
+                    ((time.time() - start_time) / 60.0))
+
+        # Exit program
+        sys.exit(0)
+    except KeyboardInterrupt as e:  # Ctrl-C
+        raise e
+    except SystemExit as e:  # sys.exit()
+        pass
+    except Exception as e:
+        logging.error('ERROR, UNEXPECTED EXCEPTION')
+        logging.error(str(e))
+        traceback.print_exc(file=sys.stderr)
+        sys.exit(-1)
+
+# bench_reader.py ends here
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Latency benchmark of the synthesis time label path (SynthesisLabeller): the labels of each
+    utterance are generated one at a time, as a TTS front-end would do, and the p50/p99/max latencies
+    per utterance are reported. By default, the utterances of the regression corpus reduced to their
+    phone tier are used. The invalid utterances (which can't be labelled, e.g. a phone without
+    syllable) are reported and excluded from the timing.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+# Standard
+import sys
+import traceback
+import argparse
+import time
+import logging
+
+from standin import StandinCorpus, phone_tier_only
+from equivalence import DEFAULT_CONFIGURATION, REGRESSION_CORPUS
+
+# Configuration part
+from yaml import load
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+###############################################################################
+# Constants
+###############################################################################
+LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+###############################################################################
+# Functions
+###############################################################################
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+def split_invalid(labeller, utterances):
+    """Valid utterances and (index, error) of the utterances which can't be labelled
+    """
+    valid = []
+    invalid = []
+    for (i, utt) in enumerate(utterances):
+        try:
+            labeller.labels(utt)
+        except Exception as ex:
+            invalid.append((i, "%s: %s" % (type(ex).__name__, ex)))
+            continue
+        valid.append(utt)
+    return valid, invalid
+
+def bench(labeller, utterances, nb_rounds, duration=None):
+    """Latencies (in seconds) of each labelling
+    """
+    latencies = []
+    for _ in range(nb_rounds):
+        for utt in utterances:
+            durations = None
+            if duration is not None:
+                durations = [duration] * len(labeller.layout(utt))
+
+            start = time.perf_counter()
+            labeller.labels(utt, durations)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+###############################################################################
+# Main function
+###############################################################################
+def main():
+    """Main entry function
+    """
+    global args
+
+    from roots2lab import SynthesisLabeller
+
+    config = load(args.configuration, Loader=Loader)
+    sequence_labels = config["SequenceLabels"]
+    if args.corpus is not None:
+        import roots
+        corpus = roots.Corpus(args.corpus)
+    else:
+        corpus = StandinCorpus.load(args.standin, sequence_labels)
+        corpus.utterances = [phone_tier_only(desc) for desc in corpus.utterances]
+    utterances = [corpus.get_utterance(i) for i in range(corpus.count_utterances())]
+
+    labeller = SynthesisLabeller(config)
+    utterances, invalid = split_invalid(labeller, utterances)
+    if invalid:
+        logging.warning("%d invalid utterances excluded from the timing:\n%s" %
+                        (len(invalid), "\n".join("  %d: %s" % item for item in invalid)))
+    if not utterances:
+        print("no utterance could be labelled")
+        sys.exit(1)
+
+    latencies = bench(labeller, utterances, args.nb_rounds, args.duration)
+    print("%d labellings of %d utterances (%d invalid excluded): p50 = %.3f ms, p99 = %.3f ms, max = %.3f ms" %
+          (len(latencies), len(utterances), len(invalid), percentile(latencies, 50) * 1e3,
+           percentile(latencies, 99) * 1e3, max(latencies) * 1e3))
+
+###############################################################################
+#  Envelopping
+###############################################################################
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(description="")
+
+        # Add options
+        parser.add_argument("-c", "--configuration", type=open, default=DEFAULT_CONFIGURATION)
+        parser.add_argument("-v", "--verbosity", action="count", default=0,
+                            help="increase output verbosity")
+        parser.add_argument("-n", "--nb_rounds", default=20, type=int,
+                            help="number of passes over the utterances")
+        parser.add_argument("-d", "--duration", default=None, type=float,
+                            help="predicted duration (in seconds) given to each phone (default: zero times)")
+        parser.add_argument("--corpus", default=None, help="roots corpus file (phone tier is used)")
+        parser.add_argument("--standin", default=REGRESSION_CORPUS, help="stand-in corpus file")
+
+        # Parsing arguments
+        args = parser.parse_args()
+
+        # Verbose level => logging level
+        log_level = args.verbosity
+        if (args.verbosity > len(LEVEL)):
+            logging.warning("verbosity level is too high, I'm gonna assume you're taking the highes ")
+            log_level = len(LEVEL) - 1
+        logging.basicConfig(level=LEVEL[log_level])
+
+        # Debug time
+        start_time = time.time()
+        logging.info("start time = " + time.asctime())
+
+        # Running main function <=> run application
+        main()
+
+        # Debug time
+        logging.info("end time = " + time.asctime())
+        logging.info('TOTAL TIME IN MINUTES: %02.2f' %
+                    ((time.time() - start_time) / 60.0))
+
+        # Exit program
+        sys.exit(0)
+    except KeyboardInterrupt as e:  # Ctrl-C
+        raise e
+    except SystemExit as e:  # sys.exit()
+        raise e
+    except Exception as e:
+        logging.error('ERROR, UNEXPECTED EXCEPTION')
+        logging.error(str(e))
+        traceback.print_exc(file=sys.stderr)
+        sys.exit(-1)
+
+# bench_synthesis.py ends here
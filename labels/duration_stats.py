@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Segment duration statistics accumulated while the labels are generated (roots2lab.py
+    --durations), to initialise the duration models without another pass over the corpus. The
+    count, mean and variance of the durations (in seconds) are accumulated with Welford's online
+    algorithm:
+      - for each phone and for each NSS,
+      - for each phone and value of the chosen context fields (e.g. b1, the stress of the syllable).
+
+    The accumulators of the workers and of the shards are merged exactly (Chan et al.) and written
+    as compact JSON tables: symbol => [count, mean, variance].
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import sys
+import json
+
+from labelformat import LABEL_FIELDS, SHORT_FIELDS, UNKNOWN_VALUE
+from features import UNIT
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from progress import write_json
+
+###############################################################################
+# Accumulators
+###############################################################################
+class Welford:
+    """Streaming count, mean and (population) variance
+    """
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count > 0 else 0.0
+
+    def to_list(self):
+        return [self.count, self.mean, self.variance]
+
+    @classmethod
+    def from_list(cls, values):
+        (count, mean, variance) = values
+        return cls(count, mean, variance * count)
+
+def merge_table(table, other):
+    for (key, accumulator) in other.items():
+        table.setdefault(key, Welford()).merge(accumulator)
+
+###############################################################################
+# Statistics
+###############################################################################
+class DurationStats:
+    def __init__(self, context_fields=()):
+        """context_fields are the label fields whose values split the statistics of each phone
+        """
+        unknown = [field for field in context_fields if field not in LABEL_FIELDS]
+        if unknown:
+            raise ValueError("unknown label fields %s" % ", ".join(unknown))
+        self.context_fields = tuple(context_fields)
+        self.total = Welford()
+        self.phones = dict()
+        self.nss = dict()
+        self.contexts = dict((field, dict()) for field in self.context_fields)
+
+    def add(self, infos):
+        """Account for one segment given its feature values (see UtteranceLabeller.fill)
+        """
+        if (infos[0] is None) or (infos[1] is None):
+            return
+        duration = (infos[1] - infos[0]) / float(UNIT)
+        symbol = str(infos[LABEL_FIELDS.index("p3")])
+        self.total.add(duration)
+
+        # The NSS segments only have the short fields
+        if len(infos) == len(SHORT_FIELDS):
+            self.nss.setdefault(symbol, Welford()).add(duration)
+            return
+        self.phones.setdefault(symbol, Welford()).add(duration)
+        for field in self.context_fields:
+            value = infos[LABEL_FIELDS.index(field)]
+            value = UNKNOWN_VALUE if value is None else str(value)
+            self.contexts[field].setdefault(symbol, dict()).setdefault(value, Welford()).add(duration)
+
+    def add_utterance(self, infos_list):
+        for infos in infos_list:
+            self.add(infos)
+
+    def merge(self, other):
+        if isinstance(other, dict):
+            other = DurationStats.from_dict(other)
+        if other.context_fields != self.context_fields:
+            raise ValueError("the context fields differ (%s, %s)" %
+                             (",".join(self.context_fields), ",".join(other.context_fields)))
+        self.total.merge(other.total)
+        merge_table(self.phones, other.phones)
+        merge_table(self.nss, other.nss)
+        for (field, phones) in other.contexts.items():
+            for (symbol, values) in phones.items():
+                merge_table(self.contexts[field].setdefault(symbol, dict()), values)
+
+    def to_dict(self):
+        def table(accumulators):
+            return dict((key, accumulators[key].to_list()) for key in sorted(accumulators))
+
+        return {"unit": "s", "context_fields": list(self.context_fields), "total": self.total.to_list(),
+                "phones": table(self.phones), "nss": table(self.nss),
+                "contexts": dict((field, dict((symbol, table(values)) for (symbol, values) in sorted(phones.items())))
+                                 for (field, phones) in self.contexts.items())}
+
+    @classmethod
+    def from_dict(cls, values):
+        def table(rows):
+            return dict((key, Welford.from_list(row)) for (key, row) in rows.items())
+
+        stats = cls(values["context_fields"])
+        stats.total = Welford.from_list(values["total"])
+        stats.phones = table(values["phones"])
+        stats.nss = table(values["nss"])
+        stats.contexts = dict((field, dict((symbol, table(rows)) for (symbol, rows) in phones.items()))
+                              for (field, phones) in values["contexts"].items())
+        return stats
+
+    def report(self):
+        lines = ["%d segments, mean duration %.1f ms" % (self.total.count, self.total.mean * 1e3),
+                 "%-10s %8s %10s %10s" % ("symbol", "count", "mean (ms)", "std (ms)")]
+        for (kind, table) in (("", self.phones), ("nss ", self.nss)):
+            for (symbol, accumulator) in sorted(table.items(), key=lambda item: -item[1].count):
+                lines.append("%-10s %8d %10.1f %10.1f" % (kind + symbol, accumulator.count, accumulator.mean * 1e3,
+                                                         accumulator.variance ** 0.5 * 1e3))
+        return "\n".join(lines)
+
+    def dump(self, path):
+        write_json(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+def merge_files(paths, output_path):
+    """Merge duration statistics files (shard archive merger)
+    """
+    stats = DurationStats.load(paths[0])
+    for path in paths[1:]:
+        stats.merge(DurationStats.load(path))
+    stats.dump(output_path)
+
+# duration_stats.py ends here
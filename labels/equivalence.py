@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Differential equivalence harness: compute the labels of a corpus using the reference path
+    (UtteranceLabeller.fill/format) and an alternative path, then compare them field by field. The
+    alternative is either a built-in path (see ALTERNATIVES, the label store round trip by default)
+    or given as "module:function" and is called as function(utt, config); it should return the list
+    of label lines of the utterance.
+
+    In regression mode (--expected), the labels of the reference path are compared with the ones
+    recorded beforehand by --record. The script exits with a non-zero status on any difference.
+
+    The corpus is either a real roots corpus (--corpus) or a stand-in corpus (--standin, see
+    standin.py). By default, the regression corpus regression/utterances.json is used.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+# Standard
+import sys
+import os
+import traceback
+import argparse
+import time
+import logging
+import importlib
+import json
+import tempfile
+
+from labelformat import LABEL_FIELDS, split_label
+from standin import StandinCorpus, fuzz
+
+# Configuration part
+from yaml import load
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+
+###############################################################################
+# Constants
+###############################################################################
+LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIGURATION = os.path.join(ROOT_DIR, os.pardir, "configurations", "irisa.yaml")
+REGRESSION_CORPUS = os.path.join(ROOT_DIR, "regression", "utterances.json")
+
+###############################################################################
+# Paths
+###############################################################################
+def reference_labels(utt, config):
+    """Reference path: UtteranceLabeller.fill/format
+    """
+    from roots2lab import UtteranceLabeller
+    labeller = UtteranceLabeller(config)
+    return list(labeller.labels(utt))
+
+def store_labels(utt, config):
+    """Label store path: reference labels written in a label store and read back
+    """
+    from label_store import LabelStoreWriter, LabelStore
+    labels = reference_labels(utt, config)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "labels.lstore")
+        with LabelStoreWriter(path) as writer:
+            writer.add(0, labels)
+        with LabelStore(path) as store:
+            return store.labels(0)
+
+def feature_labels(utt, config):
+    """Feature path (label service and API): feature rows of the segments formatted back to labels
+    """
+    from roots2lab import UtteranceLabeller
+    from label_worker import feature_rows
+    from label_reader import SymbolTable, format_labels
+    (data, symbols) = feature_rows(UtteranceLabeller(config).infos(utt))
+    return format_labels(data, dict((name, SymbolTable(values)) for (name, values) in symbols.items()))
+
+ALTERNATIVES = {"store": store_labels, "features": feature_labels}
+
+def load_alternative(name):
+    """Load a built-in alternative path (see ALTERNATIVES) or a "module:function" one
+    """
+    if name in ALTERNATIVES:
+        return ALTERNATIVES[name]
+    if ":" not in name:
+        raise ValueError("unknown alternative \"%s\" (%s or module:function)" % (name, ", ".join(sorted(ALTERNATIVES))))
+    module_name, function_name = name.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def run_path(path, utt, config):
+    """Run a path, the outcome is either the list of labels or the name of the raised exception
+    """
+    try:
+        return list(path(utt, config)), None
+    except Exception as ex:
+        return None, "%s: %s" % (type(ex).__name__, ex)
+
+###############################################################################
+# Comparison
+###############################################################################
+class Difference:
+    def __init__(self, utt_id, segment, field, reference, alternative):
+        self.utt_id = utt_id
+        self.segment = segment
+        self.field = field
+        self.reference = reference
+        self.alternative = alternative
+
+    def __str__(self):
+        return "utterance %s, segment %s, field %s: reference = \"%s\", alternative = \"%s\"" % \
+            (self.utt_id, self.segment, self.field, self.reference, self.alternative)
+
+def compare_labels(utt_id, ref_labels, alt_labels):
+    """Return the first Difference between two label lists or None
+    """
+    for segment, (ref, alt) in enumerate(zip(ref_labels, alt_labels)):
+        if ref == alt:
+            continue
+
+        try:
+            alt_fields = split_label(alt)
+        except ValueError:
+            return Difference(utt_id, segment, "label", ref, alt)
+        ref_fields = split_label(ref)
+        for field in LABEL_FIELDS:
+            if ref_fields[field] != alt_fields[field]:
+                return Difference(utt_id, segment, field, ref_fields[field], alt_fields[field])
+
+    if len(ref_labels) != len(alt_labels):
+        return Difference(utt_id, min(len(ref_labels), len(alt_labels)), "nb_segments",
+                          len(ref_labels), len(alt_labels))
+    return None
+
+def compare_utterance(utt_id, utt, config, alternative, reference=reference_labels):
+    """Compare the outcome of both paths for one utterance
+
+    Two paths raising the same exception type are considered equivalent.
+    """
+    ref_labels, ref_error = run_path(reference, utt, config)
+    alt_labels, alt_error = run_path(alternative, utt, config)
+
+    if (ref_error is not None) or (alt_error is not None):
+        ref_type = ref_error and ref_error.split(":")[0]
+        alt_type = alt_error and alt_error.split(":")[0]
+        if ref_type != alt_type:
+            return Difference(utt_id, "-", "exception", ref_error, alt_error)
+        return None
+
+    return compare_labels(utt_id, ref_labels, alt_labels)
+
+def check_corpus(corpus, config, alternative, ids=None):
+    """Compare all the given utterances, return the list of differences (one per utterance)
+    """
+    if ids is None:
+        ids = range(corpus.count_utterances())
+
+    differences = []
+    for utt_id in ids:
+        diff = compare_utterance(utt_id, corpus.get_utterance(utt_id), config, alternative)
+        if diff is not None:
+            logging.debug(str(diff))
+            differences.append(diff)
+    return differences
+
+###############################################################################
+# Regression
+###############################################################################
+def recorded_path(directory, utt_id):
+    return os.path.join(directory, "%s.lab" % utt_id)
+
+def record_corpus(corpus, config, directory, ids=None):
+    """Record the reference labels of the utterances in directory (no file for the failed ones),
+    return the number of recorded utterances
+    """
+    if ids is None:
+        ids = range(corpus.count_utterances())
+
+    os.makedirs(directory, exist_ok=True)
+    nb_recorded = 0
+    for utt_id in ids:
+        labels, error = run_path(reference_labels, corpus.get_utterance(utt_id), config)
+        path = recorded_path(directory, utt_id)
+        if error is not None:
+            logging.debug("utterance %s not recorded (%s)" % (utt_id, error))
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        with open(path, "w") as f:
+            f.write("".join("%s\n" % label for label in labels))
+        nb_recorded += 1
+    return nb_recorded
+
+def check_recorded(corpus, config, directory, ids=None):
+    """Compare the reference labels with the recorded ones, return the list of differences (one per
+    utterance)
+    """
+    if ids is None:
+        ids = range(corpus.count_utterances())
+
+    differences = []
+    for utt_id in ids:
+        ref_labels, ref_error = run_path(reference_labels, corpus.get_utterance(utt_id), config)
+        path = recorded_path(directory, utt_id)
+        recorded = None
+        if os.path.exists(path):
+            with open(path) as f:
+                recorded = f.read().splitlines()
+
+        if (ref_labels is None) or (recorded is None):
+            diff = None
+            if (ref_labels is None) != (recorded is None):
+                diff = Difference(utt_id, "-", "exception", ref_error or "%d labels" % len(ref_labels),
+                                  "no labels recorded" if recorded is None else "%d labels recorded" % len(recorded))
+        else:
+            diff = compare_labels(utt_id, ref_labels, recorded)
+        if diff is not None:
+            logging.debug(str(diff))
+            differences.append(diff)
+    return differences
+
+###############################################################################
+# Main function
+###############################################################################
+def main():
+    """Main entry function
+    """
+    global args
+
+    config = load(args.configuration, Loader=Loader)
+    sequence_labels = config["SequenceLabels"]
+
+    # Save a fuzzed regression corpus
+    if args.fuzz > 0:
+        utterances = fuzz(args.fuzz, args.seed)
+        if args.save:
+            existing = []
+            if os.path.exists(args.save):
+                with open(args.save) as f:
+                    existing = json.load(f)
+            with open(args.save, "w") as f:
+                json.dump(existing + utterances, f, indent=1)
+            logging.info("%d utterances saved in %s" % (len(utterances), args.save))
+        corpus = StandinCorpus(utterances, sequence_labels)
+    elif args.corpus is not None:
+        import roots
+        corpus = roots.Corpus(args.corpus)
+    else:
+        corpus = StandinCorpus.load(args.standin, sequence_labels)
+
+    nb_utts = corpus.count_utterances()
+    if args.record is not None:
+        nb_recorded = record_corpus(corpus, config, args.record)
+        print("%d/%d utterances recorded in %s" % (nb_recorded, nb_utts, args.record))
+        return
+
+    if args.expected is not None:
+        differences = check_recorded(corpus, config, args.expected)
+    else:
+        differences = check_corpus(corpus, config, load_alternative(args.alternative))
+    if differences:
+        print("%d/%d utterances differ, first difference: %s" % (len(differences), nb_utts, differences[0]))
+        sys.exit(1)
+    print("%d utterances are equivalent" % nb_utts)
+
+###############################################################################
+#  Envelopping
+###############################################################################
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(description="")
+
+        # Add options
+        parser.add_argument("-c", "--configuration", type=open, default=DEFAULT_CONFIGURATION)
+        parser.add_argument("-v", "--verbosity", action="count", default=0,
+                            help="increase output verbosity")
+        parser.add_argument("-a", "--alternative", default="store",
+                            help="alternative path: %s or module:function" % ", ".join(sorted(ALTERNATIVES)))
+        parser.add_argument("--record", default=None,
+                            help="record the reference labels in this directory instead of comparing")
+        parser.add_argument("--expected", default=None,
+                            help="regression mode: compare the reference labels with the ones recorded in this directory")
+        parser.add_argument("--corpus", default=None, help="roots corpus file")
+        parser.add_argument("--standin", default=REGRESSION_CORPUS, help="stand-in corpus file")
+        parser.add_argument("--fuzz", default=0, type=int,
+                            help="compare on the given number of fuzzed utterances instead")
+        parser.add_argument("--seed", default=0, type=int, help="fuzzing seed")
+        parser.add_argument("--save", default=None,
+                            help="append the fuzzed utterances to this stand-in corpus file")
+
+        # Parsing arguments
+        args = parser.parse_args()
+
+        # Verbose level => logging level
+        log_level = args.verbosity
+        if (args.verbosity > len(LEVEL)):
+            logging.warning("verbosity level is too high, I'm gonna assume you're taking the highes ")
+            log_level = len(LEVEL) - 1
+        logging.basicConfig(level=LEVEL[log_level])
+
+        # Debug time
+        start_time = time.time()
+        logging.info("start time = " + time.asctime())
+
+        # Running main function <=> run application
+        main()
+
+        # Debug time
+        logging.info("end time = " + time.asctime())
+        logging.info('TOTAL TIME IN MINUTES: %02.2f' %
+                    ((time.time() - start_time) / 60.0))
+
+        # Exit program
+        sys.exit(0)
+    except KeyboardInterrupt as e:  # Ctrl-C
+        raise e
+    except SystemExit as e:  # sys.exit()
+        raise e
+    except Exception as e:
+        logging.error('ERROR, UNEXPECTED EXCEPTION')
+        logging.error(str(e))
+        traceback.print_exc(file=sys.stderr)
+        sys.exit(-1)
+
+# equivalence.py ends here
@@ -11,12 +11,8 @@ LICENSE
     This script is in the public domain, free from copyrights or restrictions.
     Created: 29 January 2017
 """
-from roots import *
-
-try:
-    from roots3p import *
-except Exception as ex:
-    pass
+import time
+import json
 
 #####################################################################################################
 ### Global part
@@ -30,12 +26,97 @@ class Feature:
         raise NotImplementedError("this method should be overriden")
 
 class FeatureFactory:
-    def __init__(self, utt, sequence_labels):
+    def __init__(self, utt, sequence_labels, profile=None, features=None):
+        """The computed values are cached for the lifetime of the factory, which should therefore
+        be bound to one utterance. If profile is not None, it is a FeatureProfile used to record
+        the calls, their time and the cache hits. features maps feature names to the classes
+        replacing the default ones (FEATURE_CLASSES).
+        """
         self.utt = utt
         self.sequence_labels = sequence_labels
+        self.profile = profile
+        # Computed values: the same feature of the same item is requested by several segments
+        # (e.g. the syllable features by all the phones of the syllable)
+        self.cache = dict()
+        self.overrides = features or dict()
 
     def compute(self, feature, source_index, prm=None):
-        return globals()[feature](self.utt, self.sequence_labels).compute(source_index, prm)
+        key = (feature, source_index, prm)
+        if key in self.cache:
+            if self.profile is not None:
+                self.profile.hit(feature)
+            return self.cache[key]
+
+        feature_class = self.overrides.get(feature) or FEATURE_CLASSES[feature]
+        if self.profile is None:
+            value = feature_class(self.utt, self.sequence_labels).compute(source_index, prm)
+        else:
+            start = time.perf_counter()
+            value = feature_class(self.utt, self.sequence_labels).compute(source_index, prm)
+            self.profile.record(feature, time.perf_counter() - start)
+
+        self.cache[key] = value
+        return value
+
+class FeatureProfile:
+    def __init__(self):
+        """Per feature call counts, cumulative time (in seconds) and cache hits
+        """
+        self.calls = dict()
+        self.times = dict()
+        self.hits = dict()
+
+    def record(self, feature, elapsed):
+        self.calls[feature] = self.calls.get(feature, 0) + 1
+        self.times[feature] = self.times.get(feature, 0.0) + elapsed
+
+    def hit(self, feature):
+        self.hits[feature] = self.hits.get(feature, 0) + 1
+
+    def merge(self, other):
+        """Add the values of another profile (or of its dictionary form)
+        """
+        if isinstance(other, dict):
+            other = FeatureProfile.from_dict(other)
+        for feature in other.calls:
+            self.calls[feature] = self.calls.get(feature, 0) + other.calls[feature]
+            self.times[feature] = self.times.get(feature, 0.0) + other.times[feature]
+        for feature in other.hits:
+            self.hits[feature] = self.hits.get(feature, 0) + other.hits[feature]
+
+    def to_dict(self):
+        return {"calls": self.calls, "times": self.times, "hits": self.hits}
+
+    @classmethod
+    def from_dict(cls, values):
+        profile = cls()
+        profile.calls = dict(values["calls"])
+        profile.times = dict(values["times"])
+        profile.hits = dict(values["hits"])
+        return profile
+
+    def rows(self):
+        """(feature, calls, hits, hit rate, total time, mean time) sorted by decreasing total time
+        """
+        rows = []
+        for feature in set(self.calls) | set(self.hits):
+            calls = self.calls.get(feature, 0)
+            hits = self.hits.get(feature, 0)
+            total = self.times.get(feature, 0.0)
+            rows.append((feature, calls, hits, hits / float(calls + hits),
+                         total, total / calls if calls else 0.0))
+        return sorted(rows, key=lambda r: (-r[4], r[0]))
+
+    def report(self):
+        lines = ["%-25s %10s %10s %8s %10s %10s" % ("feature", "calls", "hits", "hit rate", "time (s)", "mean (us)")]
+        for (feature, calls, hits, rate, total, mean) in self.rows():
+            lines.append("%-25s %10d %10d %7.1f%% %10.3f %10.1f" % (feature, calls, hits, rate * 100, total, mean * 1e6))
+        return "\n".join(lines)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump([dict(zip(("feature", "calls", "hits", "hit_rate", "time", "mean_time"), row))
+                       for row in self.rows()], f, indent=2)
 
 
 
@@ -107,6 +188,11 @@ class NssIndex(Feature):
             return rel_nss_indexes[0]
         return None
 
+def nss_label(symbol):
+    """NSS symbol as written in the labels
+    """
+    return symbol.replace("#", "dash").replace("%", "percent")
+
 class NssLabel(Feature):
     def __init__(self, utt, sequence_labels):
         Feature.__init__(self, utt, sequence_labels)
@@ -115,10 +201,7 @@ class NssLabel(Feature):
         """
         """
         nss = self.utt.get_sequence(self.sequence_labels["nss"])
-        label = nss.get_item(nss_index).to_string()
-        label = label.replace("#", "dash")
-        label = label.replace("%", "percent")
-        return label
+        return nss_label(nss.get_item(nss_index).to_string())
 
 class PhoneInSyllableFW(Feature):
     def __init__(self, utt, sequence_labels):
@@ -498,3 +581,49 @@ class UtteranceSizeInPhrase(Feature):
         """
         """
         return self.utt.get_sequence(self.sequence_labels["phrase"]).count()
+
+
+#####################################################################################################
+### Synthesis part: phone tier only, the "segments" are the phones (the pauses are inserted by
+### roots2lab.SynthesisLabeller)
+#####################################################################################################
+class SynthesisTime(Feature):
+    def __init__(self, utt, sequence_labels):
+        Feature.__init__(self, utt, sequence_labels)
+
+    def compute(self, phone_index, prm=None):
+        """
+        """
+        return 0
+
+class SynthesisPhoneIndex(Feature):
+    def __init__(self, utt, sequence_labels):
+        Feature.__init__(self, utt, sequence_labels)
+
+    def compute(self, phone_index, prm=None):
+        """
+        """
+        return phone_index
+
+class SynthesisNssIndex(Feature):
+    def __init__(self, utt, sequence_labels):
+        Feature.__init__(self, utt, sequence_labels)
+
+    def compute(self, phone_index, prm=None):
+        """
+        """
+        return None
+
+SYNTHESIS_FEATURES = {
+    "StartSegment": SynthesisTime,
+    "EndSegment": SynthesisTime,
+    "PhoneIndex": SynthesisPhoneIndex,
+    "NssIndex": SynthesisNssIndex,
+}
+
+#####################################################################################################
+### Feature classes
+#####################################################################################################
+# Feature name => default class, used by FeatureFactory
+FEATURE_CLASSES = dict((name, value) for (name, value) in list(globals().items())
+                       if isinstance(value, type) and issubclass(value, Feature) and (value is not Feature))
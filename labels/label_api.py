@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Python API to generate the labels of a corpus without intermediate files:
+
+        from label_api import iter_labels
+        for (utt_id, labels) in iter_labels("corpus.json", "irisa.yaml", workers=8):
+            ...
+
+    The utterances are computed ahead by a pool of processes; the number of utterances computed in
+    advance is bounded (read_ahead) so the memory stays under control whatever the consumer speed.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import logging
+from collections import deque
+
+import label_worker
+from label_worker import LABELS, FEATURES
+from config_snapshot import load_configuration
+from label_reader import symbol_tables, intern_symbols
+
+###############################################################################
+# Helpers
+###############################################################################
+def load_config(config):
+    """The configuration can be given as a dictionary, an opened file or a path
+    """
+    if isinstance(config, dict):
+        return config
+    if hasattr(config, "read"):
+        from yaml import load
+        try:
+            from yaml import CLoader as Loader
+        except ImportError:
+            from yaml import Loader
+        return load(config, Loader=Loader)
+    return load_configuration(config).config
+
+def load_corpus(corpus):
+    """The corpus can be given as a roots corpus (or anything with the same API) or a path
+    """
+    if isinstance(corpus, str):
+        import roots
+        return roots.Corpus(corpus)
+    return corpus
+
+###############################################################################
+# API
+###############################################################################
+def iter_labels(corpus, config, ids=None, workers=1, what=LABELS, read_ahead=None, on_error="raise"):
+    """Generate (utt_id, result) in the order of ids
+
+    result is the list of label lines (what="labels") or the feature rows (what="features", see
+    label_worker.feature_rows). By
+    default, all the utterances which are not in the IgnoredID of the configuration are generated.
+    With workers=0, everything is computed in the current process. At most read_ahead utterances
+    (default: 2 * workers) are computed in advance. If on_error is "skip", failed utterances are
+    logged and skipped instead of raising the exception.
+    """
+    config = load_config(config)
+    corpus = load_corpus(corpus)
+    if ids is None:
+        ignored = set(config.get("IgnoredID", []))
+        ids = (i for i in range(corpus.count_utterances()) if i not in ignored)
+
+    if workers <= 0:
+        worker = label_worker.LabelWorker(corpus, config)
+        for utt_id in ids:
+            try:
+                result = worker.compute(utt_id, what)
+            except Exception as ex:
+                if on_error != "skip":
+                    raise
+                logging.warning("%d failed with exception %s" % (utt_id, ex))
+                continue
+            yield (utt_id, result)
+        return
+
+    if read_ahead is None:
+        read_ahead = 2 * workers
+
+    pool = label_worker.create_pool(corpus, config, workers)
+    pending = deque()
+    ids = iter(ids)
+    try:
+        while True:
+            # Keep the pipeline full
+            for utt_id in ids:
+                pending.append((utt_id, pool.submit(label_worker.compute, utt_id, what)))
+                if len(pending) >= read_ahead:
+                    break
+            if not pending:
+                break
+
+            (utt_id, future) = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as ex:
+                if on_error != "skip":
+                    raise
+                logging.warning("%d failed with exception %s" % (utt_id, ex))
+                continue
+            yield (utt_id, result)
+    finally:
+        for (_, future) in pending:
+            future.cancel()
+        pool.shutdown()
+
+def iter_features(corpus, config, ids=None, workers=1, read_ahead=None, on_error="raise", symbols=None):
+    """Same as iter_labels but generates the feature rows as label_reader.LABEL_DTYPE arrays (as the
+    bulk reader does). Their symbol ids refer to symbols (name => SymbolTable, see
+    label_reader.symbol_tables), which grow with the new symbols; by default, new tables are created.
+    """
+    symbols = symbol_tables(symbols)
+    for (utt_id, (data, local)) in iter_labels(corpus, config, ids, workers, FEATURES, read_ahead, on_error):
+        yield (utt_id, intern_symbols(data, local, symbols))
+
+# label_api.py ends here
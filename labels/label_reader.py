@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Bulk reader of the full context labels produced by UtteranceLabeller.format. Label files, MLFs
+    or shard output directories are parsed at once into a NumPy structured array (one row per
+    segment, one column per field of labelformat.LABEL_FIELDS):
+      - start/end are int64 (HTK units),
+      - phones (p1..p5), vowel (b16) and POS (d1, e1, f1) are int32 ids interned in symbol tables,
+      - booleans (a1, a2, b1, b2, c1, c2) are int8,
+      - the other fields are int32,
+    the unknown value "x" being -1 everywhere. Instead of matching each line with a regular
+    expression, all the delimiter characters of the whole text are replaced by newlines: each label
+    is then a fixed number of tokens, located at once in the byte buffer, and the values of each
+    field are decoded column-wise with numpy. The labels formatted back from the arrays are exactly
+    the ones read (a non canonical integer such as "01" is rejected).
+
+        from label_reader import read_label_dirs
+        table = read_label_dirs(["node0/lab", "node1/lab"])
+        phones = table.symbols["phone"].decode(table.data["p3"])
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import re
+
+import numpy as np
+
+from labelformat import FULL_FORMAT, DELIMITERS, LABEL_FIELDS, UNKNOWN_VALUE, split_label
+
+#####################################################################################################
+### Layout
+#####################################################################################################
+TIME, SYMBOL, BOOLEAN, INTEGER = "time", "symbol", "boolean", "integer"
+
+SYMBOL_FIELDS = {"phone": ("p1", "p2", "p3", "p4", "p5"),
+                 "vowel": ("b16",),
+                 "pos": ("d1", "e1", "f1")}
+BOOLEAN_FIELDS = ("a1", "a2", "b1", "b2", "c1", "c2")
+BOOLEAN_VALUES = ("False", "True")
+
+FIELD_TABLES = dict((field, name) for (name, fields) in SYMBOL_FIELDS.items() for field in fields)
+
+def field_kind(field):
+    if field in ("start", "end"):
+        return TIME
+    if field in FIELD_TABLES:
+        return SYMBOL
+    if field in BOOLEAN_FIELDS:
+        return BOOLEAN
+    return INTEGER
+
+KIND_TYPES = {TIME: np.int64, SYMBOL: np.int32, BOOLEAN: np.int8, INTEGER: np.int32}
+LABEL_DTYPE = np.dtype([(field, KIND_TYPES[field_kind(field)]) for field in LABEL_FIELDS])
+
+# A short (NSS) label has the same text as a full label with the missing fields unknown
+TEXT_FORMAT = FULL_FORMAT.replace("%d", "%s")
+
+# Bulk split: every delimiter character becomes a newline, so that each label is a fixed number of
+# tokens, the fields and the letters of the delimiters ("A", ..., "J", "Z", "x")
+_DELIMITER_CHARS = sorted(set(c for d in DELIMITERS for c in d if not c.isalnum()))
+_TRANSLATION = bytes.maketrans("".join(_DELIMITER_CHARS).encode("ascii"), b"\n" * len(_DELIMITER_CHARS))
+NEWLINE = ord("\n")
+
+def _token_layout():
+    """Position of the token of each field and expected text of the other tokens in a label
+    """
+    sample = (TEXT_FORMAT % tuple("F%d" % i for i in range(len(LABEL_FIELDS)))).encode("ascii")
+    tokens = sample.translate(_TRANSLATION).split(b"\n")
+    fields = [tokens.index(b"F%d" % i) for i in range(len(LABEL_FIELDS))]
+    literals = dict((i, token) for (i, token) in enumerate(tokens) if i not in fields)
+    return (len(tokens), fields, literals)
+
+(TOKENS_PER_LABEL, FIELD_TOKENS, LITERAL_TOKENS) = _token_layout()
+
+# Size (in bytes) of the chunks of text parsed at once
+CHUNK_SIZE = 1 << 18
+
+MLF_HEADER = "#!MLF!#"
+_MLF_ENTRY_RE = re.compile(rb'^"([^"\n]*)"\n(.*?)^\.[ \t]*$\n?', re.M | re.S)
+
+#####################################################################################################
+### Symbols
+#####################################################################################################
+class SymbolTable:
+    """Interned symbols: id => symbol and symbol => id, the unknown value being -1
+    """
+    def __init__(self, symbols=()):
+        self.symbols = []
+        self.index = dict()
+        for symbol in symbols:
+            self.intern(symbol)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def intern(self, symbol):
+        if symbol == UNKNOWN_VALUE:
+            return -1
+        if symbol not in self.index:
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self.index[symbol]
+
+    def decode(self, ids):
+        """Array of the symbols of the given ids
+        """
+        return np.array([UNKNOWN_VALUE] + self.symbols, dtype=object)[np.asarray(ids) + 1]
+
+def symbol_tables(tables=None):
+    """One symbol table per kind of symbol (phone, vowel, pos), the given ones being reused
+    """
+    tables = dict(tables or dict())
+    for name in SYMBOL_FIELDS:
+        tables.setdefault(name, SymbolTable())
+    return tables
+
+def intern_symbols(data, symbols, tables):
+    """Copy of the structured array whose symbol ids refer to symbols (name => SymbolTable or list of
+    symbols), the ids referring to tables instead (the missing symbols are interned)
+    """
+    data = data.copy()
+    for (name, fields) in SYMBOL_FIELDS.items():
+        local = symbols[name].symbols if isinstance(symbols[name], SymbolTable) else symbols[name]
+        # The unknown value (-1) takes the last position
+        mapping = np.array([tables[name].intern(symbol) for symbol in local] + [-1], dtype=np.int32)
+        for field in fields:
+            data[field] = mapping[data[field]]
+    return data
+
+#####################################################################################################
+### Parsing
+#####################################################################################################
+class Tokens:
+    """Tokens of a byte buffer given by their start and length, as arrays of shape (nb_labels,
+    nb_tokens). The buffer is padded with zeros so that reading as many characters as the longest
+    token from the start of any token is safe.
+    """
+    def __init__(self, buffer, starts, lengths):
+        self.buffer = buffer
+        self.starts = starts
+        self.lengths = lengths
+
+    @classmethod
+    def from_buffer(cls, buffer, nb_tokens, ends=None):
+        """Tokens of a buffer in which each token ends with a newline
+        """
+        if ends is None:
+            ends = np.flatnonzero(buffer == NEWLINE)
+        if ends.size % nb_tokens:
+            raise ValueError("%d tokens are not a multiple of %d" % (ends.size, nb_tokens))
+        starts = np.concatenate([[0], ends[:-1] + 1])
+        lengths = ends - starts
+        padding = np.zeros(int(lengths.max()) + 1 if lengths.size else 1, dtype=np.uint8)
+        return cls(np.concatenate([buffer, padding]), starts.reshape(-1, nb_tokens), lengths.reshape(-1, nb_tokens))
+
+    def select(self, columns):
+        return Tokens(self.buffer, self.starts[:, columns], self.lengths[:, columns])
+
+    def __len__(self):
+        return self.starts.shape[0]
+
+    def equal(self, columns, value):
+        """Mask of the tokens of the columns equal to value (bytes)
+        """
+        starts = self.starts[:, columns]
+        mask = self.lengths[:, columns] == len(value)
+        for (j, c) in enumerate(value):
+            mask &= self.buffer[starts + j] == c
+        return mask
+
+    def strings(self, columns):
+        """Distinct texts of the tokens of the columns and the index of the text of each token
+        """
+        starts = self.starts[:, columns]
+        lengths = self.lengths[:, columns]
+        length = int(lengths.max()) if lengths.size else 0
+        width = 8 * max(1, (length + 7) // 8)
+        chars = np.zeros(lengths.shape + (width,), dtype=np.uint8)
+        for j in range(length):
+            chars[..., j] = np.where(lengths > j, self.buffer[starts + j], 0)
+        if width == 8:
+            keys = chars.view(np.uint64).reshape(-1)
+        else:
+            keys = chars.view(np.dtype((np.void, width))).reshape(-1)
+        (unique, inverse) = np.unique(keys, return_inverse=True)
+        return ([key.tobytes().rstrip(b"\0").decode("utf-8") for key in unique], inverse.reshape(lengths.shape))
+
+    def integers(self, columns):
+        """Values of the tokens of the columns written as (canonical) integers or unknown (-1), and
+        the mask of the tokens which are neither
+        """
+        starts = self.starts[:, columns]
+        lengths = self.lengths[:, columns]
+        first = self.buffer[starts]
+        unknown = (lengths == 1) & (first == ord(UNKNOWN_VALUE))
+        values = first.astype(np.int64) - ord("0")
+        invalid = (lengths == 0) | (values < 0) | (values > 9) | ((values == 0) & (lengths > 1))
+        for j in range(1, int(lengths.max()) if lengths.size else 0):
+            inside = lengths > j
+            digits = self.buffer[starts + j].astype(np.int64) - ord("0")
+            invalid |= inside & ((digits < 0) | (digits > 9))
+            values = np.where(inside, values * 10 + digits, values)
+        values[unknown] = -1
+        return (values, invalid & ~unknown)
+
+def tokenize(text):
+    """Tokens of the fields of the labels of a text (bytes, one label per line, each line ending
+    with a newline)
+    """
+    nb_labels = text.count(b"\n")
+    buffer = np.frombuffer(text.translate(_TRANSLATION), dtype=np.uint8)
+    ends = np.flatnonzero(buffer == NEWLINE)
+    if ends.size == nb_labels * TOKENS_PER_LABEL:
+        tokens = Tokens.from_buffer(buffer, TOKENS_PER_LABEL, ends)
+        literals = tokens.select(list(LITERAL_TOKENS))
+        if all(literals.equal([i], value).all() for (i, value) in enumerate(LITERAL_TOKENS.values())):
+            return tokens.select(FIELD_TOKENS)
+
+    # Some values contain a delimiter (or a line is not a label): line per line parsing, the values
+    # being then written one per line
+    lines = text.decode("utf-8").split("\n")[:nb_labels]
+    values = "".join("%s\n" % value for line in lines for value in split_label(line).values())
+    return Tokens.from_buffer(np.frombuffer(values.encode("utf-8"), dtype=np.uint8), len(LABEL_FIELDS))
+
+def parse_text(text, symbols=None):
+    """Structured array of the labels of a text (str or bytes) and the symbol tables used (see
+    symbol_tables)
+    """
+    if isinstance(text, str):
+        text = text.encode("utf-8")
+    if text and not text.endswith(b"\n"):
+        text += b"\n"
+    symbols = symbol_tables(symbols)
+
+    # The text is parsed by chunks of labels whose arrays stay in the CPU caches
+    arrays = []
+    (start, nb_labels) = (0, 0)
+    while start < len(text):
+        end = text.find(b"\n", start + CHUNK_SIZE)
+        end = len(text) if end < 0 else end + 1
+        arrays.append(parse_chunk(text[start:end], symbols, nb_labels))
+        (start, nb_labels) = (end, nb_labels + len(arrays[-1]))
+    if not arrays:
+        return (np.zeros(0, dtype=LABEL_DTYPE), symbols)
+    return (np.concatenate(arrays), symbols)
+
+def parse_chunk(text, symbols, first_label=0):
+    """Structured array of the labels of a text (bytes ending with a newline)
+    """
+    tokens = tokenize(text)
+    data = np.empty(len(tokens), dtype=LABEL_DTYPE)
+
+    # Symbols: the fields sharing a table are decoded together
+    for (name, fields) in SYMBOL_FIELDS.items():
+        columns = [LABEL_FIELDS.index(field) for field in fields]
+        (strings, inverse) = tokens.strings(columns)
+        ids = np.array([symbols[name].intern(string) for string in strings], dtype=np.int32)[inverse]
+        for (i, field) in enumerate(fields):
+            data[field] = ids[:, i]
+
+    # Booleans
+    columns = [LABEL_FIELDS.index(field) for field in BOOLEAN_FIELDS]
+    values = np.full((len(tokens), len(columns)), -2, dtype=np.int8)
+    for (value, text_value) in enumerate((UNKNOWN_VALUE,) + BOOLEAN_VALUES):
+        values[tokens.equal(columns, text_value.encode("ascii"))] = value - 1
+    check_values(values == -2, BOOLEAN_FIELDS, BOOLEAN, first_label)
+    for (i, field) in enumerate(BOOLEAN_FIELDS):
+        data[field] = values[:, i]
+
+    # Integers (the times apart as they are longer)
+    for kind in (TIME, INTEGER):
+        fields = [field for field in LABEL_FIELDS if field_kind(field) == kind]
+        columns = [LABEL_FIELDS.index(field) for field in fields]
+        (values, invalid) = tokens.integers(columns)
+        check_values(invalid, fields, kind, first_label)
+        for (i, field) in enumerate(fields):
+            data[field] = values[:, i]
+    return data
+
+def check_values(invalid, fields, kind, first_label=0):
+    if invalid.any():
+        (row, column) = np.argwhere(invalid)[0]
+        raise ValueError("label %d: invalid %s value for %s" % (first_label + row + 1, kind, fields[column]))
+
+#####################################################################################################
+### Formatting
+#####################################################################################################
+def field_text(field, values, symbols):
+    """Textual values of a field given its values in the structured array
+    """
+    kind = field_kind(field)
+    if kind == SYMBOL:
+        return symbols[FIELD_TABLES[field]].decode(values)
+    if kind == BOOLEAN:
+        return np.array((UNKNOWN_VALUE,) + BOOLEAN_VALUES, dtype=object)[values.astype(np.int64) + 1]
+    text = values.astype(str).astype(object)
+    text[values < 0] = UNKNOWN_VALUE
+    return text
+
+def text_columns(data, symbols):
+    """Textual values of each field of the structured array
+    """
+    return [field_text(field, data[field], symbols) for field in LABEL_FIELDS]
+
+def format_labels(data, symbols):
+    """Label lines of a structured array, identical to the ones of UtteranceLabeller.format
+    """
+    return [TEXT_FORMAT % row for row in zip(*text_columns(data, symbols))]
+
+#####################################################################################################
+### Tables
+#####################################################################################################
+class LabelTable:
+    """Labels of several utterances: data is the structured array of all the labels, the labels of
+    the utterance names[i] being data[offsets[i]:offsets[i+1]]
+    """
+    def __init__(self, data, symbols, names, offsets):
+        self.data = data
+        self.symbols = symbols
+        self.names = list(names)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def utterance(self, i):
+        return self.data[self.offsets[i]:self.offsets[i+1]]
+
+    def labels(self, i):
+        return format_labels(self.utterance(i), self.symbols)
+
+    def utterance_ids(self):
+        """Position of the utterance of each label
+        """
+        return np.repeat(np.arange(len(self.names), dtype=np.int64), np.diff(self.offsets))
+
+    def write_files(self, output_dir, extension=".lab"):
+        for (i, name) in enumerate(self.names):
+            with open(os.path.join(output_dir, name + extension), "w") as f:
+                f.write("".join("%s\n" % label for label in self.labels(i)))
+
+    def write_mlf(self, path, extension=".lab"):
+        lines = format_labels(self.data, self.symbols)
+        with open(path, "w") as f:
+            f.write("%s\n" % MLF_HEADER)
+            for (i, name) in enumerate(self.names):
+                f.write("\"*/%s%s\"\n" % (name, extension))
+                f.write("".join("%s\n" % label for label in lines[self.offsets[i]:self.offsets[i+1]]))
+                f.write(".\n")
+
+def from_texts(names, texts, symbols=None):
+    """Table of the labels of named texts, parsed at once
+    """
+    texts = [text.encode("utf-8") if isinstance(text, str) else text for text in texts]
+    texts = [text if (not text) or text.endswith(b"\n") else text + b"\n" for text in texts]
+    offsets = np.concatenate([[0], np.cumsum([text.count(b"\n") for text in texts])])
+    (data, symbols) = parse_text(b"".join(texts), symbols)
+    return LabelTable(data, symbols, names, offsets)
+
+def utterance_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def read_label_files(paths, symbols=None):
+    """Table of the labels of the given files, the utterances being named after the files
+    """
+    texts = []
+    for path in paths:
+        with open(path, "rb") as f:
+            texts.append(f.read())
+    return from_texts([utterance_name(path) for path in paths], texts, symbols)
+
+def read_label_dirs(dirs, symbols=None, extension=".lab"):
+    """Table of the labels of the label files of output directories (e.g. the ones of the shards)
+    """
+    if isinstance(dirs, str):
+        dirs = [dirs]
+    paths = []
+    for directory in dirs:
+        paths += sorted((os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(extension)),
+                        key=lambda path: (len(utterance_name(path)), utterance_name(path)))
+    return read_label_files(paths, symbols)
+
+def read_mlf(path, symbols=None):
+    """Table of the labels of a master label file, the utterances being named after its entries
+    """
+    with open(path, "rb") as f:
+        text = f.read()
+    if not text.startswith(MLF_HEADER.encode("ascii")):
+        raise ValueError("%s is not a MLF file" % path)
+
+    names = []
+    texts = []
+    for m in _MLF_ENTRY_RE.finditer(text, len(MLF_HEADER)):
+        names.append(utterance_name(m.group(1).decode("utf-8")))
+        texts.append(m.group(2))
+    return from_texts(names, texts, symbols)
+
+def read_labels(paths, symbols=None):
+    """Table of the labels of label files, MLFs and label directories
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    tables = []
+    for path in paths:
+        if os.path.isdir(path):
+            tables.append(read_label_dirs([path], symbols))
+        elif path.endswith(".mlf"):
+            tables.append(read_mlf(path, symbols))
+        else:
+            tables.append(read_label_files([path], symbols))
+        symbols = tables[-1].symbols
+    return concatenate(tables)
+
+def concatenate(tables):
+    """Table of the labels of tables sharing the same symbol tables
+    """
+    if not tables:
+        return LabelTable(np.zeros(0, dtype=LABEL_DTYPE), symbol_tables(), [], [0])
+    names = [name for table in tables for name in table.names]
+    offsets = [0]
+    for table in tables:
+        offsets += list(offsets[-1] + table.offsets[1:])
+    return LabelTable(np.concatenate([table.data for table in tables]), tables[-1].symbols, names, offsets)
+
+# label_reader.py ends here
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Long running label service (roots2lab.py --serve): the corpus and the configuration are loaded
+    once and the labels, the feature rows or the signal path of an utterance are served over a local
+    Unix socket. The requests are handled concurrently by a pool of processes and the recently
+    computed utterances are kept in a LRU cache. When a process of the pool dies, the pool is broken:
+    the main thread (the only one which forks) rebuilds it and the request is retried once.
+
+    Protocol: one JSON object per line in both directions.
+      request:  {"id": 12, "what": "labels"}       ("labels", "features" or "wav")
+      response: {"id": 12, "what": "labels", "result": [...]} or {"id": 12, "error": "..."}
+
+    The feature rows are fixed-width integer rows in LABEL_FIELDS order (-1 for the unknown values);
+    their symbol ids refer to the symbol tables of the service, which only grow, and are sent with
+    each response:
+      result: {"fields": [...], "rows": [[...], ...], "symbols": {"phone": [...], "vowel": [...], "pos": [...]}}
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import json
+import socket
+import signal
+import logging
+import threading
+import socketserver
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+
+import label_worker
+from labelformat import LABEL_FIELDS
+from label_reader import symbol_tables, intern_symbols
+
+###############################################################################
+# Cache
+###############################################################################
+class LRUCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.values:
+                self.values.move_to_end(key)
+                self.hits += 1
+                return self.values[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        with self.lock:
+            self.values[key] = value
+            self.values.move_to_end(key)
+            while len(self.values) > self.capacity:
+                self.values.popitem(last=False)
+
+###############################################################################
+# Server
+###############################################################################
+class LabelRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            request = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("a request should be a JSON object")
+                response = self.server.answer(int(request["id"]), request.get("what", label_worker.LABELS))
+            except Exception as ex:
+                utt_id = request.get("id") if isinstance(request, dict) else None
+                response = {"id": utt_id, "error": "%s: %s" % (type(ex).__name__, ex)}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+class LabelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, create_pool, cache_size):
+        """create_pool() returns a started pool of processes (see label_worker.create_pool), it is
+        called from the thread creating the server and the one running maintain_pool
+        """
+        self.create_pool = create_pool
+        self.pool = create_pool()
+        self.generation = 0
+        self.broken = False
+        self.pool_condition = threading.Condition()
+        self.cache = LRUCache(cache_size)
+        self.symbols = symbol_tables()
+        self.symbols_lock = threading.Lock()
+        socketserver.UnixStreamServer.__init__(self, socket_path, LabelRequestHandler)
+
+    def answer(self, utt_id, what):
+        key = (utt_id, what)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.compute(utt_id, what)
+            if what == label_worker.FEATURES:
+                result = self.feature_rows(*result)
+            self.cache.put(key, result)
+        if what == label_worker.FEATURES:
+            with self.symbols_lock:
+                result = dict(result, symbols=dict((name, list(table.symbols)) for (name, table) in self.symbols.items()))
+        return {"id": utt_id, "what": what, "result": result}
+
+    def compute(self, utt_id, what, retries=1):
+        """Compute the result in the pool, waiting for the pool to be rebuilt when it is broken
+        """
+        with self.pool_condition:
+            (pool, generation) = (self.pool, self.generation)
+        try:
+            return pool.submit(label_worker.compute, utt_id, what).result()
+        except BrokenProcessPool:
+            logging.warning("the pool is broken (utterance %d), waiting for a new one" % utt_id)
+            with self.pool_condition:
+                if self.generation == generation:
+                    self.broken = True
+                    self.pool_condition.notify_all()
+                while self.generation == generation:
+                    self.pool_condition.wait()
+            if retries <= 0:
+                raise
+            return self.compute(utt_id, what, retries - 1)
+
+    def maintain_pool(self, poll_interval=1.0):
+        """Rebuild the broken pools until interrupted (to run in the main thread)
+        """
+        while True:
+            with self.pool_condition:
+                while not self.broken:
+                    self.pool_condition.wait(poll_interval)
+                (old_pool, self.pool) = (self.pool, self.create_pool())
+                self.broken = False
+                self.generation += 1
+                self.pool_condition.notify_all()
+            old_pool.shutdown(wait=False)
+            logging.info("the pool has been rebuilt")
+
+    def feature_rows(self, data, symbols):
+        """Feature rows whose symbol ids refer to the tables of the service
+        """
+        with self.symbols_lock:
+            data = intern_symbols(data, symbols, self.symbols)
+        return {"fields": list(LABEL_FIELDS), "rows": [[int(value) for value in row] for row in data.tolist()]}
+
+def stop(signum, frame):
+    raise SystemExit(0)
+
+def serve(corpus, config, socket_path, nb_proc=1, cache_size=256):
+    """Serve the corpus until interrupted (SIGINT or SIGTERM)
+    """
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    # The handler threads only submit to the already forked processes: the pools are created (and
+    # rebuilt) by the main thread while the requests are served by another one
+    server = LabelServer(socket_path, lambda: label_worker.create_pool(corpus, config, nb_proc, start=True),
+                         cache_size)
+    signal.signal(signal.SIGTERM, stop)
+    logging.info("serving the labels on %s" % socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        server.maintain_pool()
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.pool.shutdown()
+        os.unlink(socket_path)
+
+###############################################################################
+# Client
+###############################################################################
+class LabelClient:
+    def __init__(self, socket_path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.stream = self.sock.makefile("rwb")
+
+    def request(self, utt_id, what=label_worker.LABELS):
+        self.stream.write((json.dumps({"id": utt_id, "what": what}) + "\n").encode("utf-8"))
+        self.stream.flush()
+        response = json.loads(self.stream.readline())
+        if "error" in response:
+            raise RuntimeError("utterance %s: %s" % (utt_id, response["error"]))
+        return response["result"]
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+# label_service.py ends here
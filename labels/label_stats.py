@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Corpus coverage statistics accumulated while the labels are generated (roots2lab.py --stats):
+      - exact histograms of the value of each label field (p3 being the phone unigrams),
+      - approximate number of distinct triphones, quinphones and full contexts (HyperLogLog),
+      - approximate frequency of each triphone and full context (count-min sketch, whose width is by
+        default sized to the phone alphabet).
+
+    The statistics of the workers and of the shards are merged into one JSON file.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import sys
+import json
+from collections import Counter
+
+from labelformat import LABEL_FIELDS, SHORT_FIELDS, UNKNOWN_VALUE, model_name
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from sketches import HyperLogLog, CountMinSketch
+from progress import write_json
+
+###############################################################################
+# Statistics
+###############################################################################
+# Fields without histogram (one value per segment)
+TIME_FIELDS = ("start", "end")
+
+# Contexts whose number of distinct values is estimated
+CONTEXTS = ("triphone", "quinphone", "full")
+
+def triphone(fields):
+    return "%s-%s+%s" % (fields["p2"], fields["p3"], fields["p4"])
+
+def quinphone(fields):
+    return "%s^%s-%s+%s=%s" % (fields["p1"], fields["p2"], fields["p3"], fields["p4"], fields["p5"])
+
+# Bounds of the default width of the count-min sketch
+MIN_SKETCH_WIDTH = 1 << 10
+MAX_SKETCH_WIDTH = 1 << 16
+
+def sketch_width(nb_phones):
+    """Default width of the count-min sketch: a power of 2 about 4 times the number of diphones
+    """
+    width = MIN_SKETCH_WIDTH
+    while (width < 4 * nb_phones * nb_phones) and (width < MAX_SKETCH_WIDTH):
+        width <<= 1
+    return width
+
+class LabelStats:
+    def __init__(self, precision=14, width=1 << 12, depth=4):
+        """width and depth are the size of the count-min sketch of the frequencies (see sketch_width)
+        """
+        self.nb_utterances = 0
+        self.nb_labels = 0
+        self.histograms = dict((field, Counter()) for field in LABEL_FIELDS if field not in TIME_FIELDS)
+        self.distinct = dict((context, HyperLogLog(precision)) for context in CONTEXTS)
+        self.frequencies = CountMinSketch(width, depth)
+
+    def add(self, infos, label):
+        """Account for one label given its feature values (see UtteranceLabeller.fill) and its line
+        """
+        fields = LABEL_FIELDS if len(infos) > len(SHORT_FIELDS) else SHORT_FIELDS
+        values = dict()
+        for (field, value) in zip(fields, infos):
+            if field in TIME_FIELDS:
+                continue
+            value = UNKNOWN_VALUE if value is None else str(value)
+            values[field] = value
+            self.histograms[field][value] += 1
+
+        contexts = {"triphone": triphone(values), "quinphone": quinphone(values), "full": model_name(label)}
+        for (context, value) in contexts.items():
+            self.distinct[context].add(value)
+        self.frequencies.add("triphone:" + contexts["triphone"])
+        self.frequencies.add("full:" + contexts["full"])
+        self.nb_labels += 1
+
+    def add_utterance(self, infos_list, labels):
+        for (infos, label) in zip(infos_list, labels):
+            self.add(infos, label)
+        self.nb_utterances += 1
+
+    def frequency(self, context, value):
+        """Estimated number of occurrences (never under estimated) of a triphone or a full context
+        """
+        return self.frequencies.estimate("%s:%s" % (context, value))
+
+    def merge(self, other):
+        if isinstance(other, dict):
+            other = LabelStats.from_dict(other)
+        self.nb_utterances += other.nb_utterances
+        self.nb_labels += other.nb_labels
+        for (field, histogram) in other.histograms.items():
+            self.histograms[field].update(histogram)
+        for (context, hll) in other.distinct.items():
+            self.distinct[context].merge(hll)
+        self.frequencies.merge(other.frequencies)
+
+    def summary(self):
+        return {"nb_utterances": self.nb_utterances, "nb_labels": self.nb_labels,
+                "nb_phones": len(self.histograms["p3"]),
+                "distinct": dict((c, int(round(hll.estimate()))) for (c, hll) in self.distinct.items())}
+
+    def to_dict(self):
+        return {"summary": self.summary(),
+                "histograms": dict((f, dict(h.most_common())) for (f, h) in self.histograms.items()),
+                "sketches": {"distinct": dict((c, hll.to_dict()) for (c, hll) in self.distinct.items()),
+                             "frequencies": self.frequencies.to_dict()}}
+
+    @classmethod
+    def from_dict(cls, values):
+        sketches = values["sketches"]
+        stats = cls(width=sketches["frequencies"]["width"], depth=sketches["frequencies"]["depth"])
+        stats.nb_utterances = values["summary"]["nb_utterances"]
+        stats.nb_labels = values["summary"]["nb_labels"]
+        for (field, histogram) in values["histograms"].items():
+            stats.histograms[field] = Counter(histogram)
+        stats.distinct = dict((c, HyperLogLog.from_dict(v)) for (c, v) in sketches["distinct"].items())
+        stats.frequencies = CountMinSketch.from_dict(sketches["frequencies"])
+        return stats
+
+    def report(self):
+        summary = self.summary()
+        lines = ["%d utterances, %d labels, %d phones" %
+                 (summary["nb_utterances"], summary["nb_labels"], summary["nb_phones"])]
+        for context in CONTEXTS:
+            lines.append("distinct %s: ~%d" % (context, summary["distinct"][context]))
+        return "\n".join(lines)
+
+    def dump(self, path):
+        write_json(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+def merge_files(paths, output_path):
+    """Merge statistics files (shard archive merger)
+    """
+    stats = LabelStats.load(paths[0])
+    for path in paths[1:]:
+        stats.merge(LabelStats.load(path))
+    stats.dump(output_path)
+
+# label_stats.py ends here
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Compressed store of full context labels. The utterances are grouped in chunks; the labels of a
+    chunk are parsed by label_reader into symbol ids and small integers and stored column by column
+    (the start of a label relative to the end of the previous one, its duration, then each field in
+    the smallest integer type holding its values). Each chunk is compressed with zlib, primed with a
+    dictionary trained on a sample of the corpus, so that the small chunks compress nearly as well
+    as the whole corpus would.
+
+    Layout of a store: MAGIC, the compressed chunks, a compressed JSON footer (dictionaries, offset,
+    size and utterances of each chunk), the size of the footer (8 bytes, little endian) and MAGIC. An
+    utterance is read by decompressing its chunk only; the labels given back are exactly the ones
+    stored.
+
+        label_store.py pack labels.lstore lab/
+        label_store.py unpack labels.lstore lab/   (or labels.mlf)
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+# Standard
+import sys
+import os
+import traceback
+import argparse
+import time
+import logging
+import json
+import zlib
+import struct
+import base64
+from collections import Counter
+
+import numpy as np
+
+from labelformat import LABEL_FIELDS
+from label_reader import (LABEL_DTYPE, SymbolTable, LabelTable, symbol_tables, intern_symbols, parse_text,
+                          format_labels, read_labels, concatenate)
+
+###############################################################################
+# Constants
+###############################################################################
+LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+MAGIC = b"LSTORE1\n"
+STORE_VERSION = 1
+FOOTER_SIZE = struct.Struct("<Q")
+
+CHUNK_UTTERANCES = 32
+COMPRESSION_LEVEL = 9
+DICTIONARY_SIZE = 32768          # the zlib window: a larger dictionary is useless
+DICTIONARY_BLOCK = 16
+READ_SIZE = 1 << 16
+
+###############################################################################
+# Chunk encoding
+###############################################################################
+def integer_type(values, signed):
+    """Smallest integer type holding the values
+    """
+    types = (np.int8, np.int16, np.int32, np.int64) if signed else (np.uint8, np.uint16, np.uint32, np.uint64)
+    if len(values) == 0:
+        return np.dtype(types[0])
+    (low, high) = (int(values.min()), int(values.max()))
+    for t in types:
+        info = np.iinfo(t)
+        if (info.min <= low) and (high <= info.max):
+            return np.dtype(t)
+    raise ValueError("no integer type holds [%d, %d]" % (low, high))
+
+def time_columns(data, counts):
+    """Start of each label relative to the end of the previous one (of the same utterance) and duration
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    previous_end = np.zeros(len(data), dtype=np.int64)
+    previous_end[1:] = data["end"][:-1]
+    firsts = np.cumsum(counts) - counts
+    previous_end[firsts[counts > 0]] = 0
+    return (data["start"] - previous_end, data["end"] - data["start"])
+
+def encode_chunk(names, texts):
+    """Uncompressed payload of the utterances names (label texts as bytes)
+    """
+    counts = [text.count(b"\n") for text in texts]
+    (data, symbols) = parse_text(b"".join(texts), symbol_tables())
+
+    columns = list(time_columns(data, counts))
+    signed = [True, True]
+    for field in LABEL_FIELDS[2:]:
+        # x (-1) becomes 0: the values are unsigned
+        columns.append(data[field].astype(np.int64) + 1)
+        signed.append(False)
+    dtypes = [integer_type(column, s) for (column, s) in zip(columns, signed)]
+
+    header = {"names": names, "counts": counts, "dtypes": [d.str for d in dtypes],
+              "symbols": dict((name, table.symbols) for (name, table) in symbols.items())}
+    header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    body = b"".join(column.astype(dtype).tobytes() for (column, dtype) in zip(columns, dtypes))
+    return FOOTER_SIZE.pack(len(header)) + header + body
+
+def decode_chunk(payload):
+    """Names, label counts, structured array and symbol tables of a chunk payload
+    """
+    (header_size,) = FOOTER_SIZE.unpack_from(payload)
+    header = json.loads(payload[FOOTER_SIZE.size:FOOTER_SIZE.size + header_size].decode("utf-8"))
+    counts = header["counts"]
+    nb_labels = sum(counts)
+
+    columns = []
+    position = FOOTER_SIZE.size + header_size
+    for dtype in header["dtypes"]:
+        dtype = np.dtype(dtype)
+        columns.append(np.frombuffer(payload, dtype=dtype, count=nb_labels, offset=position).astype(np.int64))
+        position += dtype.itemsize * nb_labels
+
+    data = np.empty(nb_labels, dtype=LABEL_DTYPE)
+    (gaps, durations) = columns[:2]
+    ends = np.cumsum(gaps + durations)
+    # The cumulated times restart at each utterance
+    counts = np.asarray(counts, dtype=np.int64)
+    firsts = np.cumsum(counts) - counts
+    before = np.zeros(len(counts), dtype=np.int64)
+    before[firsts > 0] = ends[firsts[firsts > 0] - 1]
+    data["end"] = ends - np.repeat(before, counts)
+    data["start"] = data["end"] - durations
+    for (field, column) in zip(LABEL_FIELDS[2:], columns[2:]):
+        data[field] = column - 1
+
+    symbols = dict((name, SymbolTable(values)) for (name, values) in header["symbols"].items())
+    return (header["names"], header["counts"], data, symbols)
+
+###############################################################################
+# Dictionary
+###############################################################################
+def train_dictionary(payloads, size=DICTIONARY_SIZE, block=DICTIONARY_BLOCK):
+    """zlib dictionary of the blocks the most frequent in the sample chunk payloads, the most frequent
+    last (the closest to the compressed data, so the cheapest to refer to)
+    """
+    counts = Counter()
+    for payload in payloads:
+        for i in range(0, len(payload) - block + 1, block // 2):
+            counts[payload[i:i+block]] += 1
+    frequent = [b for (b, count) in sorted(counts.items(), key=lambda item: (item[1], item[0])) if count > 1]
+    return b"".join(frequent)[-size:]
+
+def sample_dictionary(samples, chunk_size=CHUNK_UTTERANCES):
+    """Dictionary trained on samples, a list of (name, label lines)
+    """
+    payloads = []
+    for first in range(0, len(samples), chunk_size):
+        chunk = samples[first:first+chunk_size]
+        payloads.append(encode_chunk([str(name) for (name, _) in chunk],
+                                     [label_text(labels) for (_, labels) in chunk]))
+    return train_dictionary(payloads)
+
+def label_text(labels):
+    return "".join("%s\n" % label for label in labels or []).encode("utf-8")
+
+###############################################################################
+# Writing
+###############################################################################
+class LabelStoreWriter:
+    """Write the labels of the utterances in a store, chunk_size utterances per chunk
+    """
+    def __init__(self, path, dictionary=b"", chunk_size=CHUNK_UTTERANCES):
+        self.path = path
+        self.dictionary = dictionary
+        self.chunk_size = chunk_size
+        self.handle = open(path, "wb")
+        self.handle.write(MAGIC)
+        self.chunks = []
+        self.pending = []
+
+    def add(self, name, labels):
+        """Add the labels (lines without newline, None or [] for no label) of an utterance
+        """
+        self.pending.append((str(name), label_text(labels)))
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        (names, texts) = zip(*self.pending)
+        self.pending = []
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=self.dictionary) if self.dictionary \
+            else zlib.compressobj(COMPRESSION_LEVEL)
+        payload = encode_chunk(list(names), list(texts))
+        compressed = compressor.compress(payload) + compressor.flush()
+        self.chunks.append({"offset": self.handle.tell(), "size": len(compressed),
+                            "dictionary": 0 if self.dictionary else -1,
+                            "names": list(names), "counts": [text.count(b"\n") for text in texts]})
+        self.handle.write(compressed)
+
+    def close(self):
+        self.flush()
+        dictionaries = [self.dictionary] if self.dictionary else []
+        write_footer(self.handle, dictionaries, self.chunks)
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_footer(handle, dictionaries, chunks):
+    footer = {"version": STORE_VERSION, "chunks": chunks,
+              "dictionaries": [base64.b64encode(d).decode("ascii") for d in dictionaries]}
+    footer = zlib.compress(json.dumps(footer, separators=(",", ":")).encode("utf-8"), COMPRESSION_LEVEL)
+    handle.write(footer)
+    handle.write(FOOTER_SIZE.pack(len(footer)))
+    handle.write(MAGIC)
+
+def read_footer(handle, path=""):
+    """Dictionaries and chunks of an open store
+    """
+    handle.seek(0)
+    if handle.read(len(MAGIC)) != MAGIC:
+        raise ValueError("%s is not a label store" % path)
+    handle.seek(-(FOOTER_SIZE.size + len(MAGIC)), os.SEEK_END)
+    trailer = handle.read()
+    if trailer[FOOTER_SIZE.size:] != MAGIC:
+        raise ValueError("%s is truncated" % path)
+    (footer_size,) = FOOTER_SIZE.unpack(trailer[:FOOTER_SIZE.size])
+    handle.seek(-(footer_size + len(trailer)), os.SEEK_END)
+    footer = json.loads(zlib.decompress(handle.read(footer_size)).decode("utf-8"))
+    if footer["version"] != STORE_VERSION:
+        raise ValueError("%s: unsupported store version %s" % (path, footer["version"]))
+    return ([base64.b64decode(d) for d in footer["dictionaries"]], footer["chunks"])
+
+def merge_stores(paths, output_path):
+    """Concatenate the chunks of several stores (e.g. the ones of the workers or of the shards), the
+    identical dictionaries being stored once
+    """
+    dictionaries = []
+    chunks = []
+    with open(output_path, "wb") as out:
+        out.write(MAGIC)
+        for path in paths:
+            with open(path, "rb") as f:
+                (store_dictionaries, store_chunks) = read_footer(f, path)
+                remap = []
+                for dictionary in store_dictionaries:
+                    if dictionary not in dictionaries:
+                        dictionaries.append(dictionary)
+                    remap.append(dictionaries.index(dictionary))
+                for chunk in store_chunks:
+                    f.seek(chunk["offset"])
+                    chunks.append(dict(chunk, offset=out.tell(),
+                                       dictionary=remap[chunk["dictionary"]] if chunk["dictionary"] >= 0 else -1))
+                    out.write(f.read(chunk["size"]))
+        write_footer(out, dictionaries, chunks)
+
+###############################################################################
+# Reading
+###############################################################################
+class LabelStore:
+    """Read a store: the labels of any utterance (its chunk is decompressed and kept until an
+    utterance of another chunk is read) or of all of them, streamed chunk by chunk
+    """
+    def __init__(self, path):
+        self.path = path
+        self.handle = open(path, "rb")
+        (self.dictionaries, self.chunks) = read_footer(self.handle, path)
+        self.index = dict()
+        for (i, chunk) in enumerate(self.chunks):
+            for (j, name) in enumerate(chunk["names"]):
+                self.index[name] = (i, j)
+        self.cached = (None, None)
+
+    @property
+    def names(self):
+        return [name for chunk in self.chunks for name in chunk["names"]]
+
+    def __len__(self):
+        return sum(len(chunk["names"]) for chunk in self.chunks)
+
+    def __contains__(self, name):
+        return str(name) in self.index
+
+    def decompressor(self, chunk):
+        if chunk["dictionary"] < 0:
+            return zlib.decompressobj()
+        return zlib.decompressobj(zdict=self.dictionaries[chunk["dictionary"]])
+
+    def chunk(self, i):
+        """Decoded chunk i: names, counts, structured array and symbol tables
+        """
+        if self.cached[0] != i:
+            chunk = self.chunks[i]
+            self.handle.seek(chunk["offset"])
+            decompressor = self.decompressor(chunk)
+            payload = decompressor.decompress(self.handle.read(chunk["size"])) + decompressor.flush()
+            self.cached = (i, decode_chunk(payload))
+        return self.cached[1]
+
+    def array(self, name):
+        """Structured array and symbol tables of the labels of an utterance
+        """
+        (i, j) = self.index[str(name)]
+        (_, counts, data, symbols) = self.chunk(i)
+        first = sum(counts[:j])
+        return (data[first:first + counts[j]], symbols)
+
+    def labels(self, name):
+        return format_labels(*self.array(name))
+
+    def text(self, name):
+        return "".join("%s\n" % label for label in self.labels(name))
+
+    def stream(self):
+        """Decoded chunks in order, each decompressed while it is read
+        """
+        for chunk in self.chunks:
+            decompressor = self.decompressor(chunk)
+            self.handle.seek(chunk["offset"])
+            parts = []
+            remaining = chunk["size"]
+            while remaining > 0:
+                block = self.handle.read(min(READ_SIZE, remaining))
+                if not block:
+                    raise ValueError("%s is truncated" % self.path)
+                remaining -= len(block)
+                parts.append(decompressor.decompress(block))
+            parts.append(decompressor.flush())
+            yield decode_chunk(b"".join(parts))
+
+    def __iter__(self):
+        """(name, labels) of every utterance, in the order of the store
+        """
+        for (names, counts, data, symbols) in self.stream():
+            lines = format_labels(data, symbols)
+            first = 0
+            for (name, count) in zip(names, counts):
+                yield (name, lines[first:first+count])
+                first += count
+
+    def table(self):
+        """LabelTable of all the utterances (the chunk symbol ids are mapped to common tables)
+        """
+        common = symbol_tables()
+        tables = []
+        for (names, counts, data, symbols) in self.stream():
+            tables.append(LabelTable(intern_symbols(data, symbols, common), common, names,
+                                     np.concatenate([[0], np.cumsum(counts)])))
+        return concatenate(tables)
+
+    def close(self):
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+###############################################################################
+# Main function
+###############################################################################
+def pack():
+    table = read_labels(args.inputs)
+    samples = [(table.names[i], table.labels(i)) for i in range(min(len(table), args.sample))]
+    dictionary = b"" if args.no_dictionary else sample_dictionary(samples, args.chunk_size)
+    with LabelStoreWriter(args.store, dictionary, args.chunk_size) as writer:
+        for i in range(len(table)):
+            writer.add(table.names[i], table.labels(i))
+    logging.info("%d utterances, %d labels: %d bytes" % (len(table), len(table.data), os.path.getsize(args.store)))
+
+def unpack():
+    if len(args.inputs) != 1:
+        raise Exception("unpack: one output (directory or .mlf file) is expected")
+    output = args.inputs[0]
+    with LabelStore(args.store) as store:
+        if output.endswith(".mlf"):
+            store.table().write_mlf(output)
+            return
+        os.makedirs(output, exist_ok=True)
+        for (name, labels) in store:
+            with open(os.path.join(output, name + ".lab"), "w") as f:
+                f.write("".join("%s\n" % label for label in labels))
+
+def main():
+    """Main entry function
+    """
+    global args
+
+    if args.command == "pack":
+        pack()
+    else:
+        unpack()
+
+###############################################################################
+#  Envelopping
+###############################################################################
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(description="")
+
+        # Add options
+        parser.add_argument("-v", "--verbosity", action="count", default=0,
+                            help="increase output verbosity")
+        parser.add_argument("--chunk-size", default=CHUNK_UTTERANCES, type=int,
+                            help="number of utterances per compressed chunk")
+        parser.add_argument("--sample", default=256, type=int,
+                            help="number of utterances on which the dictionary is trained")
+        parser.add_argument("--no-dictionary", action="store_true",
+                            help="compress each chunk on its own")
+
+        # Add arguments
+        parser.add_argument("command", choices=("pack", "unpack"))
+        parser.add_argument("store", help="label store")
+        parser.add_argument("inputs", nargs="+",
+                            help="pack: label files, MLF files (.mlf) or label directories; "
+                            "unpack: output directory or MLF file")
+
+        # Parsing arguments
+        args = parser.parse_args()
+
+        # Verbose level => logging level
+        log_level = args.verbosity
+        if (args.verbosity > len(LEVEL)):
+            logging.warning("verbosity level is too high, I'm gonna assume you're taking the highes ")
+            log_level = len(LEVEL) - 1
+        logging.basicConfig(level=LEVEL[log_level])
+
+        # Debug time
+        start_time = time.time()
+        logging.info("start time = " + time.asctime())
+
+        # Running main function <=> run application
+        main()
+
+        # Debug time
+        logging.info("end time = " + time.asctime())
+        logging.info('TOTAL TIME IN MINUTES: %02.2f' %
+                    ((time.time() - start_time) / 60.0))
+
+        # Exit program
+        sys.exit(0)
+    except KeyboardInterrupt as e:  # Ctrl-C
+        raise e
+    except SystemExit as e:  # sys.exit()
+        pass
+    except Exception as e:
+        logging.error('ERROR, UNEXPECTED EXCEPTION')
+        logging.error(str(e))
+        traceback.print_exc(file=sys.stderr)
+        sys.exit(-1)
+
+# label_store.py ends here
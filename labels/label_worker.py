@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Per process state to compute the labels of single utterances on demand (label service, python
+    API). The corpus is loaded by the main process and inherited by the forked pool processes, which
+    therefore don't reload it.
+
+    The feature rows of an utterance are a structured array of label_reader.LABEL_DTYPE (one row per
+    segment, one column per field of LABEL_FIELDS, -1 for the unknown values) whose symbols are
+    interned in symbol tables of the utterance; intern_symbols maps them to the tables of the caller.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from roots2lab import UtteranceLabeller
+from labelformat import LABEL_FIELDS, SHORT_FIELDS
+from label_reader import LABEL_DTYPE, FIELD_TABLES, symbol_tables
+
+###############################################################################
+# Worker state
+###############################################################################
+# Kinds of result which can be computed for an utterance
+LABELS = "labels"
+FEATURES = "features"
+WAV = "wav"
+
+SIGNAL_LABEL = "Signal"
+
+def feature_rows(infos_list):
+    """Structured array of the feature values of the segments (see UtteranceLabeller.fill) and the
+    symbol tables (name => list of symbols) of its ids
+    """
+    symbols = symbol_tables()
+    rows = []
+    for infos in infos_list:
+        # The NSS segments only have the short fields
+        fields = LABEL_FIELDS if len(infos) > len(SHORT_FIELDS) else SHORT_FIELDS
+        values = dict.fromkeys(LABEL_FIELDS, -1)
+        for (field, value) in zip(fields, infos):
+            if value is None:
+                continue
+            if field in FIELD_TABLES:
+                value = symbols[FIELD_TABLES[field]].intern(str(value))
+            values[field] = int(value)
+        rows.append(tuple(values[field] for field in LABEL_FIELDS))
+    return (np.array(rows, dtype=LABEL_DTYPE), dict((name, table.symbols) for (name, table) in symbols.items()))
+
+class LabelWorker:
+    def __init__(self, corpus, config):
+        """
+        """
+        self.corpus = corpus
+        self.labeller = UtteranceLabeller(config)
+
+    def compute(self, utt_id, what=LABELS):
+        """Compute the labels, the feature rows (see feature_rows) or the signal path of an utterance
+        """
+        utt = self.corpus.get_utterance(utt_id)
+        if what == LABELS:
+            return list(self.labeller.labels(utt))
+        if what == FEATURES:
+            return feature_rows(self.labeller.infos(utt))
+        if what == WAV:
+            signal = utt.get_sequence(SIGNAL_LABEL).as_segment_sequence()
+            item = signal.get_item(0).as_signal_segment()
+            return os.path.join(item.get_base_dir_name(), item.get_file_name())
+        raise ValueError("unknown result kind \"%s\"" % what)
+
+# State of the current process, set by the pool initializer
+_worker = None
+_corpus = None
+_barrier = None
+
+def _init(config):
+    global _worker
+    _worker = LabelWorker(_corpus, config)
+
+def _started():
+    """Task which only returns once all the pool processes run it
+    """
+    _barrier.wait()
+
+def compute(utt_id, what=LABELS):
+    """Entry point of the pool processes
+    """
+    return _worker.compute(utt_id, what)
+
+def create_pool(corpus, config, nb_proc, start=False):
+    """Create a pool of processes sharing (by fork) the already loaded corpus
+
+    The processes are forked lazily at the first submissions. With start, they are all forked before
+    returning, so from the calling thread (a fork from another thread only copies that thread).
+    """
+    global _corpus, _barrier
+    _corpus = corpus
+    context = multiprocessing.get_context("fork")
+    pool = ProcessPoolExecutor(nb_proc, mp_context=context, initializer=_init, initargs=(config,))
+    if start:
+        # The barrier is inherited by the processes forked by the submissions
+        _barrier = context.Barrier(nb_proc)
+        for future in [pool.submit(_started) for _ in range(nb_proc)]:
+            future.result()
+        _barrier = None
+    return pool
+
+# label_worker.py ends here
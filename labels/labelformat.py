@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Layout of the full context labels produced by UtteranceLabeller.format. The field names follow
+    the HTS convention (p1..p7, a1..a3, b1..b16, ...) prefixed by the segment start/end times.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import re
+
+#####################################################################################################
+### Layout
+#####################################################################################################
+UNKNOWN_VALUE = "x"
+
+LABEL_FIELDS = (("start", "end") +
+                tuple("p%d" % i for i in range(1, 8)) +
+                tuple("a%d" % i for i in range(1, 4)) +
+                tuple("b%d" % i for i in range(1, 17)) +
+                tuple("c%d" % i for i in range(1, 4)) +
+                tuple("d%d" % i for i in range(1, 3)) +
+                tuple("e%d" % i for i in range(1, 9)) +
+                tuple("f%d" % i for i in range(1, 3)) +
+                tuple("g%d" % i for i in range(1, 3)) +
+                tuple("h%d" % i for i in range(1, 6)) +
+                tuple("i%d" % i for i in range(1, 3)) +
+                tuple("j%d" % i for i in range(1, 4)))
+
+# Fields filled when the segment is not a phone (NSS)
+SHORT_FIELDS = LABEL_FIELDS[:9] + LABEL_FIELDS[-3:]
+
+FULL_FORMAT = "%s %s %s^%s-%s+%s=%s@%s_%s/A:%s_%s_%s/B:%s-%s-%s@%s-%s&%s-%s#%s-%s$%s-%s!%s-%s;%s-%s|%s/C:%s+%s+%s/D:%s_%s/E:%s+%s@%s+%s&%s+%s#%s+%s/F:%s_%s/G:%s_%s/H:%s=%s^%s=%s|%s/I:%s_%s/J:%d+%d-%d/Z:x"
+SHORT_FORMAT = "%s %s %s^%s-%s+%s=%s@%s_%s/A:x_x_x/B:x-x-x@x-x&x-x#x-x$x-x!x-x;x-x|x/C:x+x+x/D:x_x/E:x+x@x+x&x+x#x+x/F:x_x/G:x_x/H:x=x^x=x|x/I:x_x/J:%d+%d-%d/Z:x"
+
+def _delimiters(fmt):
+    """Literal text surrounding each field of the format: len(fields) + 1 strings
+    """
+    return re.split("%[sd]", fmt)
+
+DELIMITERS = _delimiters(FULL_FORMAT)
+
+_LABEL_RE = re.compile("^" + "".join(re.escape(d) + "(.*?)" for d in DELIMITERS[:-1]) +
+                       re.escape(DELIMITERS[-1]) + "$")
+
+#####################################################################################################
+### Helpers
+#####################################################################################################
+def split_label(label):
+    """Split a label line into a dictionary field name => textual value
+
+    A short (NSS) label is returned with all its unfilled fields set to UNKNOWN_VALUE as it has
+    exactly the same text as a full label with those fields unknown.
+    """
+    m = _LABEL_RE.match(label)
+    if m is None:
+        raise ValueError("\"%s\" is not a full context label" % label)
+    return dict(zip(LABEL_FIELDS, m.groups()))
+
+def model_name(label):
+    """Full context name of a label line, i.e. the label without its start and end times
+    """
+    return label.split(" ", 2)[2]
+
+# labelformat.py ends here
@@ -18,19 +18,31 @@ import traceback
 import argparse
 import time
 import logging
-
-import roots
-from features import *
+import queue
+import shutil
+import threading
+
+from features import FeatureFactory, FeatureProfile, SYNTHESIS_FEATURES, UNIT, nss_label
+from labelformat import FULL_FORMAT, SHORT_FORMAT, LABEL_FIELDS, SHORT_FIELDS, model_name
+from label_stats import LabelStats, sketch_width
+from duration_stats import DurationStats
+from label_store import LabelStoreWriter, merge_stores, sample_dictionary
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from tracing import get_tracer, write_trace
+from progress import Progress
+from corpus_index import CorpusIndex, COUNTED_TIERS
+from shared_tables import SharedTables
+from sharding import parse_shard, plan_shards, estimated_costs, write_manifest, shard_path
+from unique_lists import SpillingSet, merge_partitions
+from stages import StageClock, merge_stage_reports, format_stage_report
+from supervisor import Supervisor
+from config_snapshot import load_configuration
+from calibration import (StageTimes, sample_ids, current_rss, run_forked, trial_directory, plan_label_workers,
+                         describe)
 
 # Multi process
-from multiprocessing import Process, Queue, JoinableQueue
-
-# Configuration part
-from yaml import load, dump
-try:
-    from yaml import CLoader as Loader, CDumper as Dumper
-except ImportError:
-    from yaml import Loader, Dumper
+from multiprocessing import Process
 
 
 ###############################################################################
@@ -40,19 +52,50 @@ LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
 
 PH_WIN = 2
 
+# Unique label lists (full contexts and monophones) and their number of spill partitions
+LISTS = ("full", "mono")
+NB_LIST_PARTITIONS = 16
+STORE_NAME = "labels.lstore"
+MONO_FIELD = LABEL_FIELDS.index("p3")
+
+# Stages of a worker
+STAGES = ("prefetch", "compute", "write")
+
 ###############################################################################
 # Utils
 ###############################################################################
-class UtteranceToLabel(Process):
-    def __init__(self, corpus, out_lab_dir, queue, config):
+def publish_tables(snapshot, corpus, index, ignored):
+    """Build the read-only corpus-wide tables and publish them in shared memory
+    """
+    config = snapshot.config
+    symbols = snapshot.symbols()
+    symbols["tiers"] = list(config["SequenceLabels"].values())
+
+    columns = dict()
+    if index is not None:
+        columns = dict((tier, index.columns[tier]) for tier in COUNTED_TIERS)
+
+    # Settings of the labellers: the workers don't keep the configuration
+    settings = {"SequenceLabels": config["SequenceLabels"],
+                "Alphabets": {"Phone": config["Alphabets"]["Phone"], "NSS": config["Alphabets"]["NSS"]}}
+    return SharedTables.create(symbols, columns, ignored, corpus.count_utterances(), settings)
+
+class UtteranceLabeller:
+    # Feature classes overriding the default ones (see FeatureFactory)
+    features = None
+
+    def __init__(self, config, profile=False):
+        """Label generation for one utterance at a time
         """
+        self.profile = None
+        if profile:
+            self.profile = FeatureProfile()
+        if config is not None:
+            self.configure(config)
+
+    def configure(self, config):
+        """Set the tiers and alphabets of the configuration
         """
-        Process.__init__(self)
-        self.corpus = corpus
-        self.queue = queue
-        self.out_dir = out_lab_dir
-
-        # Load configuration
         self.sequence_labels = config["SequenceLabels"]
         self.phoneme_alphabet = config["Alphabets"]["Phone"]
         self.nss_alphabet = config["Alphabets"]["NSS"]
@@ -60,10 +103,10 @@ class UtteranceToLabel(Process):
     def fill(self, segment_index, nb_segs):
         """
         """
-        feature_factory = FeatureFactory(self.utt, self.sequence_labels)
-        nb_syllables = self.utt.get_sequence(self.sequence_labels["syllable"]).count()
-        nb_words = self.utt.get_sequence(self.sequence_labels["word"]).count()
-        nb_phrases = self.utt.get_sequence(self.sequence_labels["phrase"]).count()
+        feature_factory = self.feature_factory
+        nb_syllables = self.sizes["syllable"]
+        nb_words = self.sizes["word"]
+        nb_phrases = self.sizes["phrase"]
 
         infos = []
 
@@ -121,7 +164,10 @@ class UtteranceToLabel(Process):
         if cur_phone_index is not None:
             syllable_index = feature_factory.compute("SyllableIndex", cur_phone_index)
             if syllable_index is None:
-                print(feature_factory.compute("PhoneLabel", cur_phone_index, self.phoneme_alphabet))
+                # Orphan phone (see the --validate pass)
+                raise ValueError("phone %d (%s) is not related to a syllable" %
+                                 (cur_phone_index, feature_factory.compute("PhoneLabel", cur_phone_index,
+                                                                           self.phoneme_alphabet)))
 
             if syllable_index > 0:
                 infos.append(feature_factory.compute("SyllableIsStressed", syllable_index-1))
@@ -215,83 +261,695 @@ class UtteranceToLabel(Process):
         if len(infos) < 12:
             pass
         elif len(infos) == 12:
-            label = "%s %s %s^%s-%s+%s=%s@%s_%s/A:x_x_x/B:x-x-x@x-x&x-x#x-x$x-x!x-x;x-x|x/C:x+x+x/D:x_x/E:x+x@x+x&x+x#x+x/F:x_x/G:x_x/H:x=x^x=x|x/I:x_x/J:%d+%d-%d/Z:x" % tuple(infos)
+            label = SHORT_FORMAT % tuple(infos)
         else:
-            label = "%s %s %s^%s-%s+%s=%s@%s_%s/A:%s_%s_%s/B:%s-%s-%s@%s-%s&%s-%s#%s-%s$%s-%s!%s-%s;%s-%s|%s/C:%s+%s+%s/D:%s_%s/E:%s+%s@%s+%s&%s+%s#%s+%s/F:%s_%s/G:%s_%s/H:%s=%s^%s=%s|%s/I:%s_%s/J:%d+%d-%d/Z:x" % tuple(infos)
+            label = FULL_FORMAT % tuple(infos)
 
         return label
 
+    def count_segments(self, utt):
+        return utt.get_sequence(self.sequence_labels["segment"]).as_segment_sequence().count()
+
+    def utterance_sizes(self, utt):
+        """Number of segments, syllables, words and phrases of the utterance
+        """
+        sizes = dict((tier, utt.get_sequence(self.sequence_labels[tier]).count())
+                     for tier in ("syllable", "word", "phrase"))
+        sizes["segment"] = self.count_segments(utt)
+        return sizes
+
+    def infos(self, utt):
+        """Generate the feature values of each segment of the given utterance
+        """
+        self.utt = utt
+        self.feature_factory = FeatureFactory(utt, self.sequence_labels, self.profile, self.features)
+
+        self.sizes = self.utterance_sizes(utt)
+        nb_segs = self.sizes["segment"]
+        for i in range(0, nb_segs):
+            yield self.fill(i, nb_segs)
+
+    def labels(self, utt):
+        """Generate the label lines of the given utterance
+        """
+        for infos in self.infos(utt):
+            yield self.format(infos)
+
+class SynthesisLabeller(UtteranceLabeller):
+    """Synthesis time labelling: the labels are built from the phone tier alone (no segment tier, no
+    NSS tier), without any process or file. The times are zero unless durations are given.
+
+    It sits with the other labellers; the feature classes it overrides are in features.py
+    (SYNTHESIS_FEATURES). The pauses (NSS segments) are given by the front-end, by default a "#"
+    pause starts and ends the utterance as in the aligned corpora. A pause only changes the phone
+    contexts (p1-p5) of its neighbours, so the pauses are inserted in the labels of the phones.
+    """
+    features = SYNTHESIS_FEATURES
+
+    # NSS of the default pauses, at the start and the end of the utterance
+    PAUSE = "#"
+
+    def count_segments(self, utt):
+        return utt.get_sequence(self.sequence_labels["phone"]).count()
+
+    def layout(self, utt, pauses=None):
+        """Segments of the labels: ("phone", phone index) or ("nss", NSS label). pauses maps a phone
+        position to the NSS (as in the NSS tier, or a list of NSS) of the pause inserted before this
+        phone, the position of the end of the utterance being the number of phones
+        """
+        nb_phones = self.count_segments(utt)
+        if pauses is None:
+            pauses = {0: self.PAUSE, nb_phones: self.PAUSE}
+        segments = []
+        for i in range(nb_phones + 1):
+            nss = pauses.get(i, [])
+            for symbol in ([nss] if isinstance(nss, str) else nss):
+                segments.append(("nss", nss_label(symbol)))
+            if i < nb_phones:
+                segments.append(("phone", i))
+        return segments
+
+    def labels(self, utt, durations=None, pauses=None):
+        """Label lines of the utterance, with the pauses (see layout); durations are the (predicted)
+        durations in seconds of each segment of the layout, phones and pauses
+        """
+        segments = self.layout(utt, pauses)
+        rows = list(self.infos(utt))
+        utterance_sizes = [self.sizes["syllable"], self.sizes["word"], self.sizes["phrase"]]
+        symbols = [rows[value][2 + PH_WIN] if kind == "phone" else value for (kind, value) in segments]
+
+        start = 0.0
+        labels = []
+        for (s, (kind, value)) in enumerate(segments):
+            if kind == "phone":
+                infos = list(rows[value])
+            else:
+                infos = [0, 0] + [None] * (2 * PH_WIN + 3) + utterance_sizes
+            infos[2:3 + 2 * PH_WIN] = [symbols[j] if 0 <= j < len(segments) else None
+                                       for j in range(s - PH_WIN, s + PH_WIN + 1)]
+            if durations is not None:
+                infos[0] = int(start * UNIT)
+                start += durations[s]
+                infos[1] = int(start * UNIT)
+            labels.append(self.format(infos))
+        return labels
+
+class UtteranceToLabel(Process, UtteranceLabeller):
+    def __init__(self, corpus, out_lab_dir, queue, config, results=None, profile=False, trace=False,
+                 tables_name=None, stats=None, lists_dir=None, lists_memory=100000, prefetch_depth=2,
+                 write_depth=4, store_dir=None, store_dictionary=b"", duration_fields=None):
+        """The worker gets the utterance ids from queue. If results is not None, the worker puts on
+        it its messages (see common/supervisor.py) and its report when it is finished; queue and
+        results are usually the same WorkerChannel. tables_name is the name of the shared memory
+        block of the corpus-wide tables published by the main process: the worker then reads its
+        settings, the ignored utterances, the utterance sizes and the alphabets from it and config
+        may be None. If stats is not None, the coverage statistics of the labels are accumulated and
+        sent with the report; stats is the (width, depth) of their count-min sketch. If lists_dir is
+        not None, the unique full context and monophone names are spilled in its sub-directories
+        full and mono. prefetch_depth and write_depth are the sizes of the queues between the stages
+        of the worker. If store_dir is not None, the labels are written in a label store part of
+        this directory (compressed with store_dictionary) instead of label files. If duration_fields
+        is not None, the duration statistics of the segments (split by the values of these context
+        fields) are accumulated and sent with the report.
+        """
+        Process.__init__(self)
+        UtteranceLabeller.__init__(self, config, profile)
+        self.corpus = corpus
+        self.tables_name = tables_name
+        self.tables = None
+        self.unknown_symbols = set()
+        self.queue = queue
+        self.out_dir = out_lab_dir
+        self.results = results
+        self.tracer = get_tracer(trace)
+        self.prefetch_depth = prefetch_depth
+        self.write_depth = write_depth
+        self.clocks = dict((stage, StageClock()) for stage in STAGES)
+        self.stats = None
+        if stats is not None:
+            self.stats = LabelStats(width=stats[0], depth=stats[1])
+        self.durations = None
+        if duration_fields is not None:
+            self.durations = DurationStats(duration_fields)
+        self.lists = None
+        if lists_dir is not None:
+            self.lists = dict((kind, SpillingSet(os.path.join(lists_dir, kind), self.name, lists_memory,
+                                                 NB_LIST_PARTITIONS))
+                              for kind in LISTS)
+        self.store_dir = store_dir
+        self.store_dictionary = store_dictionary
+        self.store = None
+
     def run(self):
+        """The worker is a pipeline of three stages connected by bounded queues: the prefetch thread
+        loads the next utterances, the main thread computes the labels and the write thread writes
+        them and notifies the main process.
         """
+        self.tracer.name_process(self.name)
+        if self.tables_name is not None:
+            self.tables = SharedTables.attach(self.tables_name)
+            self.configure(self.tables.settings)
+        if self.store_dir is not None:
+            self.store = LabelStoreWriter(os.path.join(self.store_dir, "%d.part" % os.getpid()),
+                                          self.store_dictionary)
+
+        loaded = queue.Queue(self.prefetch_depth)
+        computed = queue.Queue(self.write_depth)
+        stages = [threading.Thread(target=self.prefetch, args=(loaded,), name="prefetch"),
+                  threading.Thread(target=self.write, args=(computed,), name="write")]
+        for stage in stages:
+            stage.start()
+
+        self.tracer.name_thread("compute")
+        clock = self.clocks["compute"]
+        while True:
+            item = clock.get(loaded)
+            if item is None:
+                break
+
+            (utt_infos, self.utt, error) = item
+            labels = None
+            with clock.work():
+                self.id = self.select(utt_infos)
+                if error is None:
+                    self.notify("started", utt_infos, "compute")
+                    try:
+                        labels = self.compute()
+                    except Exception as ex:
+                        error = "%s: %s\n%s" % (type(ex).__name__, ex, traceback.format_exc())
+                    self.notify("stopped", utt_infos)
+            clock.put(computed, (utt_infos, os.path.join(self.out_dir, "%d.lab" % self.id), labels, error))
+        clock.put(computed, None)
+
+        for stage in stages:
+            stage.join()
+        if self.store is not None:
+            self.store.close()
+        logging.info("Thread is finished")
+        self.report()
+        if self.tables is not None:
+            self.tables.close()
+
+    def prefetch(self, loaded):
+        """Prefetch stage: load the utterances of the queue items
         """
+        self.tracer.name_thread("prefetch")
+        clock = self.clocks["prefetch"]
         while True:
-            utt_infos = self.queue.get()
+            with self.tracer.span("queue.get"):
+                utt_infos = clock.get(self.queue)
             if utt_infos is None:
-                logging.info("Thread is finished")
+                clock.put(loaded, None)
                 break
 
-            self.id = utt_infos
-            self.utt = self.corpus.get_utterance(self.id)
+            (utt, error) = (None, None)
+            with clock.work():
+                utt_id = self.utterance_id(utt_infos)
+                self.notify("started", utt_infos, "load")
+                try:
+                    if (self.tables is not None) and self.tables.is_ignored(utt_id):
+                        raise ValueError("utterance %d is ignored" % utt_id)
+                    with self.tracer.span("load", id=utt_id):
+                        utt = self.corpus_of(utt_infos).get_utterance(utt_id)
+                except Exception as ex:
+                    error = "%s: %s\n%s" % (type(ex).__name__, ex, traceback.format_exc())
+                self.notify("stopped", utt_infos)
+            clock.put(loaded, (utt_infos, utt, error))
+
+    def compute(self):
+        """Compute stage: labels of the current utterance (and their statistics)
+        """
+        with self.tracer.span("compute", id=self.id):
+            infos = list(self.infos(self.utt))
+            labels = [self.format(values) for values in infos]
+        if self.tables is not None:
+            self.check_symbols(infos)
+        if self.stats is not None:
+            with self.tracer.span("stats", id=self.id):
+                self.stats.add_utterance(infos, labels)
+        if self.durations is not None:
+            self.durations.add_utterance(infos)
+        if self.lists is not None:
+            for (values, label) in zip(infos, labels):
+                self.lists["full"].add(model_name(label))
+                self.lists["mono"].add(str(values[MONO_FIELD]))
+        return labels
+
+    def utterance_sizes(self, utt):
+        """Sizes of the corpus index in the shared tables, counted on the utterance without index
+        """
+        if (self.tables is None) or not all(tier in self.tables.columns for tier in COUNTED_TIERS):
+            return UtteranceLabeller.utterance_sizes(self, utt)
+        sizes = dict((tier, self.tables.column(tier, self.id)) for tier in ("segment", "syllable", "word", "phrase"))
+        if sizes["segment"] <= 0:
+            return UtteranceLabeller.utterance_sizes(self, utt)
+        return sizes
+
+    def check_symbols(self, infos):
+        """Record the phones and NSS of the labels missing from the shared alphabet tables
+        """
+        for values in infos:
+            symbol = values[MONO_FIELD]
+            table = "nss" if len(values) == len(SHORT_FIELDS) else "phone"
+            if (symbol is None) or (self.tables.count_symbols(table) == 0) or ((table, symbol) in self.unknown_symbols):
+                continue
+            if self.tables.symbol_index(table, str(symbol)) is None:
+                self.unknown_symbols.add((table, symbol))
+
+    def write(self, computed):
+        """Write stage: write the label files (empty for a failed utterance) and notify the main process
+        """
+        self.tracer.name_thread("write")
+        clock = self.clocks["write"]
+        while True:
+            item = clock.get(computed)
+            if item is None:
+                break
 
-            out_handle = open(os.path.join(self.out_dir, "%d.lab" % self.id), "w")
+            (utt_infos, path, labels, error) = item
+            with clock.work():
+                try:
+                    with self.tracer.span("write", id=self.utterance_id(utt_infos)):
+                        if self.store is not None:
+                            self.store.add(self.utterance_id(utt_infos), labels)
+                        else:
+                            with open(path, "w") as out_handle:
+                                out_handle.write("".join("%s\n" % label for label in labels or []))
+                except Exception as ex:
+                    error = error or "%s: %s\n%s" % (type(ex).__name__, ex, traceback.format_exc())
+
+                if error is None:
+                    self.notify("done", utt_infos)
+                else:
+                    self.notify("failed", utt_infos, error)
+            self.queue.task_done()
 
-            try:
-                segments = self.utt.get_sequence(self.sequence_labels["segment"]).as_segment_sequence()
+    def utterance_id(self, item):
+        return item
 
-                nb_segs = segments.count()
-                for i in range(0, nb_segs):
-                    infos = self.fill(i, nb_segs)
-                    label = self.format(infos)
-                    out_handle.write("%s\n" % label)
+    def corpus_of(self, item):
+        return self.corpus
 
-                print("%d is done" % self.id)
-            except Exception as ex:
-                print("%d failed with exception %s" % (self.id, ex))
-            out_handle.close()
-            self.queue.task_done()
+    def select(self, item):
+        """Return the utterance id of a queue item, the output directory and the configuration being set
+        """
+        return self.utterance_id(item)
 
-###############################################################################
-# Main function
-###############################################################################
+    def notify(self, kind, *values):
+        """Send a message (started, stopped, done, failed or finished) to the main process
+        """
+        if self.results is None:
+            logging.info("%s: %s %s" % (self.name, kind, " ".join(str(v) for v in values)))
+            return
+        self.results.put((kind, self.name) + values)
+
+    def report(self):
+        """Send the worker report (profile, ...) to the main process
+        """
+        if self.lists is not None:
+            for unique_set in self.lists.values():
+                unique_set.spill()
+
+        report = dict()
+        if self.profile is not None:
+            report["profile"] = self.profile.to_dict()
+        if self.stats is not None:
+            report["stats"] = self.stats.to_dict()
+        if self.durations is not None:
+            report["durations"] = self.durations.to_dict()
+        if self.store is not None:
+            report["store"] = self.store.path
+        if self.unknown_symbols:
+            report["unknown_symbols"] = sorted(self.unknown_symbols)
+        report["stages"] = dict((stage, clock.to_dict()) for (stage, clock) in self.clocks.items())
+        report["trace"] = self.tracer.events
+        self.notify("finished", report)
+
+class BatchUtteranceToLabel(UtteranceToLabel):
+    def __init__(self, jobs, queue, results=None, profile=False, trace=False, prefetch_depth=2, write_depth=4):
+        """Worker of the batch mode: the queue items are (job, utterance id), job being the index in
+        jobs of the corpus, configuration and output directory of the utterance
+        """
+        UtteranceToLabel.__init__(self, jobs[0]["corpus"], jobs[0]["output_dir"], queue, jobs[0]["config"],
+                                  results, profile, trace, prefetch_depth=prefetch_depth,
+                                  write_depth=write_depth)
+        self.jobs = jobs
+        self.settings = dict()
+
+    def utterance_id(self, item):
+        return item[1]
+
+    def corpus_of(self, item):
+        return self.jobs[item[0]]["corpus"]
 
+    def select(self, item):
+        """Switch to the configuration and output directory of the job of the item
+        """
+        (job, utt_id) = item
+        if job not in self.settings:
+            config = self.jobs[job]["config"]
+            self.settings[job] = (config["SequenceLabels"], config["Alphabets"]["Phone"],
+                                  config["Alphabets"]["NSS"])
+        (self.sequence_labels, self.phoneme_alphabet, self.nss_alphabet) = self.settings[job]
+        self.out_dir = self.jobs[job]["output_dir"]
+        return utt_id
 
 ###############################################################################
 # Main function
 ###############################################################################
+def supervise(create_worker, items, progress):
+    """Process the items with a supervised pool of args.nb_proc workers, return their reports
+    """
+    # The worker state (statistics, lists, store part) is in its report, lost if the worker crashes
+    redo_completed = (args.stats is not None) or (args.durations is not None) or args.lists or args.store
+    supervisor = Supervisor(create_worker, args.nb_proc, args.prefetch_depth + args.write_depth + 1,
+                            args.timeout, args.max_retries, redo_completed)
+    reports = supervisor.run(items, progress)
+    progress.close()
+    if supervisor.quarantined:
+        logging.warning("%d utterances quarantined: %s" %
+                        (len(supervisor.quarantined), ", ".join(str(i) for i in supervisor.quarantined)))
+    return reports
+
+def gather(reports, sketch=None):
+    """Merge the reports of the workers
+
+    Return the merged feature profile, coverage statistics, duration statistics, trace events and label
+    store parts. sketch is the (width, depth) of the count-min sketch of the coverage statistics. The
+    busy/idle time of the worker stages is logged.
+    """
+    profile = FeatureProfile()
+    stats = LabelStats() if sketch is None else LabelStats(width=sketch[0], depth=sketch[1])
+    durations = DurationStats(duration_fields())
+    stages = dict()
+    events = []
+    parts = []
+    unknown_symbols = set()
+    for report in reports:
+        if "profile" in report:
+            profile.merge(report["profile"])
+        if "stats" in report:
+            stats.merge(report["stats"])
+        if "durations" in report:
+            durations.merge(report["durations"])
+        if "store" in report:
+            parts.append(report["store"])
+        unknown_symbols.update((table, symbol) for (table, symbol) in report.get("unknown_symbols", []))
+        merge_stage_reports(stages, report["stages"])
+        events += report["trace"]
+    logging.info("worker stages:\n%s" % format_stage_report(stages))
+    if unknown_symbols:
+        logging.warning("symbols missing from the alphabets: %s" %
+                        ", ".join("%s %s" % item for item in sorted(unknown_symbols)))
+    return (profile, stats, durations, events, parts)
+
+def stats_sketch(snapshot):
+    """(width, depth) of the count-min sketch of the coverage statistics (--sketch-width, --sketch-depth),
+    the width being by default sized to the phone alphabet
+    """
+    width = args.sketch_width
+    if width is None:
+        width = sketch_width(len(snapshot.symbols()["phone"]))
+    return (width, args.sketch_depth)
+
+def invalid_utterances(corpus, config, ids):
+    """--validate: ids of the utterances whose structure is invalid (the signal is not checked)
+    """
+    from validation import extract_corpus, validate, invalid_ids
+    invalid = invalid_ids(validate(ids, extract_corpus(corpus, config["SequenceLabels"], ids, args.nb_proc),
+                                   check_signal=False))
+    if invalid:
+        logging.warning("%d invalid utterances are ignored: %s" % (len(invalid), ", ".join(str(i) for i in invalid)))
+    return invalid
+
+def shard_output(path):
+    """Path of an output or intermediate file of the run, suffixed by the shard with --shard so that
+    the shards can share their output directory
+    """
+    if args.shard is None:
+        return path
+    return shard_path(path, args.shard[0], args.shard[1])
+
+def duration_fields():
+    """Context fields of the duration statistics (--duration-contexts)
+    """
+    return tuple(field for field in args.duration_contexts.split(",") if field)
+
+def write_reports(tracer, profile, events):
+    """Print or write the merged profile and the trace
+    """
+    if args.profile:
+        print(profile.report())
+        if args.profile_json is not None:
+            profile.dump(args.profile_json)
+
+    if args.trace is not None:
+        write_trace(args.trace, tracer.events + events)
+
+def calibrate(samples, output_dir):
+    """Calibration run on samples, a list of (corpus, configuration, utterance id), writing in
+    output_dir: mean stage times, memory of a worker process and memory of a loaded utterance
+    """
+    labellers = dict()
+    times = StageTimes()
+    out_dir = trial_directory(output_dir)
+    try:
+        start = current_rss()
+        utterances = []
+        for (corpus, config, utt_id) in samples:
+            try:
+                utterances.append((config, utt_id, times.measure("load", corpus.get_utterance, utt_id)))
+            except Exception as ex:
+                logging.debug("calibration: %d can't be loaded (%s)" % (utt_id, ex))
+        loaded = current_rss()
+
+        def write(path, labels):
+            with open(path, "w") as out_handle:
+                out_handle.write("".join("%s\n" % label for label in labels))
+
+        for (config, utt_id, utt) in utterances:
+            if id(config) not in labellers:
+                labellers[id(config)] = UtteranceLabeller(config)
+            labeller = labellers[id(config)]
+            try:
+                labels = times.measure("compute", lambda: list(labeller.labels(utt)))
+            except Exception as ex:
+                logging.debug("calibration: %d failed (%s)" % (utt_id, ex))
+                continue
+            times.measure("write", write, os.path.join(out_dir, "%d.lab" % utt_id), labels)
+        end = current_rss()
+    finally:
+        shutil.rmtree(out_dir)
+
+    return (times.to_dict(), max(0, end - loaded), max(0, loaded - start) / max(1, len(utterances)))
+
+def train_store_dictionary(corpus, config, ids):
+    """--store: compression dictionary trained on the labels of the utterances ids
+    """
+    labeller = UtteranceLabeller(config)
+    samples = []
+    for utt_id in ids:
+        try:
+            samples.append((utt_id, list(labeller.labels(corpus.get_utterance(utt_id)))))
+        except Exception as ex:
+            logging.debug("store dictionary: %d failed (%s)" % (utt_id, ex))
+    return sample_dictionary(samples)
+
+def auto_tune(samples, nb_utts, output_dir):
+    """--auto: set the number of workers and the queue depths from a calibration on samples
+    """
+    (times, process_memory, utterance_memory) = run_forked(calibrate, samples, output_dir)
+    times = StageTimes.from_dict(times)
+    memory_budget = args.memory_budget * 2**20 if args.memory_budget is not None else None
+    plan = plan_label_workers(times, process_memory, utterance_memory, nb_utts, memory_budget)
+    logging.info("auto: %s" % describe(plan, times))
+    (args.nb_proc, args.prefetch_depth, args.write_depth) = (plan["nb_proc"], plan["prefetch_depth"],
+                                                             plan["write_depth"])
+
+def load_batch(path):
+    """Load the batch manifest: a YAML list of corpus, configuration and output_dir entries, the
+    relative paths being relative to the manifest
+    """
+    from yaml import load
+    try:
+        from yaml import CLoader as Loader
+    except ImportError:
+        from yaml import Loader
+
+    with open(path) as f:
+        entries = load(f, Loader=Loader)
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for entry in entries:
+        paths = dict((key, os.path.join(base_dir, entry[key])) for key in ("corpus", "configuration", "output_dir"))
+        config = load_configuration(paths["configuration"], not args.no_cache).config
+        jobs.append({"corpus_path": paths["corpus"], "config": config, "output_dir": paths["output_dir"]})
+    return jobs
+
+def main_batch(tracer):
+    """Batch mode: the utterances of all the corpora are processed by one pool of workers, the most
+    expensive first whatever their corpus so that no core stays idle between the corpora
+    """
+    import roots
+    jobs = load_batch(args.batch)
+
+    items = []
+    costs = []
+    with tracer.span("load corpus"):
+        for (job, entry) in enumerate(jobs):
+            entry["corpus"] = roots.Corpus(entry["corpus_path"])
+            index = CorpusIndex.load(entry["corpus_path"], entry["config"]["SequenceLabels"])
+            os.makedirs(entry["output_dir"], exist_ok=True)
+
+            ignored = set(entry["config"].get("IgnoredID", []))
+            ids = [i for i in range(entry["corpus"].count_utterances()) if i not in ignored]
+            if args.validate:
+                with tracer.span("validation"):
+                    invalid = set(invalid_utterances(entry["corpus"], entry["config"], ids))
+                ids = [i for i in ids if i not in invalid]
+            job_costs = estimated_costs(ids, index)
+            items += [(job, i) for i in ids]
+            costs += [job_costs[i] for i in ids]
+            logging.info("%s: %d utterances in %s" % (entry["corpus_path"], len(ids), entry["output_dir"]))
+
+    if args.auto:
+        with tracer.span("calibration"):
+            # The trial writes go to the output directory of the first job
+            auto_tune([(jobs[job]["corpus"], jobs[job]["config"], i)
+                       for (job, i) in sample_ids(items, args.auto_sample)], len(items), jobs[0]["output_dir"])
+
+    def create_worker(channel):
+        return BatchUtteranceToLabel(jobs, channel, channel, args.profile, args.trace is not None,
+                                     args.prefetch_depth, args.write_depth)
+
+    items = [item for (cost, item) in sorted(zip(costs, items), key=lambda c: (-c[0], c[1]))]
+    progress = Progress(len(items), args.status, args.failures, args.progress_interval)
+    (profile, _, _, events, _) = gather(supervise(create_worker, items, progress))
+    write_reports(tracer, profile, events)
+
 def main():
     """Main entry function
     """
     global args
 
+    tracer = get_tracer(args.trace is not None)
+    tracer.name_process("main")
+
+    if args.batch is not None:
+        main_batch(tracer)
+        return
+
     # Load configuration
-    config = load(args.configuration, Loader=Loader)
+    snapshot = load_configuration(args.configuration, not args.no_cache)
+    config = snapshot.config
     ignored = []
     if "IgnoredID" in config:
         ignored = config["IgnoredID"]
 
     # Loading corpus
-    corpus = roots.Corpus(args.corpus)
-
-    # Convert duration to labels
-    q = JoinableQueue()
-    processes = []
-    for base in range(args.nb_proc):
-        t = UtteranceToLabel(corpus, args.output_dir, q, config)
-        t.start()
-        processes.append(t)
-
-    # Fill the queue for the workers
-    for i in range(0, corpus.count_utterances()):
-        if i not in ignored:
-            q.put(i)
-
-    # Fill the queue by adding a None to indicate the end
-    for i in range(len(processes)):
-        q.put(None)
-
-    # Wait the end of the processes
-    for t in processes:
-        t.join()
+    with tracer.span("load corpus"):
+        import roots
+        corpus = roots.Corpus(args.corpus)
+        index = CorpusIndex.load(args.corpus, config["SequenceLabels"])
+
+    # Daemon mode
+    if args.serve is not None:
+        from label_service import serve
+        serve(corpus, config, args.serve, args.nb_proc, args.cache_size)
+        return
+
+    # Exclude the structurally invalid utterances before the extraction
+    if args.validate:
+        with tracer.span("validation"):
+            ids = [i for i in range(corpus.count_utterances()) if i not in set(ignored)]
+            ignored = list(ignored) + invalid_utterances(corpus, config, ids)
+
+    # Corpus-wide tables shared by the workers
+    with tracer.span("publish tables"):
+        tables = publish_tables(snapshot, corpus, index, ignored)
+
+    # The shared memory block is released (and unlinked) whatever happens
+    try:
+        # Spill directory of the unique label lists
+        lists_dir = None
+        if args.lists:
+            lists_dir = shard_output(os.path.join(args.output_dir, ".lists"))
+            shutil.rmtree(lists_dir, ignore_errors=True)
+
+        # Label store parts of the workers
+        store_dir = None
+        if args.store:
+            store_dir = shard_output(os.path.join(args.output_dir, ".store"))
+            shutil.rmtree(store_dir, ignore_errors=True)
+            os.makedirs(store_dir)
+
+        # Utterances to process
+        ids = [i for i in range(0, corpus.count_utterances()) if not tables.is_ignored(i)]
+        if args.shard is not None:
+            shards = plan_shards(ids, estimated_costs(ids, index), args.shard[1])
+            ids = shards[args.shard[0]]
+
+        if args.auto:
+            with tracer.span("calibration"):
+                auto_tune([(corpus, config, i) for i in sample_ids(ids, args.auto_sample)], len(ids), args.output_dir)
+
+        store_dictionary = b""
+        if args.store:
+            with tracer.span("store dictionary"):
+                store_dictionary = run_forked(train_store_dictionary, corpus, config, sample_ids(ids, args.store_sample))
+
+        # Size of the frequency sketch of the coverage statistics
+        sketch = stats_sketch(snapshot) if args.stats is not None else None
+
+        # Convert duration to labels
+        def create_worker(channel):
+            return UtteranceToLabel(corpus, args.output_dir, channel, None, channel, args.profile,
+                                    args.trace is not None, tables.name, sketch, lists_dir,
+                                    args.lists_memory, args.prefetch_depth, args.write_depth, store_dir, store_dictionary,
+                                    duration_fields() if args.durations is not None else None)
+
+        # Process the utterances with a supervised pool of workers (restarted on crash or timeout)
+        progress = Progress(len(ids), args.status, args.failures, args.progress_interval)
+        (profile, stats, durations, events, parts) = gather(supervise(create_worker, ids, progress), sketch)
+
+        archives = []
+        if args.stats is not None:
+            path = shard_output(args.stats)
+            stats.dump(path)
+            logging.info("coverage statistics:\n%s" % stats.report())
+            archives.append(("stats", path))
+
+        if args.durations is not None:
+            path = shard_output(args.durations)
+            durations.dump(path)
+            logging.info("duration statistics:\n%s" % durations.report())
+            archives.append(("durations", path))
+
+        if lists_dir is not None:
+            for kind in LISTS:
+                path = shard_output(os.path.join(args.output_dir, "%s.list" % kind))
+                nb_names = merge_partitions(os.path.join(lists_dir, kind), NB_LIST_PARTITIONS, path)
+                logging.info("%d unique names in %s" % (nb_names, path))
+                archives.append(("list", path))
+            shutil.rmtree(lists_dir)
+
+        pattern = "%d.lab"
+        if store_dir is not None:
+            # Parts of the crashed workers aren't reported: their utterances were processed again
+            path = shard_output(os.path.join(args.output_dir, STORE_NAME))
+            merge_stores(sorted(parts), path)
+            logging.info("%d utterances stored in %s (%d bytes)" % (len(ids), path, os.path.getsize(path)))
+            archives.append(("labelstore", path))
+            shutil.rmtree(store_dir)
+            pattern = "%s:%%d" % os.path.basename(path)
+
+        if args.shard is not None:
+            write_manifest(args.output_dir, "roots2lab", args.shard[0], args.shard[1], shards, pattern,
+                           [f["id"] for f in progress.failures], archives)
+    finally:
+        tables.close()
+    write_reports(tracer, profile, events)
 
 ###############################################################################
 #  Envelopping
@@ -301,18 +959,89 @@ if __name__ == '__main__':
         parser = argparse.ArgumentParser(description="")
 
         # Add options
-        parser.add_argument("-c", "--configuration", type=open)
+        parser.add_argument("-c", "--configuration", help="configuration file")
+        parser.add_argument("--no-cache", action="store_true",
+                            help="parse the configuration and build the alphabets instead of using their snapshot")
         parser.add_argument("-v", "--verbosity", action="count", default=0,
                             help="increase output verbosity")
         parser.add_argument("-p", "--nb_proc", default=1, type=int,
                             help="nb process in parallel")
+        parser.add_argument("--profile", action="store_true",
+                            help="report the call counts, time and cache hits of each feature")
+        parser.add_argument("--profile-json", default=None,
+                            help="also dump the feature profile in this JSON file (implies --profile)")
+        parser.add_argument("--trace", default=None,
+                            help="write a Chrome/Perfetto trace of the worker stages in this JSON file")
+        parser.add_argument("--status", default=None,
+                            help="JSON status file (progress, throughput, ETA) periodically updated")
+        parser.add_argument("--failures", default=None,
+                            help="JSON report of the failed utterances and their exception")
+        parser.add_argument("--progress-interval", default=10.0, type=float,
+                            help="minimal time in seconds between two progress updates")
+        parser.add_argument("--shard", default=None, type=parse_shard,
+                            help="only process the shard i/N (i in [0, N-1]) and write its manifest")
+        parser.add_argument("--stats", default=None,
+                            help="write the coverage statistics of the labels in this JSON file")
+        parser.add_argument("--sketch-width", default=None, type=int,
+                            help="width of the count-min sketch of the --stats frequencies (default: sized to the phone alphabet)")
+        parser.add_argument("--sketch-depth", default=4, type=int,
+                            help="depth of the count-min sketch of the --stats frequencies")
+        parser.add_argument("--durations", default=None,
+                            help="write the duration statistics of the phones and NSS in this JSON file")
+        parser.add_argument("--duration-contexts", default="",
+                            help="comma separated label fields (e.g. b1,e1) splitting the duration statistics of each phone")
+        parser.add_argument("--timeout", default=None, type=float,
+                            help="maximal time in seconds to load or compute an utterance before its worker is restarted")
+        parser.add_argument("--max-retries", default=2, type=int,
+                            help="number of retries of an utterance whose worker crashed or timed out before quarantine")
+        parser.add_argument("--validate", action="store_true",
+                            help="check the structure of the utterances first and ignore the invalid ones")
+        parser.add_argument("--auto", action="store_true",
+                            help="choose the number of workers and the queue depths from a calibration run")
+        parser.add_argument("--auto-sample", default=20, type=int,
+                            help="number of utterances of the calibration run")
+        parser.add_argument("--memory-budget", default=None, type=int,
+                            help="memory budget in MB of the workers for --auto (default: available memory)")
+        parser.add_argument("--prefetch-depth", default=2, type=int,
+                            help="number of utterances loaded in advance by each worker")
+        parser.add_argument("--write-depth", default=4, type=int,
+                            help="number of computed utterances waiting to be written in each worker")
+        parser.add_argument("--lists", action="store_true",
+                            help="also write the unique label lists full.list and mono.list in output_dir")
+        parser.add_argument("--lists-memory", default=100000, type=int,
+                            help="maximal number of names kept in memory per worker and list")
+        parser.add_argument("--store", action="store_true",
+                            help="write the labels in the compressed label store %s of output_dir instead of label files"
+                            % STORE_NAME)
+        parser.add_argument("--store-sample", default=64, type=int,
+                            help="number of utterances on which the compression dictionary of the store is trained")
+        parser.add_argument("--batch", default=None, metavar="MANIFEST",
+                            help="process all the (corpus, configuration, output_dir) of this YAML batch manifest")
+        parser.add_argument("--serve", default=None, metavar="SOCKET",
+                            help="serve the labels on this Unix socket instead of writing them")
+        parser.add_argument("--cache-size", default=256, type=int,
+                            help="number of utterances kept in the cache of the label service")
 
         # Add arguments
-        parser.add_argument("corpus")
-        parser.add_argument("output_dir")
+        parser.add_argument("corpus", nargs="?")
+        parser.add_argument("output_dir", nargs="?")
 
         # Parsing arguments
         args = parser.parse_args()
+        args.profile = args.profile or (args.profile_json is not None)
+        if args.batch is not None:
+            if ((args.shard is not None) or (args.stats is not None) or (args.durations is not None) or args.lists
+                    or args.store or (args.serve is not None)):
+                parser.error("--shard, --stats, --durations, --lists, --store and --serve can't be used in batch mode")
+        elif args.corpus is None:
+            parser.error("the corpus is required")
+        elif args.configuration is None:
+            parser.error("the configuration is required")
+        elif (args.output_dir is None) and (args.serve is None):
+            parser.error("the output_dir is required")
+        invalid = [field for field in duration_fields() if field not in LABEL_FIELDS]
+        if invalid:
+            parser.error("unknown label fields in --duration-contexts: %s" % ", ".join(invalid))
 
         # Verbose level => logging level
         log_level = args.verbosity
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Pure python stand-in for the part of the roots API used by the extraction scripts. A stand-in
+    corpus is described by a JSON file containing a list of utterances:
+
+    {
+      "name": "single-phrase",
+      "segments": [{"start": 0.0, "end": 0.1, "nss": "#"}, {"start": 0.1, "end": 0.2, "phone": "a"}],
+      "syllables": [{"phones": [0], "stressed": true, "prominent": false, "nucleus": 0}],
+      "words": [{"phones": [0], "pos": "NOM"}],
+      "phrases": [{"words": [0]}],
+      "signal": "wav/0.wav"
+    }
+
+    Phone indexes refer to the phone tier, which is made of the segments having a "phone" key. If
+    the segments don't have any time, the utterance has no segment tier (synthesis time).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+import os
+import json
+import random
+
+#####################################################################################################
+### Items
+#####################################################################################################
+class StandinItem:
+    def __init__(self, label):
+        self.label = label
+
+    def to_string(self):
+        return self.label
+
+class StandinSegment(StandinItem):
+    def __init__(self, label, start, end):
+        StandinItem.__init__(self, label)
+        self.start = start
+        self.end = end
+
+    def get_segment_start(self):
+        return self.start
+
+    def get_segment_end(self):
+        return self.end
+
+    def as_signal_segment(self):
+        return self
+
+    def get_base_dir_name(self):
+        return os.path.dirname(self.label)
+
+    def get_file_name(self):
+        return os.path.basename(self.label)
+
+class StandinSyllable(StandinItem):
+    def __init__(self, phones, desc):
+        StandinItem.__init__(self, "".join(p.to_string() for p in phones))
+        self.phones = phones
+        self.desc = desc
+
+    def is_stressed(self):
+        return self.desc.get("stressed", False)
+
+    def is_prominent(self):
+        return self.desc.get("prominent", False)
+
+    def to_phoneme_indices(self):
+        return list(self.desc["phones"])
+
+    def get_nucleus(self):
+        nucleus = self.desc.get("nucleus")
+        if nucleus is None:
+            return []
+        return [self.phones[self.desc["phones"].index(nucleus)]]
+
+#####################################################################################################
+### Sequences and relations
+#####################################################################################################
+class StandinSequence:
+    def __init__(self, items):
+        self.items = items
+
+    def count(self):
+        return len(self.items)
+
+    def get_item(self, index):
+        return self.items[index]
+
+    def get_all_items(self):
+        return list(self.items)
+
+    def as_segment_sequence(self):
+        return self
+
+    def as_phoneme_sequence(self):
+        return self
+
+    def as_syllable_sequence(self):
+        return self
+
+class StandinRelation:
+    def __init__(self, related, target):
+        self.related = related
+        self.target = target
+
+    def get_related_elements(self, index):
+        return list(self.related[index])
+
+    def get_related_items(self, index):
+        return [self.target.get_item(i) for i in self.related[index]]
+
+#####################################################################################################
+### Utterance and corpus
+#####################################################################################################
+class StandinUtterance:
+    def __init__(self, desc, sequence_labels):
+        """
+        """
+        self.desc = desc
+        self.names = dict((v, k) for k, v in sequence_labels.items())
+        self.names.setdefault("Signal", "signal") # default name used by roots2wav
+        self.sequences = dict()
+        self.footprints = dict()
+
+        # Segments, phones and nss, the footprint of an item is the set of segments it covers
+        segments = desc["segments"]
+        phones, nss = [], []
+        for i, seg in enumerate(segments):
+            if "phone" in seg:
+                phones.append((seg["phone"], i))
+            else:
+                nss.append((seg["nss"], i))
+
+        if segments and all("start" in seg for seg in segments):
+            self.add_tier("segment", [StandinSegment(seg.get("phone", seg.get("nss")), seg["start"], seg["end"])
+                                      for seg in segments],
+                          [{i} for i in range(len(segments))])
+        self.add_tier("phone", [StandinItem(l) for (l, _) in phones], [{i} for (_, i) in phones])
+        self.add_tier("nss", [StandinItem(l) for (l, _) in nss], [{i} for (_, i) in nss])
+
+        # Upper levels
+        phone_fp = self.footprints["phone"]
+        self.add_tier("syllable",
+                      [StandinSyllable([self.sequences["phone"].get_item(p) for p in syl["phones"]], syl)
+                       for syl in desc.get("syllables", [])],
+                      [set().union(*[phone_fp[p] for p in syl["phones"]]) for syl in desc.get("syllables", [])])
+        words = desc.get("words", [])
+        word_fp = [set().union(*[phone_fp[p] for p in w["phones"]]) for w in words]
+        self.add_tier("word", [StandinItem(" ".join(self.sequences["phone"].get_item(p).to_string()
+                                                     for p in w["phones"])) for w in words], word_fp)
+        self.add_tier("pos", [StandinItem(w.get("pos", "UNK")) for w in words], word_fp)
+        phrases = desc.get("phrases", [])
+        self.add_tier("phrase", [StandinItem("phrase") for _ in phrases],
+                      [set().union(*[word_fp[w] for w in ph["words"]]) for ph in phrases])
+
+        if "signal" in desc:
+            self.add_tier("signal", [StandinSegment(desc["signal"], 0.0, desc.get("duration", 0.0))], [set()])
+
+    def add_tier(self, tier, items, footprints):
+        self.sequences[tier] = StandinSequence(items)
+        self.footprints[tier] = footprints
+
+    def tier(self, name):
+        return self.names.get(name, name)
+
+    def get_sequence(self, name):
+        return self.sequences[self.tier(name)]
+
+    def is_valid_sequence(self, name):
+        return self.tier(name) in self.sequences
+
+    def get_relation(self, source, target):
+        src = self.footprints[self.tier(source)]
+        dst = self.footprints[self.tier(target)]
+        related = [[j for j, fp in enumerate(dst) if fp & s] for s in src]
+        return StandinRelation(related, self.sequences[self.tier(target)])
+
+class StandinCorpus:
+    def __init__(self, utterances, sequence_labels):
+        """
+        """
+        self.utterances = utterances
+        self.sequence_labels = sequence_labels
+
+    @classmethod
+    def load(cls, path, sequence_labels):
+        with open(path) as f:
+            return cls(json.load(f), sequence_labels)
+
+    def count_utterances(self):
+        return len(self.utterances)
+
+    def get_utterance(self, index):
+        return StandinUtterance(self.utterances[index], self.sequence_labels)
+
+def phone_tier_only(desc):
+    """Synthesis time version of an utterance description: no NSS and no time
+    """
+    desc = dict(desc)
+    desc["segments"] = [{"phone": seg["phone"]} for seg in desc["segments"] if "phone" in seg]
+    return desc
+
+#####################################################################################################
+### Fuzzing
+#####################################################################################################
+PHONES = ["a", "e", "i", "o", "u", "p", "t", "k", "b", "d", "g", "m", "n", "l", "R", "s", "z"]
+VOWELS = ["a", "e", "i", "o", "u"]
+NSS = ["#", "%", "sil"]
+POS = ["NOM", "VER", "ADJ", "DET", "PRE", "ADV"]
+
+KINDS = ["regular", "nss_only", "missing_syllable", "single_phrase", "single_phone"]
+
+def random_utterance(rng, kind="regular"):
+    """Generate a random utterance description of the given kind
+    """
+    segments, syllables, words = [], [], []
+    phones = []
+    t = 0.0
+
+    def add(key, label):
+        nonlocal t
+        dur = round(rng.uniform(0.02, 0.2), 3)
+        segments.append({"start": round(t, 3), "end": round(t + dur, 3), key: label})
+        t += dur
+
+    add("nss", rng.choice(NSS))
+    if kind == "nss_only":
+        for _ in range(rng.randint(0, 3)):
+            add("nss", rng.choice(NSS))
+        return {"name": kind, "segments": segments, "syllables": [], "words": [], "phrases": []}
+
+    nb_words = 1 if kind == "single_phone" else rng.randint(1, 5)
+    for w in range(nb_words):
+        w_phones = []
+        for _ in range(1 if kind == "single_phone" else rng.randint(1, 3)):
+            s_phones = []
+            for _ in range(1 if kind == "single_phone" else rng.randint(1, 3)):
+                phones.append(rng.choice(PHONES))
+                add("phone", phones[-1])
+                s_phones.append(len(phones) - 1)
+            nucleus = [p for p in s_phones if phones[p] in VOWELS]
+            syllables.append({"phones": s_phones, "stressed": rng.random() < 0.3,
+                              "prominent": rng.random() < 0.2,
+                              "nucleus": nucleus[0] if nucleus else None})
+            w_phones += s_phones
+        words.append({"phones": w_phones, "pos": rng.choice(POS)})
+        if rng.random() < 0.2:
+            add("nss", rng.choice(NSS))
+    add("nss", rng.choice(NSS))
+
+    if kind == "missing_syllable":
+        del syllables[rng.randrange(len(syllables))]
+
+    # Phrases: a partition of the words
+    if kind in ("single_phrase", "single_phone") or nb_words == 1:
+        phrases = [{"words": list(range(nb_words))}]
+    else:
+        cuts = sorted(rng.sample(range(1, nb_words), rng.randint(0, min(2, nb_words - 1))))
+        bounds = [0] + cuts + [nb_words]
+        phrases = [{"words": list(range(bounds[i], bounds[i+1]))} for i in range(len(bounds) - 1)]
+
+    return {"name": kind, "segments": segments, "syllables": syllables, "words": words, "phrases": phrases}
+
+def fuzz(nb_utterances, seed=0):
+    """Generate nb_utterances descriptions, cycling through all the kinds
+    """
+    rng = random.Random(seed)
+    return [random_utterance(rng, KINDS[i % len(KINDS)]) for i in range(nb_utterances)]
+
+# standin.py ends here
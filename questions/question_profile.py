@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+    Occupancy of the questions of a question file (e.g. produced by roots2questions.py) on a label
+    set: number of labels matched by each question, questions which never match, which always match
+    and which match exactly the same labels as another one. A pruned question file (without them,
+    the first question of each duplicate group being kept) can be written.
+
+    The patterns aren't matched against each label. The labels are read at once by label_reader.py
+    and each pattern is aligned with the layout of the labels: "*-a+*" becomes "p3 == a", "*/J:1+*"
+    becomes "j1 == 1". The conditions are evaluated once on the distinct values of their field, and
+    the match set of a question is then computed on the whole label set with numpy. The patterns
+    which can't be decomposed (inner wildcards) and the labels whose values contain a delimiter
+    character are matched as regular expressions.
+
+        question_profile.py -o pruned.hed questions.hed lab/
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import sys
+import os
+import re
+import json
+import hashlib
+import traceback
+import argparse
+import time
+import logging
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "labels"))
+from labelformat import LABEL_FIELDS, DELIMITERS, model_name
+from label_reader import field_text, format_labels, read_labels
+
+LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+###############################################################################
+# Question file
+###############################################################################
+QUESTION_RE = re.compile(r"^\s*QS\s+(\S+)\s+\{(.*)\}\s*$")
+
+class Question:
+    def __init__(self, name, patterns, line):
+        self.name = name
+        self.patterns = patterns
+        self.line = line
+
+def read_questions(path):
+    """Questions of a question file (the other lines are ignored)
+    """
+    questions = []
+    with open(path) as f:
+        for line in f:
+            m = QUESTION_RE.match(line)
+            if m is None:
+                if line.strip():
+                    logging.warning("%s: ignored line \"%s\"" % (path, line.strip()))
+                continue
+            patterns = [pattern.strip() for pattern in m.group(2).split(",") if pattern.strip()]
+            questions.append(Question(m.group(1), patterns, line.rstrip("\n")))
+    return questions
+
+def pattern_regex(pattern):
+    """Regular expression of a HTS pattern (* any string, ? any character) matching a whole name
+    """
+    return "".join(".*" if c == "*" else "." if c == "?" else re.escape(c) for c in pattern)
+
+def regex_matches(patterns, names):
+    """Names matched by any of the patterns, tested one by one
+    """
+    regex = re.compile("|".join("(?:%s)" % pattern_regex(pattern) for pattern in patterns) + r"\Z", re.S)
+    return np.array([regex.match(name) is not None for name in names], dtype=bool)
+
+###############################################################################
+# Decomposition
+###############################################################################
+# Fields of the full context name (the label without its times) and the literals around them
+NAME_FIELDS = LABEL_FIELDS[2:]
+NAME_LITERALS = [""] + DELIMITERS[3:]
+
+# The values are runs of characters between the delimiter characters
+DELIMITER_CHARS = frozenset(c for d in DELIMITERS for c in d if not c.isalnum())
+
+def runs(text):
+    """Maximal runs of delimiter / other characters of a text
+    """
+    return [m.group(0) for m in re.finditer("[%s]+|[^%s]+" % ((re.escape("".join(sorted(DELIMITER_CHARS))),) * 2),
+                                            text)]
+
+def is_delimiter(run):
+    return run[0] in DELIMITER_CHARS
+
+def name_layout():
+    """Runs of a full context name: (literal, None) or (None, field)
+    """
+    layout = []
+    for (literal, field) in zip(NAME_LITERALS, NAME_FIELDS + ("",)):
+        layout += [(run, None) for run in runs(literal)]
+        if field:
+            layout.append((None, field))
+    # A value next to another value or to the letters of a literal wouldn't be a run on its own
+    for (previous, current) in zip(layout[:-1], layout[1:]):
+        if (previous[1] is None) and (current[1] is None):
+            continue
+        neighbour = current if previous[1] is not None else previous
+        if (neighbour[1] is not None) or not is_delimiter(neighbour[0]):
+            raise ValueError("the label layout can't be decomposed in runs")
+    return layout
+
+LAYOUT = name_layout()
+
+def run_operator(left_open, right_open):
+    """Operator matching a run of the pattern with a run of the name (open on the wildcard sides)
+    """
+    if left_open and right_open:
+        return "contains"
+    if left_open:
+        return "suffix"
+    if right_open:
+        return "prefix"
+    return "equal"
+
+CONDITIONS = {"equal": lambda value, run: value == run,
+              "prefix": lambda value, run: value.startswith(run),
+              "suffix": lambda value, run: value.endswith(run),
+              "contains": lambda value, run: run in value}
+
+def decompose(pattern):
+    """Alternatives of conditions (field, operator, run) equivalent to the pattern on the names whose
+    values are made of non delimiter characters, None if the pattern has inner wildcards
+    """
+    left_open = pattern.startswith("*")
+    right_open = pattern.endswith("*") and (len(pattern) > 1 or not left_open)
+    middle = pattern[1 if left_open else 0:len(pattern) - 1 if right_open else len(pattern)]
+    if ("*" in middle) or ("?" in middle):
+        return None
+    if not middle:
+        return [[]] if (left_open or right_open) else None
+
+    pattern_runs = runs(middle)
+    alternatives = []
+    starts = range(len(LAYOUT) - len(pattern_runs) + 1) if left_open else [0]
+    for start in starts:
+        end = start + len(pattern_runs)
+        if (not right_open) and (end != len(LAYOUT)):
+            continue
+        conditions = []
+        for (i, run) in enumerate(pattern_runs):
+            (literal, field) = LAYOUT[start + i]
+            operator = run_operator(left_open and i == 0, right_open and i == len(pattern_runs) - 1)
+            if field is None:
+                if (is_delimiter(run) != is_delimiter(literal)) or not CONDITIONS[operator](literal, run):
+                    break
+            elif is_delimiter(run):
+                break
+            else:
+                conditions.append((field, operator, run))
+        else:
+            alternatives.append(conditions)
+    return alternatives
+
+###############################################################################
+# Profile
+###############################################################################
+class FieldIndex:
+    """Distinct textual values of each field of a label table and the value of each label
+    """
+    def __init__(self, table):
+        self.table = table
+        self.nb_labels = len(table.data)
+        self.values = dict()
+        self.codes = dict()
+        irregular = np.zeros(self.nb_labels, dtype=bool)
+        for field in NAME_FIELDS:
+            (unique, codes) = np.unique(table.data[field], return_inverse=True)
+            self.values[field] = list(field_text(field, unique, table.symbols))
+            self.codes[field] = codes.reshape(-1)
+            bad = np.array([(not value) or any(c in DELIMITER_CHARS for c in value) for value in self.values[field]],
+                           dtype=bool)
+            if bad.any():
+                irregular |= bad[self.codes[field]]
+
+        # Labels matched with the regular expressions
+        self.irregular = np.flatnonzero(irregular)
+        self.irregular_names = [model_name(label) for label in format_labels(table.data[self.irregular], table.symbols)]
+        self.names = None
+        self.cache = dict()
+
+    def condition(self, field, operator, run):
+        """Labels satisfying the condition
+        """
+        key = (field, operator, run)
+        if key not in self.cache:
+            values = np.array([CONDITIONS[operator](value, run) for value in self.values[field]], dtype=bool)
+            self.cache[key] = values[self.codes[field]]
+        return self.cache[key]
+
+    def matches(self, question):
+        """Labels matched by the question
+        """
+        matched = np.zeros(self.nb_labels, dtype=bool)
+        fallback = []
+        for pattern in question.patterns:
+            alternatives = decompose(pattern)
+            if alternatives is None:
+                fallback.append(pattern)
+                continue
+            for conditions in alternatives:
+                if not conditions:
+                    matched[:] = True
+                    continue
+                selected = self.condition(*conditions[0])
+                for condition in conditions[1:]:
+                    selected = selected & self.condition(*condition)
+                matched |= selected
+
+        # Patterns which can't be decomposed on all the labels, the others on the irregular ones
+        if fallback:
+            matched |= regex_matches(fallback, self.all_names())
+        if len(self.irregular):
+            matched[self.irregular] = regex_matches(question.patterns, self.irregular_names)
+        return matched
+
+    def all_names(self):
+        """Full context names of all the labels
+        """
+        if self.names is None:
+            self.names = [model_name(label) for label in format_labels(self.table.data, self.table.symbols)]
+        return self.names
+
+class QuestionProfile:
+    def __init__(self, questions, nb_labels):
+        self.questions = questions
+        self.nb_labels = nb_labels
+        self.counts = []
+        self.groups = dict()
+
+    def add(self, question, matches):
+        self.counts.append(int(matches.sum()))
+        key = hashlib.sha1(np.packbits(matches).tobytes()).digest()
+        self.groups.setdefault(key, []).append(len(self.counts) - 1)
+
+    def never(self):
+        return [i for (i, count) in enumerate(self.counts) if count == 0]
+
+    def always(self):
+        return [i for (i, count) in enumerate(self.counts) if count == self.nb_labels]
+
+    def duplicates(self):
+        """Groups of questions with the same match set (neither empty nor full)
+        """
+        return [group for group in self.groups.values()
+                if len(group) > 1 and 0 < self.counts[group[0]] < self.nb_labels]
+
+    def kept(self):
+        removed = set(self.never()) | set(self.always())
+        for group in self.duplicates():
+            removed |= set(group[1:])
+        return [i for i in range(len(self.questions)) if i not in removed]
+
+    def to_dict(self):
+        names = [q.name for q in self.questions]
+        return {"nb_labels": self.nb_labels,
+                "questions": [{"name": name, "count": count} for (name, count) in zip(names, self.counts)],
+                "never": [names[i] for i in self.never()],
+                "always": [names[i] for i in self.always()],
+                "duplicates": [[names[i] for i in group] for group in self.duplicates()]}
+
+    def report(self):
+        lines = ["%d questions, %d labels" % (len(self.questions), self.nb_labels),
+                 "never matching:  %d" % len(self.never()),
+                 "always matching: %d" % len(self.always()),
+                 "duplicates:      %d (%d groups)" % (sum(len(g) - 1 for g in self.duplicates()),
+                                                      len(self.duplicates())),
+                 "kept:            %d" % len(self.kept()),
+                 "occupancy of the kept questions (share of the labels matched):"]
+        fractions = np.array([self.counts[i] for i in self.kept()], dtype=float) / max(1, self.nb_labels)
+        (histogram, edges) = np.histogram(fractions, bins=10, range=(0.0, 1.0))
+        for (count, low, high) in zip(histogram, edges[:-1], edges[1:]):
+            lines.append("  %3d%% - %3d%%: %d" % (low * 100, high * 100, count))
+        return "\n".join(lines)
+
+def load_table(paths):
+    """Labels of label files, MLFs, label directories or a label store
+    """
+    if (len(paths) == 1) and paths[0].endswith(".lstore"):
+        from label_store import LabelStore
+        with LabelStore(paths[0]) as store:
+            return store.table()
+    return read_labels(paths)
+
+###############################################################################
+# Main function
+###############################################################################
+def main():
+    """Main entry function
+    """
+    global args
+
+    questions = read_questions(args.questions)
+    table = load_table(args.labels)
+    index = FieldIndex(table)
+    logging.info("%d labels, %d matched with regular expressions" % (index.nb_labels, len(index.irregular)))
+
+    profile = QuestionProfile(questions, index.nb_labels)
+    for question in questions:
+        matches = index.matches(question)
+        if args.check:
+            expected = regex_matches(question.patterns, index.all_names())
+            if not np.array_equal(matches, expected):
+                raise Exception("question %s: %d labels matched instead of %d" %
+                                (question.name, matches.sum(), expected.sum()))
+        profile.add(question, matches)
+
+    print(profile.report())
+    if args.report is not None:
+        with open(args.report, "w") as f:
+            json.dump(profile.to_dict(), f, indent=2)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write("".join("%s\n" % questions[i].line for i in profile.kept()))
+
+###############################################################################
+#  Envelopping
+###############################################################################
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(description="")
+
+        # Add options
+        parser.add_argument("-v", "--verbosity", action="count", default=0,
+                            help="increase output verbosity")
+        parser.add_argument("-o", "--output", default=None,
+                            help="write the pruned question file")
+        parser.add_argument("-r", "--report", default=None,
+                            help="write the match count of each question and the pruned ones in this JSON file")
+        parser.add_argument("--check", action="store_true",
+                            help="check the matches against the regular expressions of the patterns")
+
+        # Add arguments
+        parser.add_argument("questions", help="question file")
+        parser.add_argument("labels", nargs="+",
+                            help="label files, MLF files (.mlf), label directories or a label store (.lstore)")
+
+        # Parsing arguments
+        args = parser.parse_args()
+
+        # Verbose level => logging level
+        log_level = args.verbosity
+        if (args.verbosity > len(LEVEL)):
+            logging.warning("verbosity level is too high, I'm gonna assume you're taking the highes ")
+            log_level = len(LEVEL) - 1
+        logging.basicConfig(level=LEVEL[log_level])
+
+        # Debug time
+        start_time = time.time()
+        logging.info("start time = " + time.asctime())
+
+        # Running main function <=> run application
+        main()
+
+        # Debug time
+        logging.info("end time = " + time.asctime())
+        logging.info('TOTAL TIME IN MINUTES: %02.2f' %
+                    ((time.time() - start_time) / 60.0))
+
+        # Exit program
+        sys.exit(0)
+    except KeyboardInterrupt as e:  # Ctrl-C
+        raise e
+    except SystemExit as e:  # sys.exit()
+        pass
+    except Exception as e:
+        logging.error('ERROR, UNEXPECTED EXCEPTION')
+        logging.error(str(e))
+        traceback.print_exc(file=sys.stderr)
+        sys.exit(-1)
+
+# question_profile.py ends here
@@ -19,13 +19,8 @@ import argparse
 import time
 import logging
 
-
-from roots import *
-
-try:
-    from roots3p import *
-except Exception as ex:
-    pass
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from config_snapshot import load_configuration
 
 LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
 UNKNOWN_VALUE = "x"
@@ -33,9 +28,7 @@ UNKNOWN_VALUE = "x"
 ###############################################################################
 # Functions
 ###############################################################################
-def print_carac(name, ipa_alphabet, nsa_alphabet, left="", right=""):
-    map_cat2phon = ipa_alphabet.list_phonemes_by_categories()
-    nss_map = nsa_alphabet.get_alphabet_map()
+def print_carac(name, map_cat2phon, list_nss, left="", right=""):
 
     phone_set = set()
     for k in map_cat2phon.keys():
@@ -64,7 +57,6 @@ def print_carac(name, ipa_alphabet, nsa_alphabet, left="", right=""):
         print(q)
 
     # NSS
-    list_nss = nss_map.keys()
     q = "QS \"%s-%s\" {" % (name, "nss")
     for val in range(len(list_nss)-1):
         nss = list_nss[val]
@@ -122,15 +114,18 @@ def main():
     """
     global args
 
-    ipa_alphabet = phonology_ipa_IrisaAlphabet.get_instance()
-    nsa_alphabet = phonology_nsa_IrisaNsAlphabet.get_instance()
+    alphabets = load_configuration(args.configuration, not args.no_cache).alphabets
+    if alphabets is None:
+        raise Exception("the alphabets of %s can't be loaded" % args.configuration)
+    map_cat2phon = alphabets["phone_categories"]
+    list_nss = alphabets["nss"]
 
     # Phone part
-    print_carac("LL", ipa_alphabet, nsa_alphabet, "", "^*")
-    print_carac("L", ipa_alphabet, nsa_alphabet, "*^", "-*")
-    print_carac("C", ipa_alphabet, nsa_alphabet, "*-", "+*")
-    print_carac("N", ipa_alphabet, nsa_alphabet, "*+", "=*")
-    print_carac("NN", ipa_alphabet, nsa_alphabet, "*=", "@*")
+    print_carac("LL", map_cat2phon, list_nss, "", "^*")
+    print_carac("L", map_cat2phon, list_nss, "*^", "-*")
+    print_carac("C", map_cat2phon, list_nss, "*-", "+*")
+    print_carac("N", map_cat2phon, list_nss, "*+", "=*")
+    print_carac("NN", map_cat2phon, list_nss, "*=", "@*")
     print("\n\n")
 
     # Utterance part
@@ -146,8 +141,14 @@ if __name__ == '__main__':
         parser = argparse.ArgumentParser(description="")
 
         # Add options
+        parser.add_argument("-c", "--configuration",
+                            default=os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                                                 "configurations", "irisa.yaml"),
+                            help="configuration file giving the alphabets")
         parser.add_argument("-v", "--verbosity", action="count", default=0,
                             help="increase output verbosity")
+        parser.add_argument("--no-cache", action="store_true",
+                            help="parse the configuration and build the alphabets instead of using their snapshot")
 
         # Add arguments
         # Example : parser.add_argument("echo", help="description")
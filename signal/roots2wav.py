@@ -18,22 +18,30 @@ import traceback
 import argparse
 import time
 import logging
-import roots
 import shutil
 import queue
 from threading import Thread
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from tracing import get_tracer, write_trace
+from progress import Progress
+from corpus_index import CorpusIndex
+from sharding import parse_shard, plan_shards, estimated_costs, write_manifest
+from calibration import StageTimes, sample_ids, current_rss, run_forked, trial_directory, plan_copy_threads, describe
+
 LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
 
 ###############################################################################
 # Functions
 ###############################################################################
 class WavExtraction(Thread):
-    def __init__(self, queue, sequence_labels = None):
+    def __init__(self, queue, sequence_labels = None, tracer = None, progress = None):
         """
         """
         Thread.__init__(self)
         self.queue = queue
+        self.progress = progress
+        self.tracer = tracer if tracer is not None else get_tracer(False)
 
         if sequence_labels is not None:
             self.sequence_labels = sequence_labels
@@ -44,30 +52,63 @@ class WavExtraction(Thread):
     def run(self):
         """
         """
+        self.tracer.name_thread(self.name)
         while True:
-            utt_infos = self.queue.get()
+            with self.tracer.span("queue.get"):
+                utt_infos = self.queue.get()
             if utt_infos is None:
                 break
 
 
             # Get informations
             id = utt_infos[0]
-            utt = utt_infos[1].get_utterance(id)
             out_dir = utt_infos[2]
-
-            # Generate path
-            signal_sequence = utt.get_sequence(self.sequence_labels["signal"]).as_segment_sequence()
-            item = signal_sequence.get_item(0).as_signal_segment()
-            in_wav_path = os.path.join(item.get_base_dir_name(), item.get_file_name())
-            out_wav_path = os.path.join(out_dir, "%s.wav" % id)
-
-            # Copy now
-            shutil.copyfile(in_wav_path, out_wav_path)
-
-            # Over !
-            print("%d.wav has been extracted" % id)
+            try:
+                with self.tracer.span("load", id=id):
+                    utt = utt_infos[1].get_utterance(id)
+
+                # Generate path
+                signal_sequence = utt.get_sequence(self.sequence_labels["signal"]).as_segment_sequence()
+                item = signal_sequence.get_item(0).as_signal_segment()
+                in_wav_path = os.path.join(item.get_base_dir_name(), item.get_file_name())
+                out_wav_path = os.path.join(out_dir, "%s.wav" % id)
+
+                # Copy now
+                with self.tracer.span("copy", id=id):
+                    shutil.copyfile(in_wav_path, out_wav_path)
+
+                # Over !
+                if self.progress is not None:
+                    self.progress.done(self.name, id)
+            except Exception as ex:
+                if self.progress is None:
+                    raise
+                self.progress.failed(self.name, id, "%s: %s\n%s" % (type(ex).__name__, ex, traceback.format_exc()))
             self.queue.task_done()
 
+def calibrate(corpus, ids, output_dir, signal_label="Signal"):
+    """Calibration run: mean load and copy times of the given utterances (copied in output_dir) and
+    memory of a loaded utterance
+    """
+    times = StageTimes()
+    out_dir = trial_directory(output_dir)
+    start = current_rss()
+    utterances = []
+    try:
+        for id in ids:
+            try:
+                utt = times.measure("load", corpus.get_utterance, id)
+                utterances.append(utt)
+                signal_sequence = utt.get_sequence(signal_label).as_segment_sequence()
+                item = signal_sequence.get_item(0).as_signal_segment()
+                in_wav_path = os.path.join(item.get_base_dir_name(), item.get_file_name())
+                times.measure("copy", shutil.copyfile, in_wav_path, os.path.join(out_dir, "%d.wav" % id))
+            except Exception as ex:
+                logging.debug("calibration: %d failed (%s)" % (id, ex))
+    finally:
+        shutil.rmtree(out_dir)
+    return (times.to_dict(), max(0, current_rss() - start) / max(1, len(utterances)))
+
 ###############################################################################
 # Main function
 ###############################################################################
@@ -76,17 +117,36 @@ def main():
     """
     global args
 
-    corpus = roots.Corpus(args.corpus)
+    tracer = get_tracer(args.trace is not None)
+    with tracer.span("load corpus"):
+        import roots
+        corpus = roots.Corpus(args.corpus)
 
     # Convert duration to labels
+    ids = list(range(0, corpus.count_utterances()))
+    if args.shard is not None:
+        index = CorpusIndex.load(args.corpus)
+        shards = plan_shards(ids, estimated_costs(ids, index, "signal"), args.shard[1])
+        ids = shards[args.shard[0]]
+
+    if args.auto:
+        with tracer.span("calibration"):
+            (times, utterance_memory) = run_forked(calibrate, corpus, sample_ids(ids, args.auto_sample), args.output_dir)
+        times = StageTimes.from_dict(times)
+        memory_budget = args.memory_budget * 2**20 if args.memory_budget is not None else None
+        plan = plan_copy_threads(times, len(ids), utterance_memory, memory_budget)
+        logging.info("auto: %s" % describe(plan, times))
+        args.nb_proc = plan["nb_proc"]
+
+    progress = Progress(len(ids), args.status, args.failures, args.progress_interval)
     q = queue.Queue()
     threads = []
     for base in range(args.nb_proc):
-        t = WavExtraction(q)
+        t = WavExtraction(q, tracer=tracer, progress=progress)
         t.start()
         threads.append(t)
 
-    for i in range(0, corpus.count_utterances()):
+    for i in ids:
         utt = [i, corpus, args.output_dir]
         q.put(utt)
 
@@ -100,6 +160,14 @@ def main():
 
     for t in threads:
         t.join()
+    progress.close()
+
+    if args.shard is not None:
+        write_manifest(args.output_dir, "roots2wav", args.shard[0], args.shard[1], shards, "%d.wav",
+                       [f["id"] for f in progress.failures])
+
+    if args.trace is not None:
+        write_trace(args.trace, tracer.events)
 
 ###############################################################################
 #  Envelopping
@@ -113,6 +181,22 @@ if __name__ == '__main__':
                             help="increase output verbosity")
         parser.add_argument("-p", "--nb_proc", default=1, type=int,
                             help="nb process in parallel")
+        parser.add_argument("--auto", action="store_true",
+                            help="choose the number of copy threads from a calibration run")
+        parser.add_argument("--auto-sample", default=20, type=int,
+                            help="number of utterances of the calibration run")
+        parser.add_argument("--memory-budget", default=None, type=int,
+                            help="memory budget in MB of the copy threads for --auto (default: available memory)")
+        parser.add_argument("--trace", default=None,
+                            help="write a Chrome/Perfetto trace of the worker stages in this JSON file")
+        parser.add_argument("--status", default=None,
+                            help="JSON status file (progress, throughput, ETA) periodically updated")
+        parser.add_argument("--failures", default=None,
+                            help="JSON report of the failed utterances and their exception")
+        parser.add_argument("--progress-interval", default=10.0, type=float,
+                            help="minimal time in seconds between two progress updates")
+        parser.add_argument("--shard", default=None, type=parse_shard,
+                            help="only process the shard i/N (i in [0, N-1]) and write its manifest")
 
         # Add arguments
         parser.add_argument("corpus", help="roots corpus file")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+Check that shard manifests form a complete run (no missing shard, gap or duplicate) and combine
+them, with their archives, in one output directory. See common/sharding.py
+
+The coverage statistics (roots2lab.py --stats), the duration statistics (roots2lab.py --durations),
+the unique label lists (roots2lab.py --lists) and the label stores (roots2lab.py --store) of the
+shards are merged as well.
+
+LICENSE
+This script is in the public domain, free from copyrights or restrictions.
+Created: 19 October 2026
+"""
+
+import sys
+import os
+import traceback
+import argparse
+import time
+import logging
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from sharding import merge_manifests, ARCHIVE_MERGERS
+from unique_lists import merge_sorted_files
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "labels"))
+from label_stats import merge_files
+from label_store import merge_stores
+from duration_stats import merge_files as merge_duration_files
+
+ARCHIVE_MERGERS["stats"] = merge_files
+ARCHIVE_MERGERS["list"] = merge_sorted_files
+ARCHIVE_MERGERS["labelstore"] = merge_stores
+ARCHIVE_MERGERS["durations"] = merge_duration_files
+
+LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+###############################################################################
+# Main function
+###############################################################################
+def main():
+    """Main entry function
+    """
+    global args
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    try:
+        merged = merge_manifests(args.manifests, args.output_dir)
+    except ValueError as ex:
+        logging.error("shards are not complete: %s" % ex)
+        sys.exit(1)
+
+    logging.info("%d shards, %d utterances merged (%d failed)" %
+                 (merged["nb_shards"], merged["nb_ids"], len(merged["failed"])))
+
+###############################################################################
+#  Envelopping
+###############################################################################
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(description="")
+
+        # Add options
+        parser.add_argument("-v", "--verbosity", action="count", default=0,
+                            help="increase output verbosity")
+
+        # Add arguments
+        parser.add_argument("output_dir", help="output directory of the merged manifest and archives")
+        parser.add_argument("manifests", nargs="+", help="shard manifest files")
+
+        # Parsing arguments
+        args = parser.parse_args()
+
+        # Verbose level => logging level
+        log_level = args.verbosity
+        if (args.verbosity > len(LEVEL)):
+            logging.warning("verbosity level is too high, I'm gonna assume you're taking the highes ")
+            log_level = len(LEVEL) - 1
+        logging.basicConfig(level=LEVEL[log_level])
+
+        # Debug time
+        start_time = time.time()
+        logging.info("start time = " + time.asctime())
+
+        # Running main function <=> run application
+        main()
+
+        # Debug time
+        logging.info("end time = " + time.asctime())
+        logging.info('TOTAL TIME IN MINUTES: %02.2f' %
+                    ((time.time() - start_time) / 60.0))
+
+        # Exit program
+        sys.exit(0)
+    except KeyboardInterrupt as e:  # Ctrl-C
+        raise e
+    except SystemExit as e:  # sys.exit()
+        raise e
+    except Exception as e:
+        logging.error('ERROR, UNEXPECTED EXCEPTION')
+        logging.error(str(e))
+        traceback.print_exc(file=sys.stderr)
+        sys.exit(-1)
+
+# merge_shards.py ends here
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+Build the sidecar index (<corpus>.index.json) of a roots corpus, see common/corpus_index.py
+
+LICENSE
+This script is in the public domain, free from copyrights or restrictions.
+Created: 19 October 2026
+"""
+
+import sys
+import os
+import traceback
+import argparse
+import time
+import logging
+
+import roots
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from corpus_index import CorpusIndex, index_path
+
+# Configuration part
+from yaml import load
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+###############################################################################
+# Main function
+###############################################################################
+def main():
+    """Main entry function
+    """
+    global args
+
+    config = load(args.configuration, Loader=Loader)
+    sequence_labels = config["SequenceLabels"]
+
+    if (not args.force) and (CorpusIndex.load(args.corpus, sequence_labels) is not None):
+        logging.info("%s is up to date" % index_path(args.corpus))
+        return
+
+    corpus = roots.Corpus(args.corpus)
+    index = CorpusIndex.build(corpus, args.corpus, sequence_labels, args.nb_proc)
+    index.save(index_path(args.corpus))
+    logging.info("%d utterances indexed in %s" % (index.count_utterances(), index_path(args.corpus)))
+
+###############################################################################
+#  Envelopping
+###############################################################################
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(description="")
+
+        # Add options
+        parser.add_argument("-c", "--configuration", type=open, required=True)
+        parser.add_argument("-v", "--verbosity", action="count", default=0,
+                            help="increase output verbosity")
+        parser.add_argument("-p", "--nb_proc", default=1, type=int,
+                            help="nb process in parallel")
+        parser.add_argument("-f", "--force", action="store_true",
+                            help="rebuild the index even if it is up to date")
+
+        # Add arguments
+        parser.add_argument("corpus", help="roots corpus file")
+
+        # Parsing arguments
+        args = parser.parse_args()
+
+        # Verbose level => logging level
+        log_level = args.verbosity
+        if (args.verbosity > len(LEVEL)):
+            logging.warning("verbosity level is too high, I'm gonna assume you're taking the highes ")
+            log_level = len(LEVEL) - 1
+        logging.basicConfig(level=LEVEL[log_level])
+
+        # Debug time
+        start_time = time.time()
+        logging.info("start time = " + time.asctime())
+
+        # Running main function <=> run application
+        main()
+
+        # Debug time
+        logging.info("end time = " + time.asctime())
+        logging.info('TOTAL TIME IN MINUTES: %02.2f' %
+                    ((time.time() - start_time) / 60.0))
+
+        # Exit program
+        sys.exit(0)
+    except KeyboardInterrupt as e:  # Ctrl-C
+        raise e
+    except SystemExit as e:  # sys.exit()
+        pass
+    except Exception as e:
+        logging.error('ERROR, UNEXPECTED EXCEPTION')
+        logging.error(str(e))
+        traceback.print_exc(file=sys.stderr)
+        sys.exit(-1)
+
+# roots2index.py ends here
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+Sébastien Le Maguer <slemaguer@coli.uni-saarland.de>
+
+DESCRIPTION
+
+Validate the structure of all the utterances of a roots corpus before the extraction (see
+common/validation.py). The invalid utterances are reported per check and, optionally, written as an
+IgnoredID list ready to be included in the configuration. The exit code is 1 if an utterance is invalid.
+
+LICENSE
+This script is in the public domain, free from copyrights or restrictions.
+Created: 19 October 2026
+"""
+
+import sys
+import os
+import traceback
+import argparse
+import time
+import logging
+
+import roots
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from validation import extract_corpus, validate, invalid_ids, write_report
+
+# Configuration part
+from yaml import load, dump
+try:
+    from yaml import CLoader as Loader, CDumper as Dumper
+except ImportError:
+    from yaml import Loader, Dumper
+
+LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+###############################################################################
+# Main function
+###############################################################################
+def main():
+    """Main entry function
+    """
+    global args
+
+    config = load(args.configuration, Loader=Loader)
+    ignored = set(config.get("IgnoredID", []))
+
+    corpus = roots.Corpus(args.corpus)
+    ids = [i for i in range(corpus.count_utterances()) if i not in ignored]
+    values = extract_corpus(corpus, config["SequenceLabels"], ids, args.nb_proc)
+    report = validate(ids, values, not args.no_signal)
+
+    invalid = invalid_ids(report)
+    for (check, utt_ids) in report.items():
+        if utt_ids:
+            logging.warning("%s: %d utterances (%s)" % (check, len(utt_ids), ", ".join(str(i) for i in utt_ids[:10])))
+    logging.info("%d/%d utterances are invalid" % (len(invalid), len(ids)))
+
+    if args.report is not None:
+        errors = dict((str(i), v["error"]) for (i, v) in zip(ids, values) if "error" in v)
+        write_report(args.report, report, errors)
+
+    if args.ignored is not None:
+        with open(args.ignored, "w") as f:
+            dump({"IgnoredID": sorted(ignored | set(invalid))}, f, Dumper=Dumper, default_flow_style=None)
+
+    if invalid:
+        sys.exit(1)
+
+###############################################################################
+#  Envelopping
+###############################################################################
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser(description="")
+
+        # Add options
+        parser.add_argument("-c", "--configuration", type=open, required=True)
+        parser.add_argument("-v", "--verbosity", action="count", default=0,
+                            help="increase output verbosity")
+        parser.add_argument("-p", "--nb_proc", default=1, type=int,
+                            help="nb process in parallel")
+        parser.add_argument("--no-signal", action="store_true",
+                            help="don't check that the signal files exist")
+        parser.add_argument("--report", default=None,
+                            help="JSON report of the invalid utterances per check")
+        parser.add_argument("--ignored", default=None,
+                            help="write the IgnoredID list (configuration ones and invalid ones) in this YAML file")
+
+        # Add arguments
+        parser.add_argument("corpus", help="roots corpus file")
+
+        # Parsing arguments
+        args = parser.parse_args()
+
+        # Verbose level => logging level
+        log_level = args.verbosity
+        if (args.verbosity > len(LEVEL)):
+            logging.warning("verbosity level is too high, I'm gonna assume you're taking the highes ")
+            log_level = len(LEVEL) - 1
+        logging.basicConfig(level=LEVEL[log_level])
+
+        # Debug time
+        start_time = time.time()
+        logging.info("start time = " + time.asctime())
+
+        # Running main function <=> run application
+        main()
+
+        # Debug time
+        logging.info("end time = " + time.asctime())
+        logging.info('TOTAL TIME IN MINUTES: %02.2f' %
+                    ((time.time() - start_time) / 60.0))
+
+        # Exit program
+        sys.exit(0)
+    except KeyboardInterrupt as e:  # Ctrl-C
+        raise e
+    except SystemExit as e:  # sys.exit()
+        raise e
+    except Exception as e:
+        logging.error('ERROR, UNEXPECTED EXCEPTION')
+        logging.error(str(e))
+        traceback.print_exc(file=sys.stderr)
+        sys.exit(-1)
+
+# roots2validate.py ends here